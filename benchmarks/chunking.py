@@ -0,0 +1,193 @@
+"""
+Compares the Document Summarizer's token-aware chunker with the character splitter
+it replaced (LangChain `CharacterTextSplitter`, 1000 characters with 200 of overlap,
+split at newlines) on chunk count, embedding cost, retrieval quality and speed.
+
+Documents are generated in three layouts of the same text: structured (headings and
+blank lines between paragraphs), PDF lines (hard-wrapped lines, no blank lines) and
+few newlines (one line per paragraph, as some PDFs extract). Each document plants
+facts in its paragraphs; retrieval asks a question about each fact, ranks the chunks
+with the offline hashed bag-of-words embeddings, and counts the questions whose
+top-k chunks contain the whole fact sentence.
+
+    python -m benchmarks.chunking [--documents N] [--top-k K] [--json]
+"""
+import argparse
+import json
+import logging
+import random
+import statistics
+import time
+
+import numpy as np
+
+from benchmarks.html_extraction import WORDS
+from tools.chunking import CHUNK_TOKENS, chunk_pages
+from tools.document_summarizer_utils import split_pages
+from tools.llm_client import FakeEmbeddings
+from tools.tokens import count_tokens
+
+LAYOUTS = ("structured", "pdf lines", "few newlines")
+SECTIONS = ("Overview", "Market Outlook", "Operations", "Financial Results", "Risks", "Regional Review")
+THINGS = (("megawatts", "solar capacity"), ("tonnes", "recycled steel"), ("litres", "treated water"),
+          ("vehicles", "electric buses"), ("hectares", "restored wetland"))
+SYLLABLES = "ka lo mi ra ven tor sel dur an qui bex zo fal nim or pra".split()
+EMBEDDING_SIZE = 1024
+LINE_WIDTH = 90
+LINES_PER_PAGE = 50
+
+
+def legacy_splitter():
+    from langchain_text_splitters import CharacterTextSplitter
+
+    # It warns about every chunk longer than chunk_size; the results report them.
+    logging.getLogger("langchain_text_splitters").setLevel(logging.ERROR)
+
+    return CharacterTextSplitter(separator="\n", chunk_size=1000, chunk_overlap=200, length_function=len)
+
+
+def _name(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(3)).capitalize()
+
+
+def _sentence(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 24))).capitalize() + "."
+
+
+def generate_document(rng, sections=12, paragraphs=5):
+    """
+    Returns (sections, facts): each section is (heading, paragraphs), and each fact is
+    (sentence, question) for a sentence planted in one of the paragraphs.
+    """
+    document, facts = [], []
+    for number in range(sections):
+        heading = f"{number + 1}. {rng.choice(SECTIONS)}"
+        body = []
+        for _ in range(paragraphs):
+            sentences = [_sentence(rng) for _ in range(rng.randint(3, 9))]
+            if rng.random() < 0.6:
+                name, place, year = _name(rng), _name(rng), rng.randint(1995, 2024)
+                unit, thing = rng.choice(THINGS)
+                amount = rng.randint(10, 9000)
+                fact = f"The {name} facility in {place} reported {amount} {unit} of {thing} in {year}."
+                question = f"How many {unit} of {thing} did the {name} facility in {place} report in {year}?"
+                sentences.insert(rng.randrange(len(sentences) + 1), fact)
+                facts.append((fact, question))
+            body.append(" ".join(sentences))
+        document.append((heading, body))
+    return document, facts
+
+
+def _wrap(text, width=LINE_WIDTH):
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + len(word) + 1 > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
+
+
+def render_pages(document, layout):
+    """Renders a document as the page texts an extractor would produce for `layout`."""
+    lines = []
+    for heading, body in document:
+        if layout == "structured":
+            lines += [f"## {heading}", ""]
+            for paragraph in body:
+                lines += [paragraph, ""]
+        elif layout == "pdf lines":
+            lines.append(heading)
+            for paragraph in body:
+                lines += _wrap(paragraph)
+        else:
+            lines.append(heading)
+            lines += body
+    per_page = LINES_PER_PAGE if layout == "pdf lines" else max(LINES_PER_PAGE // 5, 1)
+    for start in range(0, len(lines), per_page):
+        yield "\n".join(lines[start:start + per_page])
+
+
+def _normalize(text):
+    return " ".join(text.split())
+
+
+def _retrieval(chunks, facts, top_k, embeddings):
+    vectors = np.array(embeddings.embed_documents(chunks))
+    normalized_chunks = [_normalize(chunk) for chunk in chunks]
+    hits, reciprocal_ranks = 0, []
+    for fact, question in facts:
+        scores = vectors @ np.array(embeddings.embed_query(question))
+        ranking = np.argsort(-scores)[:top_k]
+        rank = next((i for i, index in enumerate(ranking) if fact in normalized_chunks[index]), None)
+        hits += rank is not None
+        reciprocal_ranks.append(0.0 if rank is None else 1.0 / (rank + 1))
+    return hits / len(facts), statistics.mean(reciprocal_ranks)
+
+
+def run(documents=6, top_k=3, chunk_tokens=CHUNK_TOKENS):
+    rng = random.Random(0)
+    corpus = [generate_document(rng) for _ in range(documents)]
+    embeddings = FakeEmbeddings(size=EMBEDDING_SIZE)
+    splitters = {
+        "character (1000/200)": lambda pages: split_pages(pages, legacy_splitter()),
+        f"token-aware ({chunk_tokens})": lambda pages: chunk_pages(pages, chunk_tokens),
+    }
+    results = {}
+    for layout in LAYOUTS:
+        for label, split in splitters.items():
+            chunk_counts, chunk_tokens_seen, source_tokens, embedded_tokens = [], [], 0, 0
+            split_seconds, hit_rates, mrrs = 0.0, [], []
+            for document, facts in corpus:
+                pages = list(render_pages(document, layout))
+                source_tokens += sum(count_tokens(page) for page in pages)
+                started = time.perf_counter()
+                chunks = list(split(iter(pages)))
+                split_seconds += time.perf_counter() - started
+                tokens = [count_tokens(chunk) for chunk in chunks]
+                chunk_counts.append(len(chunks))
+                chunk_tokens_seen += tokens
+                embedded_tokens += sum(tokens)
+                hit_rate, mrr = _retrieval(chunks, facts, top_k, embeddings)
+                hit_rates.append(hit_rate)
+                mrrs.append(mrr)
+            results.setdefault(layout, {})[label] = {
+                "chunks": sum(chunk_counts),
+                "mean_tokens": round(statistics.mean(chunk_tokens_seen), 1),
+                "max_tokens": max(chunk_tokens_seen),
+                "embedded_tokens": embedded_tokens,
+                "embedding_cost": round(embedded_tokens / source_tokens, 3),
+                "split_ms": round(split_seconds * 1000, 2),
+                f"hit@{top_k}": round(statistics.mean(hit_rates), 3),
+                "mrr": round(statistics.mean(mrrs), 3),
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, default=6, help="Generated documents per layout.")
+    parser.add_argument("--top-k", type=int, default=3, help="Chunks retrieved per question.")
+    parser.add_argument("--chunk-tokens", type=int, default=CHUNK_TOKENS, help="Token-aware chunk budget.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    results = run(args.documents, args.top_k, args.chunk_tokens)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for layout, rows in results.items():
+        print(layout)
+        for label, row in rows.items():
+            print(
+                f"  {label:22} {row['chunks']:5} chunks  mean {row['mean_tokens']:6} tok  max {row['max_tokens']:5} tok"
+                f"  embedded {row['embedding_cost']:5.2f}x  {row['split_ms']:8.2f} ms"
+                f"  hit@{args.top_k} {row[f'hit@{args.top_k}']:.2f}  mrr {row['mrr']:.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
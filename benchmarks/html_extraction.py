@@ -0,0 +1,193 @@
+"""
+Compares the Website Summarizer's HTML extraction engine with the extractor it
+replaced (BeautifulSoup with `html.parser` and class-list `find_all` lookups) on
+parse time and on how much of each page's article text it recovers.
+
+The corpus is a directory of `.html` files; a `.txt` file with the same name holds
+the expected article text and enables the quality columns. When the directory does
+not exist, a synthetic corpus of news-style pages (navigation, sidebars, comments,
+large inline scripts) is generated into it first.
+
+    python -m benchmarks.html_extraction [--corpus DIR] [--pages N] [--repeat N] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+from collections import Counter
+
+from bs4 import BeautifulSoup
+
+from tools.html_extract import available_engines, extract_html
+from tools.settings import CACHE_DIR
+
+DEFAULT_CORPUS = os.path.join(CACHE_DIR, "benchmarks", "html")
+
+WORDS = (
+    "market government report city council study data energy climate water health school police court "
+    "budget election company workers prices growth research policy officials residents project plan "
+    "analysis network security transport housing community program investment team season results"
+).split()
+
+
+def legacy_extract(html):
+    """The extractor the engine replaced, minus its 15,000-character cut so that quality is comparable."""
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.string if soup.title and soup.title.string else None
+    for irrelevant in soup.find_all(["script", "style", "img", "input", "nav", "footer", "header", "aside", "form", "button", "link", "meta", "svg"]):
+        irrelevant.decompose()
+    possible_content_divs = []
+    for tag in ['main', 'article', 'div']:
+        possible_content_divs.extend(soup.find_all(tag, class_=['content', 'main-content', 'article-body', 'post-content', 'entry-content', 'body', 'text-body']))
+    extracted_text = ""
+    if possible_content_divs:
+        for div in possible_content_divs:
+            extracted_text += div.get_text(separator="\n", strip=True) + "\n"
+    elif soup.body:
+        extracted_text = soup.body.get_text(separator="\n", strip=True)
+    text = "\n".join(filter(None, [line.strip() for line in extracted_text.splitlines()]))
+    return title, ' '.join(text.split())
+
+
+def _sentence(rng, words):
+    parts = [rng.choice(WORDS) for _ in range(words)]
+    for i in range(3, words - 1, rng.randint(5, 9)):
+        parts[i] += ","
+    return " ".join(parts).capitalize() + "."
+
+
+def _links(rng, count, cls):
+    items = "".join(f'<li><a href="/{rng.choice(WORDS)}/{i}">{_sentence(rng, 3)}</a></li>' for i in range(count))
+    return f'<div class="{cls}"><ul>{items}</ul></div>'
+
+
+def generate_page(rng, index):
+    """Returns (html, expected article text) for one synthetic news page."""
+    headline = _sentence(rng, 8)
+    paragraphs = [" ".join(_sentence(rng, rng.randint(12, 30)) for _ in range(rng.randint(2, 5))) for _ in range(rng.randint(6, 60))]
+    # Article markup varies: a recognized content class, <article>, or an unlabeled div.
+    layout = index % 3
+    body = f"<h1>{headline}</h1>" + "".join(f"<p>{p}</p>" for p in paragraphs)
+    if layout == 0:
+        article = f'<div class="article-body">{body}</div>'
+    elif layout == 1:
+        article = f'<article class="story">{body}</article>'
+    else:
+        article = f'<div id="s{index}">{body}</div>'
+    script = "<script>" + "var t=" + json.dumps([rng.random() for _ in range(rng.randint(2000, 20000))]) + ";</script>"
+    comments = "".join(f"<p>{_sentence(rng, rng.randint(8, 20))}</p>" for _ in range(rng.randint(3, 15)))
+    html = (
+        f"<!DOCTYPE html><html><head><title>{headline} | Daily News</title>"
+        f"<style>{'.c{color:red}' * 500}</style>{script}</head><body>"
+        f"<header><div class=\"masthead\">Daily News</div></header>{_links(rng, 40, 'menu')}"
+        f"<div class=\"cookie-banner\"><p>{_sentence(rng, 25)}</p></div>"
+        f"<div class=\"layout\"><div class=\"main-column\">{article}{_links(rng, 8, 'related')}"
+        f"<div class=\"comments\">{comments}</div></div>"
+        f"<div class=\"sidebar\">{_links(rng, 20, 'popular')}<p>{_sentence(rng, 30)}</p></div></div>"
+        f"{script}<footer>{_links(rng, 30, 'footer-links')}</footer></body></html>"
+    )
+    return html, "\n".join([headline] + paragraphs)
+
+
+def generate_corpus(directory, pages):
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(0)
+    for index in range(pages):
+        html, expected = generate_page(rng, index)
+        with open(os.path.join(directory, f"page{index:03d}.html"), "w", encoding="utf-8") as f:
+            f.write(html)
+        with open(os.path.join(directory, f"page{index:03d}.txt"), "w", encoding="utf-8") as f:
+            f.write(expected)
+
+
+def word_f1(extracted, expected):
+    """Bag-of-words precision, recall and F1 of extracted text against the expected text."""
+    got, want = Counter(extracted.lower().split()), Counter(expected.lower().split())
+    overlap = sum((got & want).values())
+    if not overlap:
+        return 0.0, 0.0, 0.0
+    precision, recall = overlap / sum(got.values()), overlap / sum(want.values())
+    return precision, recall, 2 * precision * recall / (precision + recall)
+
+
+def load_corpus(directory):
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(directory, name), "rb") as f:
+                html = f.read()
+            expected_path = os.path.join(directory, os.path.splitext(name)[0] + ".txt")
+            expected = None
+            if os.path.exists(expected_path):
+                with open(expected_path, encoding="utf-8") as f:
+                    expected = f.read()
+            corpus.append((name, html, expected))
+    return corpus
+
+
+def _engine_extractor(engine):
+    def extract(html):
+        extraction = extract_html(html, engine=engine)
+        return extraction.title, extraction.text
+    return extract
+
+
+def run(corpus, repeat):
+    extractors = {"legacy (bs4 html.parser)": legacy_extract}
+    for engine in available_engines():
+        extractors[f"engine ({engine})"] = _engine_extractor(engine)
+
+    results = {}
+    for label, extract in extractors.items():
+        times, scores = [], []
+        for name, html, expected in corpus:
+            best = float("inf")
+            for _ in range(repeat):
+                started = time.perf_counter()
+                _, text = extract(html)
+                best = min(best, time.perf_counter() - started)
+            times.append(best)
+            if expected is not None:
+                scores.append(word_f1(text, expected))
+        results[label] = {
+            "pages": len(corpus),
+            "total_ms": round(sum(times) * 1000, 1),
+            "median_ms": round(statistics.median(times) * 1000, 2),
+            "max_ms": round(max(times) * 1000, 2),
+        }
+        if scores:
+            results[label].update({
+                "precision": round(statistics.mean(s[0] for s in scores), 3),
+                "recall": round(statistics.mean(s[1] for s in scores), 3),
+                "f1": round(statistics.mean(s[2] for s in scores), 3),
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Directory of .html files (and optional .txt gold text).")
+    parser.add_argument("--pages", type=int, default=30, help="Pages to generate when the corpus does not exist.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per page; the fastest is reported.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.corpus):
+        generate_corpus(args.corpus, args.pages)
+    corpus = load_corpus(args.corpus)
+    results = run(corpus, args.repeat)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    size_mb = sum(len(html) for _, html, _ in corpus) / 1e6
+    print(f"{len(corpus)} pages, {size_mb:.1f} MB from {args.corpus}")
+    for label, row in results.items():
+        quality = f"  P {row['precision']:.3f}  R {row['recall']:.3f}  F1 {row['f1']:.3f}" if "f1" in row else ""
+        print(f"{label:28} total {row['total_ms']:9.1f} ms  median {row['median_ms']:8.2f} ms  max {row['max_ms']:8.2f} ms{quality}")
+
+
+if __name__ == "__main__":
+    main()
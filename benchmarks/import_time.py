@@ -0,0 +1,121 @@
+"""
+Reports what the app imports at startup and what each tool adds when it is first
+opened, from `python -X importtime` in fresh interpreters.
+
+Every target is imported in a new process after `streamlit`, which any page needs
+anyway, and only the time spent after it is counted. "startup" is what `app.py`
+imports before rendering the AI Assistant page; "all tools (eager)" is what it cost
+when every tool module was imported at startup.
+
+    python -m benchmarks.import_time [--repeat N] [--top N] [--json]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from tools.registry import TOOLS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_MODULES = [
+    "tools.llm_client",
+    "tools.chat_memory",
+    "tools.history_store",
+    "tools.metrics",
+    "tools.registry",
+    "tools.streaming",
+    "tools.ui_helpers",
+]
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def targets():
+    tool_modules = [tool["module"] for tool in TOOLS.values() if tool["module"]]
+    result = {"startup": STARTUP_MODULES}
+    result.update({module.split(".")[-1]: [module] for module in tool_modules})
+    result["all tools (eager)"] = STARTUP_MODULES + tool_modules
+    return result
+
+
+def parse_importtime(stderr, after="streamlit"):
+    """
+    Parses `-X importtime` output, counting only modules imported after the top-level
+    import of `after` finished.
+
+    Returns:
+        tuple[int, dict[str, int]]: Total microseconds, and the cumulative time of each
+        package (a module name without dots, at any depth) imported on the way.
+    """
+    total, packages, started = 0, {}, False
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        if not started:
+            # Top-level imports are indented by one space, nested ones by two more per level.
+            started = indent == 1 and name == after
+            continue
+        if indent == 1:
+            total += cumulative
+        if "." not in name:
+            packages[name] = cumulative
+    return total, packages
+
+
+def measure(modules):
+    code = "import streamlit\n" + "".join(f"import {module}\n" for module in modules)
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return parse_importtime(completed.stderr)
+
+
+def run(repeat=5, top=10):
+    """
+    Measures every target `repeat` times and reports the median, plus the heaviest
+    packages each target imports.
+    """
+    results = {}
+    for label, modules in targets().items():
+        totals, per_module = [], defaultdict(list)
+        for _ in range(repeat):
+            total, imported = measure(modules)
+            totals.append(total)
+            for name, cumulative in imported.items():
+                per_module[name].append(cumulative)
+        heaviest = sorted(
+            ((name, statistics.median(times)) for name, times in per_module.items()),
+            key=lambda item: item[1], reverse=True,
+        )[:top]
+        results[label] = {
+            "median_ms": round(statistics.median(totals) / 1000, 1),
+            "min_ms": round(min(totals) / 1000, 1),
+            "heaviest": {name: round(us / 1000, 1) for name, us in heaviest},
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per target; the median is reported.")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest packages listed per target.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    results = run(args.repeat, args.top)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for label, row in results.items():
+        heaviest = ", ".join(f"{name} {ms:.1f}" for name, ms in row["heaviest"].items())
+        print(f"{label:22} median {row['median_ms']:8.1f} ms  min {row['min_ms']:8.1f} ms  ({heaviest})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Measures how long one Streamlit rerun of `app.py` takes for common interactions,
+using Streamlit's headless `AppTest` runner and the offline fake LLM backend.
+
+Streamlit reruns the whole script on every widget interaction, so this is the
+per-click (and per-message) cost every user pays. Times include `AppTest`'s own
+overhead, which is the same for every interaction.
+
+    python -m benchmarks.rerun [--repeat N] [--json]
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import tempfile
+import time
+
+# Set before the app's modules are imported: no API key needed, nothing written to
+# the real cache directory.
+os.environ.setdefault("LLM_TOOLS_BACKEND", "fake")
+os.environ.setdefault("LLM_TOOLS_CACHE_DIR", tempfile.mkdtemp(prefix="llm_tools_rerun_"))
+
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+TIMEOUT = 60
+
+
+def _timed(action):
+    started = time.perf_counter()
+    action()
+    return time.perf_counter() - started
+
+
+def _new_app():
+    return AppTest.from_file(APP_PATH, default_timeout=TIMEOUT)
+
+
+def run(repeat=20):
+    """
+    Times each interaction `repeat` times, each against a page that has already
+    been rendered once, and returns milliseconds per interaction.
+    """
+    os.chdir(ROOT)
+    times = {"first load": [], "rerun": [], "switch tool": [], "chat message": []}
+
+    for _ in range(repeat):
+        times["first load"].append(_timed(_new_app().run))
+
+    app = _new_app()
+    app.run()
+    for _ in range(repeat):
+        times["rerun"].append(_timed(app.run))
+
+    tools = app.sidebar.radio[0].options
+    for i in range(repeat):
+        radio = app.sidebar.radio[0].set_value(tools[1] if i % 2 == 0 else tools[0])
+        times["switch tool"].append(_timed(radio.run))
+    app.sidebar.radio[0].set_value(tools[0]).run()
+
+    for i in range(repeat):
+        chat = app.chat_input[0].set_value(f"Benchmark message {i}")
+        times["chat message"].append(_timed(chat.run))
+
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    return {
+        label: {
+            "runs": len(samples),
+            "median_ms": round(statistics.median(samples) * 1000, 2),
+            # Nearest rank: with fewer than 20 runs this is the slowest one.
+            "p95_ms": round(sorted(samples)[math.ceil(0.95 * len(samples)) - 1] * 1000, 2),
+        }
+        for label, samples in times.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per interaction.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for label, row in results.items():
+        print(f"{label:14} median {row['median_ms']:8.2f} ms  p95 {row['p95_ms']:8.2f} ms  ({row['runs']} runs)")
+
+
+if __name__ == "__main__":
+    main()
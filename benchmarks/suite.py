@@ -0,0 +1,455 @@
+"""
+Runs an offline benchmark of every tool's hot path and checks it against a baseline.
+
+Everything runs against the fake LLM and embedding backend and a temporary cache
+directory, over a corpus generated from a fixed seed: PDF and DOCX extraction, text
+chunking, FAISS index build and query, website scraping and extraction (pages served
+from a loopback HTTP server), CSV ingestion and prompt assembly for the CSV Analyzer,
+and the end-to-end latency of each tool with a simulated model delay (for the CSV
+Analyzer, a real expression that the sandbox validates and runs).
+
+Results are written as JSON. Given a previous run's JSON as `--baseline`, every
+time (`*_ms`) that is more than `--tolerance` slower than its baseline, and at least
+`--min-delta` ms slower, is reported as a regression and the exit status is 1.
+
+    python -m benchmarks.suite [-o results.json] [--baseline baseline.json] [--quick] [--only CASE ...]
+"""
+import argparse
+import atexit
+import io
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Set before the tools are imported: no API key needed, and always a new, empty cache
+# directory. The inputs are the same on every run, so a cache kept from an earlier run
+# would answer them without doing the work being timed.
+os.environ["LLM_TOOLS_BACKEND"] = "fake"
+os.environ["LLM_TOOLS_CACHE_DIR"] = tempfile.mkdtemp(prefix="llm_tools_suite_")
+atexit.register(shutil.rmtree, os.environ["LLM_TOOLS_CACHE_DIR"], ignore_errors=True)
+
+from benchmarks.html_extraction import WORDS, generate_page
+from tools import llm_client
+from tools.settings import CACHE_DIR
+
+CORPUS_DIR = os.path.join(CACHE_DIR, "benchmarks", "suite")
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_MIN_DELTA_MS = 2.0
+SEED = 0
+# The fake model answers prompts containing the marker (the CSV Analyzer's) with the expression.
+EXPRESSION_PROMPT_MARKER = "Write ONE Python expression"
+ANALYST_EXPRESSION = 'df.groupby("region")["price"].mean().round(2)'
+
+
+class Sizes:
+    """How much work each case does; `--quick` shrinks it for CI."""
+
+    def __init__(self, quick=False):
+        self.documents = 2 if quick else 4
+        self.pages = 10 if quick else 40
+        self.html_pages = 10 if quick else 40
+        self.csv_rows = 20_000 if quick else 200_000
+        self.queries = 20 if quick else 100
+        self.repeat = 2 if quick else 5
+
+
+def _summary(samples):
+    ordered = sorted(samples)
+    return {
+        "median_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(ordered[math.ceil(0.95 * len(ordered)) - 1] * 1000, 2),
+    }
+
+
+def _timed(action):
+    started = time.perf_counter()
+    result = action()
+    return time.perf_counter() - started, result
+
+
+def _paragraph(rng, sentences):
+    return " ".join(
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+        for _ in range(sentences)
+    )
+
+
+def _page_lines(rng, lines=40, width=90):
+    """Returns a page of text wrapped to `width` characters, as the PDF needs it."""
+    words, result, line = _paragraph(rng, lines).split(), [], ""
+    for word in words:
+        if len(line) + len(word) + 1 > width:
+            result.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    result.append(line)
+    return result[:lines]
+
+
+def write_pdf(path, pages):
+    """Writes a minimal, valid PDF with one Helvetica text stream per page (lists of lines)."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    font = 3 + 2 * len(pages)
+    for i, lines in enumerate(pages):
+        text = " T* ".join(
+            "(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") Tj" for line in lines
+        )
+        stream = f"BT /F1 10 Tf 12 TL 50 750 Td {text} ET".encode("latin-1")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+            f"/Resources << /Font << /F1 {font} 0 R >> >> >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def write_docx(path, pages):
+    """
+    Writes a Word document with a page break before every page but the first, marked
+    the way Word marks the pages it laid out when it saves a file.
+    """
+    from docx import Document
+    from docx.enum.text import WD_BREAK
+    from docx.oxml import OxmlElement
+
+    document = Document()
+    for i, lines in enumerate(pages):
+        for j, line in enumerate(lines):
+            paragraph = document.add_paragraph()
+            if i and not j:
+                run = paragraph.add_run()
+                run.add_break(WD_BREAK.PAGE)
+                run._r.append(OxmlElement("w:lastRenderedPageBreak"))
+            paragraph.add_run(line)
+    document.save(path)
+
+
+def generate_corpus(sizes, directory=CORPUS_DIR):
+    """Generates the PDF and DOCX documents, HTML pages and CSV file, and returns their paths."""
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(SEED)
+    corpus = {"pdf": [], "docx": [], "html": [], "csv": None}
+    for index in range(sizes.documents):
+        pages = [_page_lines(rng) for _ in range(sizes.pages)]
+        for kind, write in (("pdf", write_pdf), ("docx", write_docx)):
+            path = os.path.join(directory, f"document{index}.{kind}")
+            write(path, pages)
+            corpus[kind].append(path)
+    for index in range(sizes.html_pages):
+        html, _ = generate_page(rng, index)
+        corpus["html"].append(html.encode("utf-8"))
+
+    regions = ["north", "south", "east", "west"]
+    lines = ["order_id,region,product,quantity,price,shipped"]
+    for row in range(sizes.csv_rows):
+        lines.append(
+            f"{row},{rng.choice(regions)},{rng.choice(WORDS)},{rng.randint(1, 50)},"
+            f"{rng.uniform(1, 500):.2f},{rng.random() < 0.8}"
+        )
+    corpus["csv"] = "\n".join(lines).encode("utf-8")
+    return corpus
+
+
+class PageServer:
+    """Serves generated HTML pages at http://127.0.0.1:<port>/<n>, marked `no-store`."""
+
+    def __init__(self, pages):
+        pages = list(pages)
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                try:
+                    body = pages[int(self.path.strip("/").split("?")[0])]
+                except (ValueError, IndexError):
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                # Every scrape fetches and extracts the page instead of reusing the cache.
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def url(self, index):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/{index}"
+
+    def close(self):
+        self.server.shutdown()
+
+
+def bench_document_extraction(corpus, sizes):
+    from tools.document_summarizer_utils import iter_document_pages
+
+    results = {}
+    for kind in ("pdf", "docx"):
+        # Untimed first run: imports the parser.
+        list(iter_document_pages(corpus[kind][0]))
+        samples, pages = [], 0
+        for _ in range(sizes.repeat):
+            for path in corpus[kind]:
+                elapsed, texts = _timed(lambda: list(iter_document_pages(path)))
+                samples.append(elapsed)
+                pages += len(texts)
+        row = _summary(samples)
+        row["pages_per_s"] = round(pages / sum(samples), 1)
+        results[kind] = row
+    return results
+
+
+def _document_texts(corpus):
+    from tools.document_summarizer_utils import iter_document_pages
+
+    return [list(iter_document_pages(path)) for path in corpus["pdf"]]
+
+
+def bench_chunking(corpus, sizes):
+    from tools.document_summarizer_utils import split_pages
+
+    documents = _document_texts(corpus)
+    samples, chunks = [], 0
+    for _ in range(sizes.repeat):
+        for pages in documents:
+            elapsed, result = _timed(lambda: list(split_pages(pages)))
+            samples.append(elapsed)
+            chunks += len(result)
+    row = _summary(samples)
+    row["chunks_per_document"] = round(chunks / len(samples), 1)
+    return {"split_pages": row}
+
+
+def bench_faiss(corpus, sizes):
+    from tools.document_summarizer_utils import build_knowledge_base, split_pages
+
+    documents = [list(split_pages(pages)) for pages in _document_texts(corpus)]
+    cold, warm, queries = [], [], []
+    rng = random.Random(SEED)
+    # Untimed first build: imports FAISS and LangChain.
+    build_knowledge_base(["warm up"]).similarity_search("warm up", k=1)
+    for repeat in range(sizes.repeat):
+        for chunks in documents:
+            # New chunk texts every time, so nothing is served from the embedding cache.
+            fresh = [f"{chunk} {repeat}" for chunk in chunks]
+            elapsed, index = _timed(lambda: build_knowledge_base(fresh))
+            cold.append(elapsed)
+            warm.append(_timed(lambda: build_knowledge_base(fresh))[0])
+            for _ in range(max(sizes.queries // len(documents), 1)):
+                query = " ".join(rng.choice(WORDS) for _ in range(8))
+                queries.append(_timed(lambda: index.similarity_search(query, k=5))[0])
+    return {"build (cold)": _summary(cold), "build (cached)": _summary(warm), "query": _summary(queries)}
+
+
+def bench_website_scrape(corpus, sizes):
+    from tools.website_summarizer import Website
+
+    server = PageServer(corpus["html"])
+    try:
+        # Untimed first scrape: imports the extraction engine and opens the connection.
+        Website(server.url(0))
+        samples, failures = [], 0
+        for _ in range(sizes.repeat):
+            for index in range(len(corpus["html"])):
+                elapsed, website = _timed(lambda: Website(server.url(index)))
+                samples.append(elapsed)
+                failures += bool(website.error or not website.text)
+    finally:
+        server.close()
+    if failures:
+        raise RuntimeError(f"{failures} pages could not be scraped.")
+    return {"Website._scrape_website": _summary(samples)}
+
+
+def _answer_csv_question(data, question):
+    """The CSV Analyzer's exact mode for one question: ingest, profile, then answer with pandas."""
+    from tools.csv_ingest import ingest_csv
+    from tools.data_analyzer import answer_with_pandas
+    from tools.data_profile import format_profile, profile_dataframe
+
+    df = ingest_csv(io.BytesIO(data)).df
+    return answer_with_pandas(df, format_profile(profile_dataframe(df)), question)
+
+
+def bench_csv_analyzer(corpus, sizes):
+    from tools.csv_ingest import ingest_csv
+    from tools.data_profile import format_profile, profile_dataframe
+    from tools.pandas_sandbox import build_expression_prompt
+
+    load, profile, prompt = [], [], []
+    for _ in range(sizes.repeat):
+        elapsed, result = _timed(lambda: ingest_csv(io.BytesIO(corpus["csv"])))
+        load.append(elapsed)
+        elapsed, dataset_profile = _timed(lambda: profile_dataframe(result.df))
+        profile.append(elapsed)
+        prompt.append(_timed(lambda: build_expression_prompt(
+            format_profile(dataset_profile), "What is the average price per region?"
+        ))[0])
+    row = _summary(load)
+    row["rows_per_s"] = round(len(result.df) * len(load) / sum(load))
+    return {"ingest_csv": row, "profile_dataframe": _summary(profile), "prompt assembly": _summary(prompt)}
+
+
+def bench_end_to_end(corpus, sizes):
+    from tools import api
+
+    code = "def total(rows):\n    return sum(row['price'] * row['quantity'] for row in rows)\n"
+    server = PageServer(corpus["html"])
+    # Every run uses a new input, so no response is served from a cache.
+    cases = {
+        "blog": lambda i: api.generate_blog(f"Benchmark post {i}", "solar, storage", 300),
+        "code": lambda i: api.explain_code(f"# revision {i}\n{code}", "Python"),
+        "sql": lambda i: api.generate_sql(f"Total revenue per region, run {i}"),
+        "document": lambda i: api.summarize_document(corpus["pdf"][i % len(corpus["pdf"])], max_pages=8),
+        "website": lambda i: api.summarize_website(server.url(i % len(corpus["html"]))),
+        "csv analyzer": lambda i: _answer_csv_question(corpus["csv"], f"What is the average price per region? ({i})"),
+    }
+    results = {}
+    try:
+        for name, case in cases.items():
+            # Untimed first run, with an input the timed runs do not use.
+            case(sizes.repeat)
+            results[name] = _summary([_timed(lambda: case(i))[0] for i in range(sizes.repeat)])
+    finally:
+        server.close()
+    return results
+
+
+CASES = {
+    "document extraction": bench_document_extraction,
+    "chunking": bench_chunking,
+    "faiss": bench_faiss,
+    "website scrape": bench_website_scrape,
+    "csv analyzer": bench_csv_analyzer,
+    "end to end": bench_end_to_end,
+}
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE, min_delta_ms=DEFAULT_MIN_DELTA_MS):
+    """
+    Returns the regressions of `results` against `baseline` (both `run` results): every
+    `*_ms` figure above both `baseline * (1 + tolerance)` and `baseline + min_delta_ms`.
+    """
+    regressions = []
+    for case, rows in results["cases"].items():
+        for label, row in rows.items():
+            previous = baseline.get("cases", {}).get(case, {}).get(label, {})
+            for metric, value in row.items():
+                if not metric.endswith("_ms") or metric not in previous:
+                    continue
+                limit = round(max(previous[metric] * (1 + tolerance), previous[metric] + min_delta_ms), 2)
+                if value > limit:
+                    regressions.append({
+                        "case": case, "label": label, "metric": metric,
+                        "baseline": previous[metric], "current": value, "limit": limit,
+                    })
+    return regressions
+
+
+class AnalystBackend(llm_client.FakeBackend):
+    """
+    The fake backend, except that the CSV Analyzer's expression prompts are answered
+    with a real pandas expression, so the tool's sandbox validates and runs it.
+    """
+
+    def _response(self, prompt, model_name, generation_config=None):
+        if isinstance(prompt, str) and EXPRESSION_PROMPT_MARKER in prompt:
+            return f"```python\n{ANALYST_EXPRESSION}\n```"
+        return super()._response(prompt, model_name, generation_config)
+
+
+def run(cases=None, quick=False, llm_latency=0.2, token_latency=0.002):
+    """
+    Runs the selected cases (all by default) and returns
+    {"environment": ..., "cases": {case: {label: {metric: value}}}}.
+    """
+    sizes = Sizes(quick)
+    llm_client.set_backend(AnalystBackend(latency=llm_latency, token_latency=token_latency))
+    corpus = generate_corpus(sizes)
+    results = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "quick": quick,
+            "llm_latency_s": llm_latency,
+            "token_latency_s": token_latency,
+        },
+        "cases": {},
+    }
+    for name in cases or CASES:
+        results["cases"][name] = CASES[name](corpus, sizes)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-o", "--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--baseline", help="A previous run's JSON to check for regressions.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Allowed slowdown as a fraction of the baseline (default: {DEFAULT_TOLERANCE}).")
+    parser.add_argument("--min-delta", type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help=f"Slowdowns smaller than this many ms are noise (default: {DEFAULT_MIN_DELTA_MS:g}).")
+    parser.add_argument("--quick", action="store_true", help="A smaller corpus and fewer runs.")
+    parser.add_argument("--only", nargs="+", choices=sorted(CASES), metavar="CASE", help="Run only these cases.")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Simulated time to first token, in seconds.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    results = run(args.only, args.quick, args.llm_latency)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        results["thresholds"] = {"tolerance": args.tolerance, "min_delta_ms": args.min_delta}
+        results["regressions"] = compare(results, baseline, args.tolerance, args.min_delta)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for case, rows in results["cases"].items():
+            print(case)
+            for label, row in rows.items():
+                figures = "  ".join(f"{metric} {value:>10}" for metric, value in row.items())
+                print(f"  {label:24} {figures}")
+        for regression in results.get("regressions", ()):
+            print(
+                f"REGRESSION {regression['case']} / {regression['label']} {regression['metric']}: "
+                f"{regression['current']} > {regression['limit']} (baseline {regression['baseline']})",
+                file=sys.stderr,
+            )
+    if results.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# Tests run offline against the deterministic fake model, with a throwaway cache.
+os.environ.setdefault("LLM_TOOLS_BACKEND", "fake")
+os.environ.setdefault("LLM_TOOLS_CACHE_DIR", tempfile.mkdtemp(prefix="llm_tools_tests_"))
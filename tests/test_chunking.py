@@ -0,0 +1,70 @@
+import pytest
+
+from tools.chunking import PARAGRAPH, SECTION, chunk_pages, chunk_text, is_heading, iter_units
+from tools.tokens import count_tokens
+
+SENTENCE = "Revenue from the northern solar farms rose again as new capacity came online."
+
+
+@pytest.mark.parametrize("text", [
+    # A table of contents, slide titles, a title-case list: every line reads as a heading.
+    "\n".join(f"Chapter Section Title Number {i}" for i in range(400)),
+    "\n".join(f"{i}. Results And Outlook" for i in range(1, 400)),
+    "\n".join(["## Contents"] + [f"APPENDIX ITEM {i}" for i in range(400)]),
+])
+def test_consecutive_headings_stay_within_budget(text):
+    chunks = list(chunk_text(text, chunk_tokens=128))
+    assert len(chunks) > 1
+    assert max(count_tokens(chunk) for chunk in chunks) <= 128
+    assert " ".join(" ".join(chunks).split()).count("Contents") <= 1
+
+
+def test_chunks_stay_within_budget():
+    sections = [f"## Section {i}\n\n" + " ".join([SENTENCE] * (3 + i % 7)) for i in range(40)]
+    chunks = list(chunk_text("\n\n".join(sections), chunk_tokens=96))
+    assert max(count_tokens(chunk) for chunk in chunks) <= 96
+
+
+def test_heading_starts_its_chunk_and_keeps_its_sentence():
+    text = " ".join([SENTENCE] * 3) + "\n\nMarket Outlook\n" + SENTENCE
+    chunks = list(chunk_text(text, chunk_tokens=100))
+    assert chunks == [" ".join([SENTENCE] * 3), "Market Outlook\n" + SENTENCE]
+
+
+def test_heading_held_back_when_the_next_sentence_overflows():
+    text = " ".join([SENTENCE] * 5) + "\nMarket Outlook\n" + SENTENCE
+    chunks = list(chunk_text(text, chunk_tokens=110))
+    assert all(not chunk.endswith("Market Outlook") for chunk in chunks)
+    assert any(chunk.startswith("Market Outlook\n") for chunk in chunks)
+
+
+def test_wrapped_lines_and_hyphenation_are_joined():
+    pages = ["The capacity of the plant was expan-\nded last year, and output", "rose. Costs fell."]
+    units = [text for text, _, _, _ in iter_units(pages)]
+    assert units == ["The capacity of the plant was expanded last year, and output rose.", "Costs fell."]
+
+
+def test_boundaries():
+    units = list(iter_units(["# Report\nFirst sentence here. Second one.\n\nNew paragraph."]))
+    assert [(boundary, heading) for _, _, boundary, heading in units][0] == (SECTION, True)
+    assert units[-1][2] == PARAGRAPH
+
+
+def test_reads_pages_lazily():
+    def pages():
+        yield SENTENCE
+        raise RuntimeError("read past the first chunk")
+
+    chunks = chunk_pages(pages(), chunk_tokens=20)
+    assert next(chunks)
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("2.1 Market Outlook", True),
+    ("RISK FACTORS", True),
+    ("Results of the Year", True),
+    ("The market grew.", False),
+    ("this is a lowercase line", False),
+])
+def test_is_heading(line, expected):
+    assert is_heading(line) is expected
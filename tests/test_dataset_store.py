@@ -0,0 +1,39 @@
+import io
+import os
+import socket
+import subprocess
+import sys
+
+from tools import dataset_store
+from tools.dataset_store import DatasetStore
+
+CSV = b"region,sales\nnorth,10\nsouth,20\n"
+
+
+def test_second_process_keeps_first_process_files(tmp_path, monkeypatch):
+    first = DatasetStore(str(tmp_path))
+    handle = first.acquire(io.BytesIO(CSV))
+    files = os.listdir(first.root)
+
+    # Another process, e.g. the HTTP service, starting on the same cache directory.
+    monkeypatch.setattr(dataset_store.os, "getpid", lambda: os.getppid())
+    second = DatasetStore(str(tmp_path))
+
+    assert second.root != first.root
+    assert os.listdir(first.root) == files
+    assert handle.df["sales"].sum() == 30
+
+
+def test_removes_directories_of_exited_processes(tmp_path):
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    stale = tmp_path / f"{socket.gethostname()}-{exited.pid}"
+    stale.mkdir()
+    (stale / "old.arrow").write_bytes(b"")
+    other_host = tmp_path / "another-host-1"
+    other_host.mkdir()
+
+    DatasetStore(str(tmp_path))
+
+    assert not stale.exists()
+    assert other_host.exists()
@@ -0,0 +1,50 @@
+import pytest
+
+from tools.document_summarizer_utils import iter_docx_pages, summerizer
+
+PAGES = [["Alpha page text.", "More alpha."], ["Beta page text."], ["Gamma page text.", "Last gamma line."]]
+
+
+@pytest.fixture
+def three_page_docx(tmp_path):
+    from docx import Document
+    from docx.enum.text import WD_BREAK
+    from docx.oxml import OxmlElement
+
+    document = Document()
+    for i, lines in enumerate(PAGES):
+        for j, line in enumerate(lines):
+            paragraph = document.add_paragraph()
+            if i and not j:
+                run = paragraph.add_run()
+                run.add_break(WD_BREAK.PAGE)
+                run._r.append(OxmlElement("w:lastRenderedPageBreak"))
+            paragraph.add_run(line)
+    path = tmp_path / "three_pages.docx"
+    document.save(path)
+    return str(path)
+
+
+@pytest.mark.parametrize("page_range, expected", [
+    (None, PAGES),
+    ((2, 3), PAGES[1:]),
+    ((2, 2), PAGES[1:2]),
+    ((3, None), PAGES[2:]),
+])
+def test_docx_page_range(three_page_docx, page_range, expected):
+    pages = list(iter_docx_pages(three_page_docx, page_range=page_range))
+    assert pages == ["\n".join(lines) for lines in expected]
+
+
+def test_docx_max_pages_after_first(three_page_docx):
+    assert list(iter_docx_pages(three_page_docx, page_range=(2, None), max_pages=1)) == ["Beta page text."]
+
+
+def test_summarizes_docx_page_range(three_page_docx):
+    summary = summerizer(three_page_docx, page_range=(2, 3))
+    assert not summary.startswith("ERROR")
+
+
+def test_retrieval_mode_uses_llm_client(three_page_docx):
+    summary = summerizer(three_page_docx, mode="retrieval")
+    assert summary.startswith("Fake response")
@@ -0,0 +1,33 @@
+import tempfile
+
+import pytest
+from starlette.testclient import TestClient
+
+from tools.http_service import app
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("url, body", [
+    ("/v1/code", {"path": "/etc/passwd"}),
+    ("/v1/code", {"code": "print(1)", "path": "/etc/passwd"}),
+    ("/v1/document", {"path": "/etc/passwd"}),
+])
+def test_rejects_server_paths_in_json(client, url, body):
+    response = client.post(url, json=body)
+    assert response.status_code == 400
+
+
+def test_rejects_server_path_with_upload(client):
+    response = client.post("/v1/document?filename=report.pdf&path=/etc/passwd", content=b"%PDF-1.4")
+    assert response.status_code == 400
+
+
+def test_removes_upload_when_arguments_are_invalid(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    response = client.post("/v1/document?filename=report.pdf&bogus=1", content=b"%PDF-1.4")
+    assert response.status_code == 400
+    assert list(tmp_path.iterdir()) == []
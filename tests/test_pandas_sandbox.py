@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+from tools.pandas_sandbox import SandboxError, run_expression, validate_expression
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({"region": ["north", "south", "north"], "sales": [10, 20, 30]})
+
+
+@pytest.mark.parametrize("template", [
+    'df.apply("to_pi" + "ckle", path="{path}")',
+    'df.agg("to_pi" + "ckle", "{path}")',
+    'df.transform("to_pickle", "{path}")',
+    'df.apply("to_pickle_"[:9], "{path}")',
+    'df.agg(["to_csv"], "{path}")',
+    'df.agg({{"sales": "to_csv"}})',
+    'df.groupby("region").agg(out=("sales", "to_pickle"))',
+    'df.pivot_table(aggfunc="to_pickle")',
+    'pd.pivot_table(df, "sales", "region", None, "to_pickle")',
+    'pd.NamedAgg("sales", "to_pickle")',
+    'df.agg(func="".join(["to_pi", "ckle"]))',
+    'df.agg(df.columns[0])',
+    'df.pipe(pd.to_pickle, "{path}")',
+    'df.to_string("{path}")',
+    'df.to_markdown("{path}")',
+    'df.to_pickle("{path}")',
+    'df.describe(buf="{path}")',
+    'df.head(path_or_buf="{path}")',
+    'df.apply(**{{"func": "to_pickle"}})',
+    'df.apply("%s" % "to_pickle")',
+    'df.query("sales > 10")',
+    'df.sort_values("sales", inplace=True)',
+    'pd.read_csv("{path}")',
+])
+def test_rejects_escapes(df, tmp_path, template):
+    path = tmp_path / "pwn"
+    expression = template.format(path=path)
+    with pytest.raises(SandboxError):
+        validate_expression(expression)
+    with pytest.raises(SandboxError):
+        run_expression(expression, df)
+    assert not path.exists()
+
+
+@pytest.mark.parametrize("expression", [
+    'df.groupby("region")["sales"].sum()',
+    'df[["sales"]].agg(["sum", "mean"])',
+    'df.agg({"sales": "max"})',
+    'df.groupby("region").agg(total=("sales", "sum"), top=("sales", np.max))',
+    'df["sales"].apply(np.sqrt)',
+    'df["sales"].transform("cumsum")',
+    'df.pivot_table(values="sales", index="region", aggfunc="mean")',
+    'df[df["region"].str.startswith("n")]["sales"].describe()',
+    'df.sort_values("sales", ascending=False).head(2)',
+])
+def test_allows_read_only_analysis(df, expression):
+    run_expression(expression, df)
@@ -0,0 +1,42 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from tools.web_fetch import fetch
+
+
+@pytest.fixture
+def server():
+    client_ports = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            client_ports.append(self.client_address[1])
+            body = b"ok"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/", client_ports
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_threads_reuse_one_connection(server):
+    url, client_ports = server
+    # Like Streamlit reruns: each fetch on a new thread, one after another.
+    for _ in range(3):
+        thread = threading.Thread(target=fetch, args=(url,))
+        thread.start()
+        thread.join()
+    assert len(client_ports) == 3
+    assert len(set(client_ports)) == 1
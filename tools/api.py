@@ -0,0 +1,158 @@
+import asyncio
+import inspect
+import os
+
+# The tools' engines without Streamlit widgets, with plain arguments and JSON-friendly
+# results, for batch jobs (`tools.batch`), the HTTP service (`tools.http_service`)
+# and scripts. Tool modules are imported on first use, as in the app.
+
+CODE_LANGUAGES = {
+    ".py": "Python",
+    ".js": "JavaScript",
+    ".jsx": "JavaScript",
+    ".mjs": "JavaScript",
+    ".ts": "TypeScript",
+    ".tsx": "TypeScript",
+    ".java": "Java",
+    ".c": "C",
+    ".h": "C",
+    ".cc": "C++",
+    ".cpp": "C++",
+    ".cxx": "C++",
+    ".hpp": "C++",
+    ".cs": "C#",
+    ".go": "Go",
+    ".rs": "Rust",
+    ".rb": "Ruby",
+    ".php": "PHP",
+    ".kt": "Kotlin",
+    ".swift": "Swift",
+    ".scala": "Scala",
+    ".sh": "Shell",
+    ".sql": "SQL",
+}
+DOCUMENT_EXTENSIONS = (".pdf", ".docx")
+
+
+class ToolError(Exception):
+    """Raised when a tool cannot produce a result for its input; the message says why."""
+
+
+def generate_blog(title, keywords="", num_words=750):
+    """Generates a blog post and returns it as markdown."""
+    from .blog_assistant import generate_blog as generate
+
+    return generate(title, keywords, num_words)
+
+
+def explain_code(code=None, language=None, path=None):
+    """
+    Explains a code snippet, given as `code` or read from the file at `path`. The
+    language defaults to the one implied by the file extension.
+    """
+    from .code_explainer import explain_code as explain
+
+    if path is not None:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            code = f.read()
+        language = language or CODE_LANGUAGES.get(os.path.splitext(path)[1].lower(), "Other")
+    if not code or not code.strip():
+        raise ToolError("No code to explain.")
+    return explain(code, language or "Other").strip()
+
+
+def generate_sql(description, dialect="Generic SQL", database_context="", single_request=False):
+    """
+    Generates a SQL query from a description.
+
+    Returns:
+        dict: "query", "expected_output" and "explanation".
+    """
+    from .sql_query_generator import generate_sql_details, generate_sql_details_structured
+
+    if single_request:
+        query, output, explanation = generate_sql_details_structured(description, dialect, database_context)
+    else:
+        query, output, explanation = asyncio.run(generate_sql_details(description, dialect, database_context))
+    return {"query": query, "expected_output": output, "explanation": explanation}
+
+
+def summarize_document(path, mode="map_reduce", first_page=None, last_page=None, max_pages=None):
+    """
+    Summarizes a PDF or Word document.
+
+    Args:
+        path (str): The document's path.
+        mode (str): "map_reduce" (whole document) or "retrieval" (top-5 chunks).
+        first_page (int, optional): 1-based first page to summarize.
+        last_page (int, optional): 1-based last page to summarize.
+        max_pages (int, optional): Maximum number of pages to summarize.
+    """
+    from .document_summarizer_utils import summerizer
+
+    summary = summerizer(path, page_range=(first_page, last_page), max_pages=max_pages, mode=mode)
+    if not summary or summary.startswith("ERROR:"):
+        raise ToolError(summary[len("ERROR:"):].strip() if summary else "No summary was generated.")
+    return summary
+
+
+def summarize_website(url):
+    """
+    Fetches and summarizes a website.
+
+    Returns:
+        dict: "url", "title" and "summary".
+    """
+    from .website_summarizer import summarize_url
+
+    row = summarize_url(url)
+    if row["Status"] != "OK":
+        raise ToolError(row["Status"])
+    return {"url": row["URL"], "title": row["Title"], "summary": row["Summary"]}
+
+
+TASKS = {
+    "blog": generate_blog,
+    "code": explain_code,
+    "document": summarize_document,
+    "sql": generate_sql,
+    "website": summarize_website,
+}
+# The argument a bare input (a file from a directory, a line of a list) is passed as.
+TASK_INPUTS = {
+    "blog": "title",
+    "code": "path",
+    "document": "path",
+    "sql": "description",
+    "website": "url",
+}
+
+
+def parse_text_argument(value):
+    """
+    Converts an argument given as text (a CSV cell, a query parameter) to the type the
+    tools expect: integers and booleans are parsed, anything else stays a string.
+    """
+    if value.isdigit():
+        return int(value)
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    return value
+
+
+def check_arguments(task, arguments):
+    """
+    Raises `ValueError` if `task` does not exist or does not accept `arguments`.
+    """
+    if task not in TASKS:
+        raise ValueError(f"Unknown task '{task}'. Choose from: {', '.join(TASKS)}.")
+    try:
+        inspect.signature(TASKS[task]).bind(**arguments)
+    except TypeError as e:
+        raise ValueError(f"Invalid arguments for '{task}': {e}.")
+
+
+def run_task(task, arguments):
+    """Runs a task by name with keyword arguments and returns its result."""
+    check_arguments(task, arguments)
+    return TASKS[task](**arguments)
@@ -0,0 +1,210 @@
+"""
+Runs a tool over many inputs without the UI, with a worker pool and a resumable
+checkpoint.
+
+The source is a directory (every PDF/Word file for `document`, every source file for
+`code`), a `.jsonl` or `.csv` manifest whose fields are the task's arguments (plus an
+optional `id`), or a text file with one input per line. Each result is appended to
+the output JSON Lines file as soon as it finishes; rerunning the same command skips
+inputs that already succeeded and retries the ones that failed.
+
+    python -m tools.batch TASK SOURCE [-o OUTPUT] [--workers N] [--processes] [--restart]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from . import llm_scheduler
+from .api import CODE_LANGUAGES, DOCUMENT_EXTENSIONS, TASK_INPUTS, TASKS, parse_text_argument, run_task
+
+THREAD_WORKERS = int(os.getenv("LLM_TOOLS_BATCH_WORKERS", "8"))
+DIRECTORY_EXTENSIONS = {
+    "code": tuple(CODE_LANGUAGES),
+    "document": DOCUMENT_EXTENSIONS,
+}
+
+
+def _directory_jobs(task, root):
+    extensions = DIRECTORY_EXTENSIONS.get(task)
+    if extensions is None:
+        raise ValueError(f"Task '{task}' takes a manifest or a list, not a directory.")
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories[:] = sorted(d for d in subdirectories if not d.startswith("."))
+        for name in sorted(files):
+            if name.lower().endswith(extensions):
+                path = os.path.join(directory, name)
+                yield path, {TASK_INPUTS[task]: path}
+
+
+def _record_jobs(task, records, parse=None):
+    for number, record in enumerate(records, 1):
+        # Empty CSV cells mean "use the default".
+        arguments = {
+            key: parse(value) if parse else value
+            for key, value in record.items() if value not in ("", None)
+        }
+        job_id = str(arguments.pop("id", None) or arguments.get(TASK_INPUTS[task]) or f"line-{number}")
+        yield job_id, arguments
+
+
+def iter_jobs(task, source):
+    """
+    Yields (job id, arguments) for every input in `source`; ids are stable across runs
+    so that a rerun can skip finished jobs.
+    """
+    if os.path.isdir(source):
+        yield from _directory_jobs(task, source)
+        return
+    with open(source, newline="", encoding="utf-8") as f:
+        if source.endswith(".jsonl"):
+            yield from _record_jobs(task, (json.loads(line) for line in f if line.strip()))
+        elif source.endswith(".csv"):
+            yield from _record_jobs(task, csv.DictReader(f), parse=parse_text_argument)
+        else:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield line, {TASK_INPUTS[task]: line}
+
+
+def load_checkpoint(path):
+    """Returns the ids of jobs with a successful result in an output file."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # The last line of a run that was killed mid-write.
+                continue
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+def run_job(task, job_id, arguments):
+    """Runs one job and returns its output record; never raises."""
+    started = time.perf_counter()
+    record = {"id": job_id, "task": task}
+    try:
+        # Batch jobs yield to interactive users in the LLM queue.
+        with llm_scheduler.priority(llm_scheduler.BULK):
+            record["result"] = run_task(task, arguments)
+        record["status"] = "ok"
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["elapsed"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def _init_process_worker():
+    # Every worker is already one process per document; extracting pages in a
+    # nested process pool as well would oversubscribe the CPUs.
+    from . import document_summarizer_utils
+
+    document_summarizer_utils.EXTRACTION_WORKERS = 1
+
+
+def run_batch(task, jobs, output, workers=None, processes=False, on_record=None):
+    """
+    Runs jobs through a worker pool, appending each record to `output` as it finishes
+    and skipping jobs already recorded there as successful.
+
+    At most two jobs per worker are queued at a time, so a manifest of any size is
+    read lazily and memory stays flat.
+
+    Args:
+        task (str): The task name, a key of `tools.api.TASKS`.
+        jobs (Iterable[tuple[str, dict]]): (job id, arguments) pairs, e.g. from `iter_jobs`.
+        output (str): The JSON Lines output file, which is also the checkpoint.
+        workers (int, optional): Pool size. Defaults to `THREAD_WORKERS` threads, or
+            one process per CPU with `processes`.
+        processes (bool): Use a process pool, for CPU-bound extraction (large PDFs);
+            threads suit the LLM- and network-bound tasks.
+        on_record (Callable[[dict], None], optional): Called with each record.
+
+    Returns:
+        dict: Counts of "ok", "error" and "skipped" jobs.
+    """
+    done = load_checkpoint(output)
+    counts = {"ok": 0, "error": 0, "skipped": 0}
+    if processes:
+        workers = workers or os.cpu_count() or 1
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_process_worker)
+    else:
+        workers = workers or THREAD_WORKERS
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch")
+
+    with pool, open(output, "a", encoding="utf-8") as out:
+        def finish(future):
+            record = future.result()
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            counts[record["status"]] += 1
+            if on_record is not None:
+                on_record(record)
+
+        pending = set()
+        for job_id, arguments in jobs:
+            if job_id in done:
+                counts["skipped"] += 1
+                continue
+            done.add(job_id)
+            pending.add(pool.submit(run_job, task, job_id, arguments))
+            if len(pending) >= workers * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    finish(future)
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                finish(future)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("task", choices=sorted(TASKS))
+    parser.add_argument("source", help="A directory, a .jsonl/.csv manifest, or a file with one input per line.")
+    parser.add_argument("-o", "--output", help="JSON Lines results and checkpoint. Default: TASK-results.jsonl.")
+    parser.add_argument("--workers", type=int, help=f"Pool size (default: {THREAD_WORKERS} threads, or one process per CPU).")
+    parser.add_argument("--processes", action="store_true", help="Use worker processes instead of threads.")
+    parser.add_argument("--restart", action="store_true", help="Discard earlier results instead of resuming.")
+    parser.add_argument("--quiet", action="store_true", help="Print only the final counts.")
+    args = parser.parse_args()
+
+    output = args.output or f"{args.task}-results.jsonl"
+    if args.restart and os.path.exists(output):
+        os.remove(output)
+
+    def report(record):
+        if not args.quiet:
+            detail = f"  {record['error']}" if record["status"] == "error" else ""
+            print(f"{record['status']:5} {record['elapsed']:7.2f}s  {record['id']}{detail}", file=sys.stderr)
+
+    started = time.perf_counter()
+    try:
+        counts = run_batch(
+            args.task, iter_jobs(args.task, args.source), output,
+            workers=args.workers, processes=args.processes, on_record=report,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    print(
+        f"{counts['ok']} ok, {counts['error']} failed, {counts['skipped']} already done "
+        f"in {time.perf_counter() - started:.1f}s; results in {output}",
+        file=sys.stderr,
+    )
+    if counts["error"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from . import llm_client
+from .history_store import SUMMARY_ROLE
+from .tokens import count_tokens
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("LLM_TOOLS_CHAT_HISTORY_TOKENS", "4000"))
+# Messages always kept verbatim at the end of the history.
+KEEP_RECENT_MESSAGES = 6
+SUMMARY_GENERATION_CONFIG = {"temperature": 0.2}
+
+SUMMARY_PROMPT = (
+    "You maintain the running memory of a conversation between a user and an AI assistant. "
+    "Update the summary below with the new messages. Keep every fact, name, number, decision, "
+    "user preference and open question that later answers may depend on; drop greetings and "
+    "repetition. Write at most 200 words in plain prose.\n\n"
+    "Current summary:\n{summary}\n\nNew messages:\n{messages}"
+)
+
+
+@lru_cache(maxsize=None)
+def _summary_executor():
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="chat-memory")
+
+
+class ConversationMemory:
+    """
+    The model-side memory of one chat, persisted in a `HistoryStore`.
+
+    Every message is appended to the store, which the UI pages through; the memory
+    itself keeps only a running summary and the messages it does not cover yet.
+    `model_history()` builds what is sent to the model: the system preamble, the
+    summary, and the most recent messages verbatim, trimmed to `token_budget`. When
+    the unsummarized messages outgrow the budget, the oldest of them are folded into
+    the summary by a background LLM call, so a turn never waits for summarization
+    and the history sent per turn stays bounded however long the chat runs.
+    """
+
+    def __init__(self, preamble, store=None, session=None, tool="assistant",
+                 token_budget=HISTORY_TOKEN_BUDGET, keep_recent=KEEP_RECENT_MESSAGES):
+        self.preamble = preamble
+        self.store = store
+        self.session = session
+        self.tool = tool
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.summary = ""
+        self.recent = []
+        self._pending = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        if store is not None:
+            self._resume()
+
+    def _resume(self):
+        """Restores the summary and the messages after it from the store."""
+        self.summary, upto = self.store.latest_summary(self.session, self.tool)
+        for message in self.store.messages(self.session, self.tool, after_id=upto):
+            if message.get("in_history", True):
+                message["tokens"] = count_tokens(message["content"])
+                self.recent.append(message)
+
+    def add(self, role, content, in_history=True, **meta):
+        """
+        Appends a message to the store and, unless `in_history` is False (e.g. a
+        question that got no answer), to the model history.
+        """
+        message = {"role": role, "content": content, "tokens": count_tokens(content)}
+        message.update(meta)
+        if self.store is not None:
+            extra = dict(meta, in_history=False) if not in_history else meta
+            message["id"] = self.store.append(self.session, self.tool, role, content, **extra)
+        if in_history:
+            with self._lock:
+                self.recent.append(message)
+        return message
+
+    def clear(self):
+        if self.store is not None:
+            self.store.clear(self.session, self.tool)
+        with self._lock:
+            self.summary = ""
+            self.recent = []
+            self._pending = None
+            self._generation += 1
+
+    def model_history(self):
+        """Returns the history for `llm_client.start_chat`, within the token budget."""
+        with self._lock:
+            summary = self.summary
+            recent = list(self.recent)
+
+        # Drop the oldest verbatim messages, a user/model pair at a time, while over
+        # budget; the summary will cover them once the background update lands.
+        used = count_tokens(summary) + sum(message["tokens"] for message in recent)
+        while len(recent) > 2 and used > self.token_budget:
+            for message in recent[:2]:
+                used -= message["tokens"]
+            recent = recent[2:]
+
+        history = list(self.preamble)
+        if summary:
+            history.append({"role": "user", "parts": [f"Summary of our conversation so far:\n{summary}"]})
+            history.append({"role": "model", "parts": ["Understood. I will take it into account."]})
+        for message in recent:
+            history.append({"role": "model" if message["role"] == "assistant" else "user", "parts": [message["content"]]})
+        return history
+
+    def compact(self):
+        """
+        Starts a background summary of the oldest unsummarized messages when they
+        outgrow the budget, keeping at least `keep_recent` messages and half the budget
+        verbatim. Does nothing while an earlier summary is still running.
+        """
+        with self._lock:
+            if self._pending is not None and not self._pending.done():
+                return
+            if sum(message["tokens"] for message in self.recent) + count_tokens(self.summary) <= self.token_budget:
+                return
+
+            cut = len(self.recent)
+            kept_tokens = 0
+            for index in range(len(self.recent) - 1, -1, -1):
+                tokens = self.recent[index]["tokens"]
+                if len(self.recent) - index > self.keep_recent and kept_tokens + tokens > self.token_budget // 2:
+                    break
+                kept_tokens += tokens
+                cut = index
+            # Keep the verbatim part starting at a user message so roles stay paired.
+            while cut < len(self.recent) and self.recent[cut]["role"] != "user":
+                cut += 1
+            if cut == 0:
+                return
+            self._pending = _summary_executor().submit(
+                self._summarize, self.summary, self.recent[:cut], self._generation
+            )
+
+    def _summarize(self, summary, messages, generation):
+        transcript = "\n".join(
+            f"{'User' if message['role'] == 'user' else 'Assistant'}: {message['content']}" for message in messages
+        )
+        new_summary = llm_client.generate(
+            SUMMARY_PROMPT.format(summary=summary or "(empty)", messages=transcript),
+            generation_config=SUMMARY_GENERATION_CONFIG,
+            tool="chat_memory",
+        ).strip()
+        with self._lock:
+            # A chat cleared meanwhile has started over; drop the stale summary.
+            if generation != self._generation:
+                return
+            self.summary = new_summary
+            self.recent = self.recent[len(messages):]
+            if self.store is not None and "id" in messages[-1]:
+                self.store.append(self.session, self.tool, SUMMARY_ROLE, new_summary, upto=messages[-1]["id"])
+
+    def wait(self, timeout=None):
+        """Blocks until a running background summary finishes."""
+        pending = self._pending
+        if pending is not None:
+            pending.result(timeout)
@@ -0,0 +1,225 @@
+import os
+import re
+
+from .tokens import count_tokens
+
+CHUNK_TOKENS = int(os.getenv("LLM_TOOLS_CHUNK_TOKENS", "320"))
+# A chunk is ended at the first paragraph break once it is this full, and at a
+# heading once it holds at least MIN_FRACTION of the budget.
+SOFT_LIMIT_FRACTION = 0.8
+MIN_FRACTION = 0.25
+# Chunks that end inside a paragraph repeat at most this share of the budget at the
+# start of the next chunk; chunks that end at a paragraph or section break repeat nothing.
+MAX_OVERLAP_FRACTION = 0.125
+MAX_HEADING_WORDS = 10
+
+# How strongly the text is divided before a unit: a unit starting a section breaks
+# harder than one starting a paragraph, a sentence, or continuing a long sentence.
+WORD, SENTENCE, PARAGRAPH, SECTION = range(4)
+
+_SENTENCE_BREAK = re.compile(r"[.!?][\"')\]]*\s+(?=[\"'(\[]?[A-Z0-9])")
+_SENTENCE_END = re.compile(r"[.!?][\"')\]]*$")
+_NUMBERED_HEADING = re.compile(r"(?:#{1,6}|\d+(?:\.\d+)*\.?|[IVX]+\.|[A-Z]\.)\s+\S")
+_MINOR_WORDS = {"a", "an", "and", "as", "at", "by", "for", "from", "in", "of", "on", "or", "the", "to", "vs", "with"}
+
+
+def is_heading(line):
+    """
+    Whether a line reads as a heading: short, without closing punctuation, and either
+    marked (`#`, `2.`, `3.1`, `IV.`) or in title case or capitals.
+    """
+    words = line.split()
+    if not words or len(words) > MAX_HEADING_WORDS or line[-1] in ".,;!?":
+        return False
+    if _NUMBERED_HEADING.match(line):
+        return True
+    if line.isupper():
+        return True
+    return all(not word[0].isalpha() or word[0].isupper() or word in _MINOR_WORDS for word in words) \
+        and words[0][0].isupper()
+
+
+def _word_pieces(text, budget_tokens):
+    """Splits text longer than the budget at word boundaries into (piece, tokens) pairs."""
+    piece, piece_tokens = [], 0
+    for word in text.split():
+        tokens = count_tokens(word)
+        if piece and piece_tokens + tokens > budget_tokens:
+            yield " ".join(piece), piece_tokens
+            piece, piece_tokens = [], 0
+        piece.append(word)
+        piece_tokens += tokens
+    if piece:
+        yield " ".join(piece), piece_tokens
+
+
+def iter_units(pages, max_unit_tokens=CHUNK_TOKENS):
+    """
+    Reads page texts line by line and yields their sentences, headings and the pieces
+    of over-long sentences as (text, tokens, boundary, is_heading).
+
+    Pages continue one another, so a paragraph broken across pages stays one
+    paragraph; a blank line ends a paragraph. Lines wrapped inside a sentence (as in
+    PDF text) are joined, and words hyphenated across lines are rejoined. Only the
+    unfinished sentence is buffered, and sentence breaks are searched for in new
+    text only, so the pass is linear in the input.
+
+    Args:
+        pages (Iterable[str]): Page texts in document order; any iterable, read once.
+        max_unit_tokens (int): Longer sentences are split into word pieces of this size.
+
+    Yields:
+        tuple[str, int, int, bool]: The unit, its token count, the boundary before it
+        (`WORD`, `SENTENCE`, `PARAGRAPH` or `SECTION`) and whether it is a heading.
+    """
+    fragment = ""
+    boundary = PARAGRAPH
+    line_closed = True
+
+    def sentence(text):
+        nonlocal boundary
+        text = text.strip()
+        if not text:
+            return
+        tokens = count_tokens(text)
+        if tokens <= max_unit_tokens:
+            yield text, tokens, boundary, False
+        else:
+            for i, (piece, piece_tokens) in enumerate(_word_pieces(text, max_unit_tokens)):
+                yield piece, piece_tokens, boundary if i == 0 else WORD, False
+        boundary = SENTENCE
+
+    for page in pages:
+        for line in page.splitlines():
+            line = line.strip()
+            if not line:
+                yield from sentence(fragment)
+                fragment = ""
+                boundary = max(boundary, PARAGRAPH)
+                line_closed = True
+                continue
+
+            if line_closed and not fragment and is_heading(line) and count_tokens(line) <= max_unit_tokens:
+                yield line, count_tokens(line), SECTION, True
+                # The heading's first sentence belongs with it.
+                boundary = SENTENCE
+                continue
+
+            start = max(len(fragment) - 4, 0)
+            if fragment.endswith("-") and fragment[-2:-1].isalpha() and line[0].islower():
+                fragment = fragment[:-1] + line
+            else:
+                fragment = f"{fragment} {line}" if fragment else line
+
+            cut = 0
+            for match in _SENTENCE_BREAK.finditer(fragment, start):
+                yield from sentence(fragment[cut:match.end()])
+                cut = match.end()
+            line_closed = bool(_SENTENCE_END.search(line))
+            if line_closed:
+                yield from sentence(fragment[cut:])
+                fragment = ""
+            elif cut:
+                fragment = fragment[cut:]
+            # A token is at least one character, so short fragments are never counted.
+            if len(fragment) > max_unit_tokens and count_tokens(fragment) > max_unit_tokens:
+                # No sentence break in sight (a table, a list without punctuation).
+                yield from sentence(fragment)
+                fragment = ""
+                boundary = WORD
+    yield from sentence(fragment)
+
+
+def _join(units):
+    parts = []
+    for i, (text, _, boundary, heading) in enumerate(units):
+        if i:
+            parts.append("\n" if boundary >= PARAGRAPH or units[i - 1][3] else " ")
+        parts.append(text)
+    return "".join(parts)
+
+
+def _overlap(units, boundary, max_overlap_tokens):
+    """The trailing units (or words) of a finished chunk to repeat at the start of the next one."""
+    if boundary >= PARAGRAPH or not max_overlap_tokens:
+        return []
+    carried, carried_tokens = [], 0
+    for text, tokens, unit_boundary, heading in reversed(units):
+        if heading:
+            break
+        if carried_tokens + tokens <= max_overlap_tokens:
+            carried.insert(0, (text, tokens, unit_boundary, heading))
+            carried_tokens += tokens
+            if unit_boundary >= PARAGRAPH:
+                break
+            continue
+        if not carried and boundary == WORD:
+            # The chunk ends inside one long sentence: repeat its last words.
+            tail, tail_tokens = [], 0
+            for word in reversed(text.split()):
+                word_tokens = count_tokens(word)
+                if tail_tokens + word_tokens > max_overlap_tokens:
+                    break
+                tail.insert(0, word)
+                tail_tokens += word_tokens
+            if tail:
+                carried = [(" ".join(tail), tail_tokens, WORD, False)]
+        break
+    return carried
+
+
+def chunk_pages(pages, chunk_tokens=CHUNK_TOKENS, max_overlap_tokens=None):
+    """
+    Splits a stream of page texts into chunks of at most `chunk_tokens` tokens
+    that follow the document's structure, in one pass.
+
+    Chunks are packed from whole sentences and never exceed the budget. A chunk ends
+    before a heading (once it holds a quarter of the budget), at the first paragraph
+    break after it is 80% full, or before the sentence that would overflow it; a
+    heading stays with the sentence after it when both fit. Only when a chunk ends
+    inside a paragraph are its last sentences (at most `max_overlap_tokens`) repeated
+    at the start of the next chunk.
+
+    Args:
+        pages (Iterable[str]): Page texts in document order, e.g. a generator of pages
+            still being extracted; only the current chunk is kept in memory.
+        chunk_tokens (int): Token budget per chunk (`tokens.count_tokens`).
+        max_overlap_tokens (int, optional): Defaults to an eighth of `chunk_tokens`.
+
+    Yields:
+        str: The chunks, in document order.
+    """
+    if max_overlap_tokens is None:
+        max_overlap_tokens = int(chunk_tokens * MAX_OVERLAP_FRACTION)
+    soft_limit = chunk_tokens * SOFT_LIMIT_FRACTION
+    min_tokens = chunk_tokens * MIN_FRACTION
+    current, size = [], 0
+
+    # Half the budget per sentence leaves room for the carried overlap.
+    for unit in iter_units(pages, chunk_tokens // 2):
+        text, tokens, boundary, heading = unit
+        if current:
+            after_heading = current[-1][3]
+            # The budget always holds; structural breaks never separate a heading from
+            # the sentence after it.
+            if (size + tokens > chunk_tokens
+                    or (not after_heading and boundary >= PARAGRAPH and size >= soft_limit)
+                    or (not after_heading and boundary == SECTION and size >= min_tokens)):
+                if after_heading and len(current) > 1 and current[-1][1] + tokens <= chunk_tokens:
+                    # Move the heading to the next chunk, with its first sentence.
+                    held = [current.pop()]
+                    yield _join(current)
+                    current = held
+                else:
+                    yield _join(current)
+                    current = _overlap(current, boundary, max_overlap_tokens)
+                size = sum(carried[1] for carried in current)
+        current.append(unit)
+        size += tokens
+    if current:
+        yield _join(current)
+
+
+def chunk_text(text, chunk_tokens=CHUNK_TOKENS, max_overlap_tokens=None):
+    """`chunk_pages` for a single text."""
+    return chunk_pages([text], chunk_tokens, max_overlap_tokens)
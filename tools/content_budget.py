@@ -0,0 +1,148 @@
+import re
+from collections import Counter
+
+from .summarization import group_texts
+from .tokens import count_tokens
+
+# Blocks below this salience are dropped first when a page is over budget.
+MIN_SALIENCE = 0.15
+LENGTH_SATURATION_TOKENS = 120
+_TERM_PATTERN = re.compile(r"[^\W\d_]{4,}")
+_SENTENCE_END = re.compile(r"[.!?:;\"')\]]$")
+BOILERPLATE = re.compile(
+    r"cookie|subscribe|sign up|newsletter|all rights reserved|privacy policy|terms of (?:use|service)|"
+    r"advertisement|share this|follow us|read more|click here|enable javascript|log in|sign in",
+    re.I,
+)
+
+
+def _terms(text):
+    return {term.lower() for term in _TERM_PATTERN.findall(text)}
+
+
+def rank_blocks(blocks, title=None):
+    """
+    Scores each content block's salience between 0 and 1 from local signals only:
+    length, how central its vocabulary is to the rest of the page, overlap with the
+    title, position, and whether it reads as prose. Headings score by title overlap,
+    boilerplate is damped and exact duplicates score 0.
+
+    Args:
+        blocks (list[str]): The page's text blocks, in document order.
+        title (str, optional): The page title.
+
+    Returns:
+        list[float]: One salience per block.
+    """
+    block_terms = [_terms(block) for block in blocks]
+    document_frequency = Counter(term for terms in block_terms for term in terms)
+    title_terms = _terms(title or "")
+    seen = set()
+    scores = []
+    for index, (block, terms) in enumerate(zip(blocks, block_terms)):
+        normalized = " ".join(block.lower().split())
+        if normalized in seen or not terms:
+            scores.append(0.0)
+            continue
+        seen.add(normalized)
+
+        title_overlap = len(terms & title_terms) / len(title_terms) if title_terms else 0.0
+        words = len(block.split())
+        if words <= 15 and not _SENTENCE_END.search(block):
+            # A heading: cheap, and useful when it matches the page's topic.
+            score = 0.2 + 0.6 * title_overlap
+        else:
+            length = min(count_tokens(block), LENGTH_SATURATION_TOKENS) / LENGTH_SATURATION_TOKENS
+            centrality = sum(min(document_frequency[term] - 1, 4) for term in terms) / (4 * len(terms))
+            position = 1.0 - index / max(len(blocks), 1)
+            score = 0.4 * length + 0.3 * centrality + 0.2 * title_overlap + 0.1 * position
+            if "," not in block and not _SENTENCE_END.search(block):
+                score *= 0.6
+        if BOILERPLATE.search(block):
+            score *= 0.2
+        scores.append(score)
+    return scores
+
+
+def _split_block(block, budget_tokens):
+    """Splits a single block that is larger than the budget at word boundaries."""
+    pieces, current, current_tokens = [], [], 0
+    for word in block.split():
+        tokens = count_tokens(word)
+        if current and current_tokens + tokens > budget_tokens:
+            pieces.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(word)
+        current_tokens += tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+class BudgetPlan:
+    """
+    How a page's content is sent to the model: as one `text` that fits the budget, or,
+    when `map_reduce` is set, as `chunks` of at most the budget each.
+    """
+
+    def __init__(self, blocks, total_tokens, kept_tokens, budget_tokens):
+        self.blocks = blocks
+        self.total_tokens = total_tokens
+        self.kept_tokens = kept_tokens
+        self.budget_tokens = budget_tokens
+
+    @property
+    def map_reduce(self):
+        return self.kept_tokens > self.budget_tokens
+
+    @property
+    def text(self):
+        return "\n".join(self.blocks)
+
+    @property
+    def chunks(self):
+        return ["\n".join(group) for group in group_texts(self.blocks, len(self.blocks), self.budget_tokens)]
+
+
+def plan_budget(text, budget_tokens, max_tokens=None, title=None):
+    """
+    Fits a page's extracted text to a model input budget.
+
+    Blocks (one per line, split when larger than the budget) are ranked with
+    `rank_blocks` and duplicates are dropped. If the rest is over `budget_tokens`,
+    low-salience blocks are dropped too; if it is still over, the plan switches to
+    map-reduce over chunks of at most `budget_tokens`. Blocks are packed highest
+    salience first up to the budget, or up to `max_tokens` for map-reduce, so cost
+    stays bounded for huge pages. Kept blocks stay in document order.
+
+    Args:
+        text (str): The extracted text, one block per line.
+        budget_tokens (int): Input tokens available for page content in one call.
+        max_tokens (int, optional): Most page tokens summarized in total; defaults to
+            `budget_tokens`.
+        title (str, optional): The page title, used for ranking.
+
+    Returns:
+        BudgetPlan: The blocks to send and whether they need map-reduce.
+    """
+    max_tokens = max(max_tokens or budget_tokens, budget_tokens)
+    blocks = []
+    for line in text.split("\n"):
+        if line.strip():
+            blocks.extend(_split_block(line, budget_tokens) if count_tokens(line) > budget_tokens else [line])
+    tokens = [count_tokens(block) for block in blocks]
+    scores = rank_blocks(blocks, title)
+    total = sum(tokens)
+
+    kept = [i for i, score in enumerate(scores) if score > 0]
+    if sum(tokens[i] for i in kept) > budget_tokens:
+        kept = [i for i in kept if scores[i] >= MIN_SALIENCE]
+
+    limit = budget_tokens if sum(tokens[i] for i in kept) <= budget_tokens else max_tokens
+    selected, used = set(), 0
+    for i in sorted(kept, key=lambda i: scores[i], reverse=True):
+        if used + tokens[i] <= limit:
+            selected.add(i)
+            used += tokens[i]
+    ordered = sorted(selected)
+    return BudgetPlan([blocks[i] for i in ordered], total, used, budget_tokens)
@@ -0,0 +1,217 @@
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .settings import CACHE_DIR
+
+SAMPLE_ROWS = 10_000
+CHUNK_ROWS = 100_000
+# A text column becomes `category` when the sample holds at most this share of distinct values.
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+SESSION_MEMORY_LIMIT_BYTES = int(os.getenv("LLM_TOOLS_SESSION_MEMORY_MB", "512")) * 1024 * 1024
+SPILL_DIR = os.path.join(CACHE_DIR, "spill")
+
+
+class IngestError(Exception):
+    """Raised when an uploaded CSV cannot be ingested; the message is shown to the user."""
+
+
+class IngestResult:
+    """
+    Outcome of `ingest_csv`: the frame, how many rows the file had, and whether the
+    frame is a uniform sample (`sample_fraction` < 1) or spilled to `spill_path`.
+    """
+
+    def __init__(self, df, total_rows, sample_fraction=1.0, spill_path=None):
+        self.df = df
+        self.total_rows = total_rows
+        self.sample_fraction = sample_fraction
+        self.spill_path = spill_path
+
+    @property
+    def sampled(self):
+        return self.sample_fraction < 1.0
+
+
+def plan_column_types(sample):
+    """
+    Chooses read dtypes from a sample of the file: low-cardinality text columns are
+    read as `category`, everything else keeps pandas' own inference.
+
+    Args:
+        sample (pandas.DataFrame): The first rows of the file.
+
+    Returns:
+        dict: A `dtype` mapping for `pandas.read_csv`.
+    """
+    dtypes = {}
+    for name in sample.columns:
+        column = sample[name]
+        if pd.api.types.is_numeric_dtype(column) or pd.api.types.is_bool_dtype(column):
+            continue
+        non_null = column.dropna()
+        if len(non_null) and non_null.nunique() / len(non_null) <= CATEGORY_MAX_UNIQUE_RATIO:
+            dtypes[name] = "category"
+    return dtypes
+
+
+def downcast_chunk(chunk):
+    """
+    Downcasts the integer columns of one chunk to the smallest type that holds them.
+    Floats stay float64: float32 sums over large columns lose precision, which would
+    make the CSV Analyzer's exact answers inexact.
+    """
+    for name in chunk.columns:
+        column = chunk[name]
+        if pd.api.types.is_integer_dtype(column) and not pd.api.types.is_bool_dtype(column):
+            chunk[name] = pd.to_numeric(column, downcast="integer")
+    return chunk
+
+
+def _concat_chunks(chunks):
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0]
+    df = pd.concat(chunks, ignore_index=True)
+    for name in chunks[0].columns:
+        parts = [chunk[name] for chunk in chunks]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            df[name] = pd.Categorical(union_categoricals(parts, ignore_order=True))
+    return df
+
+
+def _progress_fraction(file, total_size):
+    if not total_size:
+        return None
+    try:
+        return min(file.tell() / total_size, 1.0)
+    except (AttributeError, OSError):
+        return None
+
+
+def _spill_schema(chunk):
+    import pyarrow as pa
+
+    fields = []
+    for name in chunk.columns:
+        column = chunk[name]
+        if pd.api.types.is_bool_dtype(column):
+            arrow_type = pa.bool_()
+        elif pd.api.types.is_integer_dtype(column):
+            arrow_type = pa.int64()
+        elif pd.api.types.is_float_dtype(column):
+            arrow_type = pa.float64()
+        elif pd.api.types.is_datetime64_any_dtype(column):
+            arrow_type = pa.timestamp("ns")
+        else:
+            arrow_type = pa.large_string()
+        fields.append(pa.field(str(name), arrow_type))
+    return pa.schema(fields)
+
+
+def _spill_table(chunk, schema):
+    import pyarrow as pa
+
+    arrays = []
+    for field, name in zip(schema, chunk.columns):
+        column = chunk[name]
+        if pa.types.is_large_string(field.type):
+            column = column.astype("string")
+        try:
+            arrays.append(pa.array(column, from_pandas=True).cast(field.type))
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            raise IngestError(f"Column '{name}' changes type part-way through the file and cannot be spilled to disk.")
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def load_spilled(path):
+    """
+    Opens a spilled Arrow IPC file memory-mapped. Columns stay Arrow-backed, so their
+    pages are read from disk on demand instead of being copied into process memory.
+    """
+    import pyarrow as pa
+
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def ingest_csv(file, memory_limit=SESSION_MEMORY_LIMIT_BYTES, spill=False, progress=None, chunk_rows=CHUNK_ROWS):
+    """
+    Reads a CSV upload in chunks with compact dtypes.
+
+    Column types are planned from a sample, integers are downcast per chunk, and
+    low-cardinality text becomes `category`. When the frame
+    would exceed `memory_limit`, the rows kept so far are halved at random and later
+    chunks are sampled at the same rate, so the result is a uniform sample of the
+    whole file. With `spill`, chunks are written to an Arrow file on local disk
+    instead and the result is read back memory-mapped.
+
+    Args:
+        file (streamlit.runtime.uploaded_file_manager.UploadedFile): The uploaded CSV.
+        memory_limit (int): Per-session ceiling for the in-memory frame, in bytes.
+        spill (bool): Whether to spill to a memory-mapped Arrow file (requires pyarrow).
+        progress (Callable[[float | None, int], None], optional): Called after each chunk
+            with the fraction of the file read (None if unknown) and the rows read.
+        chunk_rows (int): Rows per chunk.
+
+    Returns:
+        IngestResult: The loaded frame and how it was loaded.
+
+    Raises:
+        IngestError: If spilling is requested without pyarrow or the data cannot be spilled.
+    """
+    total_size = getattr(file, "size", None)
+    file.seek(0)
+    sample = pd.read_csv(file, nrows=SAMPLE_ROWS)
+    file.seek(0)
+    dtypes = {} if spill else plan_column_types(sample)
+
+    if spill:
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise IngestError("Spilling to disk requires the `pyarrow` package.")
+        os.makedirs(SPILL_DIR, exist_ok=True)
+        spill_path = os.path.join(SPILL_DIR, f"{uuid.uuid4().hex}.arrow")
+        schema = _spill_schema(sample)
+        total_rows = 0
+        try:
+            with pa.OSFile(spill_path, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+                for chunk in pd.read_csv(file, chunksize=chunk_rows):
+                    writer.write_table(_spill_table(chunk, schema))
+                    total_rows += len(chunk)
+                    if progress:
+                        progress(_progress_fraction(file, total_size), total_rows)
+        except Exception:
+            os.remove(spill_path)
+            raise
+        return IngestResult(load_spilled(spill_path), total_rows, spill_path=spill_path)
+
+    rng = np.random.default_rng(0)
+    chunks = []
+    kept_bytes = 0
+    total_rows = 0
+    fraction = 1.0
+    for chunk in pd.read_csv(file, chunksize=chunk_rows, dtype=dtypes):
+        total_rows += len(chunk)
+        if fraction < 1.0:
+            chunk = chunk[rng.random(len(chunk)) < fraction]
+        chunk = downcast_chunk(chunk)
+        chunks.append(chunk)
+        kept_bytes += int(chunk.memory_usage(deep=True).sum())
+        while kept_bytes > memory_limit and fraction > 1e-6:
+            fraction /= 2
+            chunks = [part[rng.random(len(part)) < 0.5] for part in chunks]
+            kept_bytes = sum(int(part.memory_usage(deep=True).sum()) for part in chunks)
+        if progress:
+            progress(_progress_fraction(file, total_size), total_rows)
+
+    df = _concat_chunks(chunks)
+    if fraction < 1.0:
+        df = df.reset_index(drop=True)
+    return IngestResult(df, total_rows, sample_fraction=fraction)
@@ -1,102 +1,172 @@
 import streamlit as st
-import pandas as pd
-import google.generativeai as genai
-import os
+from . import llm_client, metrics
+from .dataset_store import get_dataset_store
+from .data_profile import format_profile, profile_dataframe
+from .history_store import get_history_store
+from .pandas_sandbox import (
+    SandboxError,
+    build_expression_prompt,
+    extract_expression,
+    format_result,
+    run_expression,
+)
+from .ui_helpers import render_chat_history, session_id
+
+EXACT_MODE = "Exact (run pandas on the full data)"
+DESCRIPTIVE_MODE = "Descriptive (AI reads a sample)"
+HISTORY_TOOL = "data_analyzer"
+
+
+def answer_with_pandas(df, profile_text, user_query):
+    """
+    Asks the model for a pandas expression that answers `user_query` from the dataset
+    profile alone, then evaluates it in the sandbox against the full DataFrame.
+
+    Returns:
+        str: Markdown with the expression and its exact result.
+    """
+    response = llm_client.generate(build_expression_prompt(profile_text, user_query), tool="data_analyzer")
+    expression = extract_expression(response)
+    with metrics.span("execute", HISTORY_TOOL):
+        result = run_expression(expression, df)
+    return f"`{expression}`\n\n{format_result(result)}"
 
 def data_analyzer_app():
-    gemini_api_key = os.getenv("GEMINI_API_KEY")
-    if not gemini_api_key:
+    if llm_client.api_key_missing():
         st.error(
             "**ERROR:** Gemini API key not found for AI CSV Analyzer. "
             "Please set it as an environment variable named `GEMINI_API_KEY` "
             "(e.g., in Streamlit Cloud secrets, Heroku config vars, or your local shell)."
         )
         st.stop()
-    genai.configure(api_key=gemini_api_key)
-
-    try:
-        model = genai.GenerativeModel("gemini-2.0-flash")
-    except Exception as e:
-        st.error(f"Failed to initialize Gemini model for AI CSV Analyzer: {e}. Please check your API key and try again.")
-        st.stop()
-
 
     st.write("Upload your CSV and ask questions about it.")
     st.markdown("---")
 
     uploaded_file = st.file_uploader("Upload a CSV file", type=["csv"], key="data_analyzer_uploader")
-
-    if "chat_history_data_analyzer" not in st.session_state:
-        st.session_state.chat_history_data_analyzer = []
-    if "data_analyzer_df" not in st.session_state:
-        st.session_state.data_analyzer_df = None
-
-    if uploaded_file is not None and st.session_state.data_analyzer_df is None:
+    spill_to_disk = st.checkbox(
+        "Stream large files straight to disk",
+        key="data_analyzer_spill",
+        help="Writes the upload to the shared on-disk dataset store chunk by chunk instead of loading it into memory first, so it is never sampled.",
+    )
+
+    history = get_history_store()
+    # The session holds only a handle; the frame itself is shared by every session
+    # that uploaded the same file.
+    if "data_analyzer_dataset" not in st.session_state:
+        st.session_state.data_analyzer_dataset = None
+    if "data_analyzer_profile" not in st.session_state:
+        st.session_state.data_analyzer_profile = None
+
+    if uploaded_file is not None and st.session_state.data_analyzer_dataset is None:
         try:
-            df = pd.read_csv(uploaded_file)
-            st.session_state.data_analyzer_df = df
+            progress_bar = st.progress(0.0, text="Reading CSV...")
+
+            def report_progress(fraction, rows_read):
+                progress_bar.progress(fraction or 0.0, text=f"Reading CSV... {rows_read:,} rows")
+
+            with metrics.span("parse", HISTORY_TOOL):
+                dataset = get_dataset_store().acquire(uploaded_file, spill=spill_to_disk, progress=report_progress)
+            progress_bar.empty()
+            df = dataset.df
+            st.session_state.data_analyzer_dataset = dataset
+            with st.spinner("Profiling dataset..."):
+                with metrics.span("profile", HISTORY_TOOL):
+                    st.session_state.data_analyzer_profile = profile_dataframe(df)
             st.success("CSV file uploaded and loaded successfully!")
         except Exception as e:
             st.error(f"Error reading CSV file: {e}. Please ensure it's a valid CSV.")
-            st.session_state.data_analyzer_df = None
-            st.session_state.chat_history_data_analyzer = []
+            st.session_state.data_analyzer_dataset = None
+            history.clear(session_id(), HISTORY_TOOL)
             uploaded_file = None
 
-    df = st.session_state.data_analyzer_df
+    dataset = st.session_state.data_analyzer_dataset
 
-    if df is not None:
+    if dataset is not None:
+        df = dataset.df
         st.subheader("Data Preview")
         st.dataframe(df.head())
         st.write(f"**Shape:** {df.shape[0]} rows, {df.shape[1]} columns")
-
-        column_names = ", ".join(df.columns)
+        if dataset.sampled:
+            st.warning(
+                f"The file has {dataset.total_rows:,} rows, more than fit in the session memory limit. "
+                f"Working with a uniform random sample of {len(df):,} rows ({dataset.sample_fraction:.1%})."
+            )
+
+        # Reused across questions; only columns whose content changed are re-profiled.
+        profile = profile_dataframe(df, st.session_state.data_analyzer_profile)
+        st.session_state.data_analyzer_profile = profile
+        profile_text = format_profile(profile)
+        column_names = ", ".join(map(str, df.columns))
 
         st.markdown("---")
         st.subheader("Ask a Question")
 
-        if st.session_state.chat_history_data_analyzer:
-            for i, (q, a) in enumerate(st.session_state.chat_history_data_analyzer):
-                with st.chat_message("user"):
-                    st.markdown(q)
-                with st.chat_message("assistant"):
-                    st.markdown(a)
+        render_chat_history(HISTORY_TOOL)
+
+        answer_mode = st.radio(
+            "Answer mode",
+            [EXACT_MODE, DESCRIPTIVE_MODE],
+            horizontal=True,
+            key="data_analyzer_mode",
+            help="Exact mode has the AI write a pandas expression from the column schema and runs it locally on every row.",
+        )
 
         user_query = st.chat_input("E.g., What are the average sales per region? Which column has the most missing values?", key="data_analyzer_query")
 
         if user_query:
-            st.session_state.chat_history_data_analyzer.append((user_query, "")) # Add user query to history
+            history.append(session_id(), HISTORY_TOOL, "user", user_query)
 
             with st.chat_message("user"):
                 st.markdown(user_query)
 
             with st.spinner("Analyzing data and generating answer..."):
-                csv_sample = df.to_csv(index=False)[:5000]
-
-                prompt = (
-                    f"You are an expert data analysis assistant. "
-                    f"The user has provided a CSV dataset. "
-                    f"The dataset has the following columns: **{column_names}**.\n"
-                    f"Here is a small sample of the CSV data:\n```csv\n{csv_sample}\n```\n"
-                    f"Please answer the following question about the data professionally, concisely, "
-                    f"and provide actionable insights or relevant statistics if applicable. "
-                    f"If a specific column is mentioned, assume it exists. If you need to perform calculations, briefly describe them.\n\n"
-                    f"**Question:** {user_query}"
-                )
-                try:
-                    response = model.generate_content(prompt)
-                    answer_text = response.text
-                    with st.chat_message("assistant"):
-                        st.markdown(answer_text)
-                    st.session_state.chat_history_data_analyzer[-1] = (user_query, answer_text)
-
-                except Exception as e:
-                    st.error(f"An error occurred while generating the answer: {str(e)}. Please try rephrasing your question or check the data.")
-                    st.session_state.chat_history_data_analyzer[-1] = (user_query, f"Error: {str(e)}")
+                if answer_mode == EXACT_MODE:
+                    try:
+                        answer_text = answer_with_pandas(df, profile_text, user_query)
+                        with st.chat_message("assistant"):
+                            st.markdown(answer_text)
+                        history.append(session_id(), HISTORY_TOOL, "assistant", answer_text)
+
+                    except SandboxError as e:
+                        answer_text = f"Could not compute an exact answer: {e} Try rephrasing the question or switch to the descriptive mode."
+                        with st.chat_message("assistant"):
+                            st.markdown(answer_text)
+                        history.append(session_id(), HISTORY_TOOL, "assistant", answer_text)
+
+                    except Exception as e:
+                        st.error(f"An error occurred while generating the answer: {str(e)}. Please try rephrasing your question or check the data.")
+                        history.append(session_id(), HISTORY_TOOL, "assistant", f"Error: {str(e)}")
+                else:
+                    csv_sample = profile["csv_sample"]
+
+                    prompt = (
+                        f"You are an expert data analysis assistant. "
+                        f"The user has provided a CSV dataset. "
+                        f"The dataset has the following columns: **{column_names}**.\n"
+                        f"Column profile (computed over all rows):\n{profile_text}\n"
+                        f"Here is a small sample of the CSV data:\n```csv\n{csv_sample}\n```\n"
+                        f"Please answer the following question about the data professionally, concisely, "
+                        f"and provide actionable insights or relevant statistics if applicable. "
+                        f"If a specific column is mentioned, assume it exists. If you need to perform calculations, briefly describe them.\n\n"
+                        f"**Question:** {user_query}"
+                    )
+                    try:
+                        answer_text = llm_client.generate(prompt, tool="data_analyzer")
+                        with st.chat_message("assistant"):
+                            st.markdown(answer_text)
+                        history.append(session_id(), HISTORY_TOOL, "assistant", answer_text)
+
+                    except Exception as e:
+                        st.error(f"An error occurred while generating the answer: {str(e)}. Please try rephrasing your question or check the data.")
+                        history.append(session_id(), HISTORY_TOOL, "assistant", f"Error: {str(e)}")
 
         st.markdown("---")
         if st.button("Clear Data & Chat", key="clear_data_chat"):
-            st.session_state.data_analyzer_df = None
-            st.session_state.chat_history_data_analyzer = []
+            dataset.release()
+            st.session_state.data_analyzer_dataset = None
+            st.session_state.data_analyzer_profile = None
+            history.clear(session_id(), HISTORY_TOOL)
             st.success("CSV data and chat history cleared!")
             st.rerun()
     else:
@@ -0,0 +1,128 @@
+import weakref
+
+import numpy as np
+import pandas as pd
+
+TOP_K = 5
+QUANTILES = (0.0, 0.25, 0.5, 0.75, 1.0)
+# Above this many rows the distinct count is estimated from a k-minimum-values sketch.
+EXACT_DISTINCT_MAX_ROWS = 200_000
+SKETCH_SIZE = 1024
+CSV_SAMPLE_CHARS = 5000
+
+
+def _column_hashes(series):
+    return pd.util.hash_pandas_object(series, index=False).to_numpy()
+
+
+def estimate_distinct(hashes):
+    """
+    Estimates the number of distinct values from their 64-bit hashes.
+
+    Small columns are counted exactly; larger ones use a k-minimum-values sketch,
+    which needs one partial sort instead of a full hash table.
+    """
+    if len(hashes) <= EXACT_DISTINCT_MAX_ROWS:
+        return int(len(np.unique(hashes)))
+    # The m smallest hashes contain every distinct value below the m-th one, so if
+    # they hold at least k distinct values, those include the k smallest.
+    m = min(len(hashes) - 1, SKETCH_SIZE * 8)
+    smallest = np.unique(np.partition(hashes, m)[:m])
+    if len(smallest) < SKETCH_SIZE:
+        return int(len(np.unique(hashes)))
+    kth = float(smallest[SKETCH_SIZE - 1]) / float(np.iinfo(np.uint64).max)
+    return int(round((SKETCH_SIZE - 1) / kth))
+
+
+def profile_column(series, hashes=None):
+    """
+    Profiles one column with vectorized pandas/NumPy operations.
+
+    Args:
+        series (pandas.Series): The column.
+        hashes (numpy.ndarray, optional): Precomputed `hash_pandas_object` values.
+
+    Returns:
+        dict: dtype, null rate, distinct-count estimate, quantiles (numeric columns)
+        and the top-k repeated values, or a few example values when none repeat.
+    """
+    hashes = _column_hashes(series) if hashes is None else hashes
+    non_null = series.dropna()
+    profile = {
+        "dtype": str(series.dtype),
+        "null_rate": float(series.isna().mean()) if len(series) else 0.0,
+        "distinct": estimate_distinct(hashes[series.notna().to_numpy()]),
+        "fingerprint": int(hashes.sum(dtype=np.uint64)) if len(hashes) else 0,
+        "rows": len(series),
+    }
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series) and len(non_null):
+        quantiles = non_null.quantile(list(QUANTILES))
+        profile["quantiles"] = {f"p{int(q * 100)}": float(value) for q, value in quantiles.items()}
+        profile["mean"] = float(non_null.mean())
+    elif pd.api.types.is_datetime64_any_dtype(series) and len(non_null):
+        profile["min"], profile["max"] = str(non_null.min()), str(non_null.max())
+    top = non_null.value_counts().head(TOP_K)
+    profile["top"] = [(str(value), int(count)) for value, count in top.items() if count > 1]
+    if not profile["top"]:
+        profile["examples"] = [str(value) for value in non_null.head(3).tolist()]
+    return profile
+
+
+def profile_dataframe(df, previous=None):
+    """
+    Profiles every column of `df`, reusing the profiles in `previous` for columns whose
+    content fingerprint has not changed.
+
+    Args:
+        df (pandas.DataFrame): The data.
+        previous (dict, optional): An earlier result of this function.
+
+    Returns:
+        dict: {"rows", "shape", "frame", "columns": {name: column profile}, "csv_sample"}.
+    """
+    if previous and previous["frame"]() is df and previous["shape"] == df.shape:
+        return previous
+
+    old_columns = (previous or {}).get("columns", {})
+    columns = {}
+    for name in df.columns:
+        series = df[name]
+        hashes = _column_hashes(series)
+        old = old_columns.get(name)
+        fingerprint = int(hashes.sum(dtype=np.uint64)) if len(hashes) else 0
+        if old and old["fingerprint"] == fingerprint and old["rows"] == len(series) and old["dtype"] == str(series.dtype):
+            columns[name] = old
+        else:
+            columns[name] = profile_column(series, hashes)
+
+    # Every CSV row serializes to at least one character, so this many rows always
+    # cover the sample.
+    csv_sample = df.head(CSV_SAMPLE_CHARS).to_csv(index=False)[:CSV_SAMPLE_CHARS]
+    return {
+        "rows": len(df),
+        "shape": df.shape,
+        "frame": weakref.ref(df),
+        "columns": columns,
+        "csv_sample": csv_sample,
+    }
+
+
+def format_profile(profile):
+    """Formats a dataset profile as compact text for prompts."""
+    lines = [f"Rows: {profile['rows']}", "Columns:"]
+    for name, column in profile["columns"].items():
+        parts = [f"- {name!r} ({column['dtype']})", f"nulls {column['null_rate']:.1%}", f"~{column['distinct']} distinct"]
+        if "quantiles" in column:
+            quantiles = column["quantiles"]
+            parts.append(
+                f"min {quantiles['p0']:g}, p25 {quantiles['p25']:g}, median {quantiles['p50']:g}, "
+                f"p75 {quantiles['p75']:g}, max {quantiles['p100']:g}, mean {column['mean']:g}"
+            )
+        elif "min" in column:
+            parts.append(f"range {column['min']} to {column['max']}")
+        if column["top"]:
+            parts.append("top: " + ", ".join(f"{value!r} ({count})" for value, count in column["top"]))
+        elif column.get("examples"):
+            parts.append("e.g. " + ", ".join(repr(value) for value in column["examples"]))
+        lines.append("; ".join(parts))
+    return "\n".join(lines)
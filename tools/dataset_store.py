@@ -0,0 +1,230 @@
+import hashlib
+import os
+import shutil
+import socket
+import threading
+import time
+import weakref
+from functools import lru_cache
+
+import pandas as pd
+
+from .csv_ingest import ingest_csv
+from .settings import CACHE_DIR
+
+STORE_MAX_BYTES = int(os.getenv("LLM_TOOLS_DATASET_STORE_MB", "4096")) * 1024 * 1024
+# Datasets no session holds are kept this long in case the same file is uploaded again.
+IDLE_SECONDS = int(os.getenv("LLM_TOOLS_DATASET_IDLE_SECONDS", "600"))
+HASH_BLOCK = 1024 * 1024
+
+
+def content_hash(file):
+    """Returns the SHA-256 of an uploaded file's bytes, leaving the file at position 0."""
+    file.seek(0)
+    digest = hashlib.sha256()
+    for block in iter(lambda: file.read(HASH_BLOCK), b""):
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def _write_arrow(df, path):
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _open_arrow(path):
+    """
+    Opens a dataset file memory-mapped and read-only. Columns stay Arrow-backed so
+    every session reads the same mapped pages; dictionary columns become pandas
+    categoricals, whose codes are small.
+    """
+    import pyarrow as pa
+
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(
+        types_mapper=lambda arrow_type: None if pa.types.is_dictionary(arrow_type) else pd.ArrowDtype(arrow_type),
+        split_blocks=True,
+    )
+
+
+def _process_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # Running, but owned by another user.
+        return True
+    return True
+
+
+def _remove_stale_directories(root, host):
+    """
+    Removes the dataset directories of processes on this host that have exited. The
+    directories of running processes, and of other hosts sharing the cache, are kept.
+    """
+    if os.name != "posix":
+        # os.kill cannot probe a process elsewhere; leftovers are only disk space.
+        return
+    prefix = f"{host}-"
+    for name in os.listdir(root):
+        pid = name[len(prefix):]
+        if name.startswith(prefix) and pid.isdigit() and not _process_running(int(pid)):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+class _Entry:
+    def __init__(self, key, path, df, total_rows, sample_fraction):
+        self.key = key
+        self.path = path
+        self.df = df
+        self.total_rows = total_rows
+        self.sample_fraction = sample_fraction
+        self.size = os.path.getsize(path)
+        self.refs = 0
+        self.idle_since = None
+
+
+class DatasetHandle:
+    """
+    A session's reference to a shared dataset. Releasing it, explicitly or when the
+    session's state is garbage collected, drops the session's reference.
+    """
+
+    def __init__(self, store, entry):
+        self.key = entry.key
+        self._entry = entry
+        self._finalizer = weakref.finalize(self, store._release, entry.key)
+
+    @property
+    def df(self):
+        return self._entry.df
+
+    @property
+    def total_rows(self):
+        return self._entry.total_rows
+
+    @property
+    def sampled(self):
+        return self._entry.sample_fraction < 1.0
+
+    @property
+    def sample_fraction(self):
+        return self._entry.sample_fraction
+
+    def release(self):
+        self._finalizer()
+
+
+class DatasetStore:
+    """
+    Process-wide, content-addressed store of uploaded CSV datasets.
+
+    Each distinct upload is ingested once, written to a read-only Arrow file in this
+    process's own directory under `root` and memory-mapped; every session that
+    uploads the same bytes gets a handle to the same frame. Other processes sharing
+    the cache directory (the app, the HTTP service, batch jobs) never touch these
+    files; a process removes only the directories of exited processes. Datasets are reference-counted: once no session holds
+    one it is kept for `idle_seconds`, then evicted, and idle datasets are evicted
+    least-recently-released first whenever the store exceeds `max_bytes`.
+    """
+
+    def __init__(self, root, max_bytes=STORE_MAX_BYTES, idle_seconds=IDLE_SECONDS):
+        os.makedirs(root, exist_ok=True)
+        host = socket.gethostname()
+        _remove_stale_directories(root, host)
+        self.root = os.path.join(root, f"{host}-{os.getpid()}")
+        # Anything here was left by an exited process that had the same pid.
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.makedirs(self.root)
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def acquire(self, file, spill=False, progress=None):
+        """
+        Returns a handle to the dataset for an uploaded CSV, ingesting it only if no
+        session has loaded the same bytes with the same options.
+
+        Args:
+            file (streamlit.runtime.uploaded_file_manager.UploadedFile): The uploaded CSV.
+            spill (bool): Whether ingestion streams chunks straight to disk instead of
+                building the frame in memory first.
+            progress (Callable, optional): Passed to `ingest_csv`.
+
+        Returns:
+            DatasetHandle: The session's handle.
+        """
+        key = f"{content_hash(file)}-{'spill' if spill else 'memory'}"
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.refs += 1
+                    entry.idle_since = None
+                    return DatasetHandle(self, entry)
+
+            path = os.path.join(self.root, f"{key}.arrow")
+            result = ingest_csv(file, spill=spill, progress=progress)
+            if result.spill_path:
+                shutil.move(result.spill_path, path)
+            else:
+                _write_arrow(result.df, path)
+            entry = _Entry(key, path, _open_arrow(path), result.total_rows, result.sample_fraction)
+
+            with self._lock:
+                entry.refs = 1
+                self._entries[key] = entry
+                self._evict()
+                return DatasetHandle(self, entry)
+
+    def _release(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refs -= 1
+            if entry.refs <= 0:
+                entry.idle_since = time.time()
+            self._evict()
+
+    def _evict(self):
+        now = time.time()
+        idle = sorted(
+            (entry for entry in self._entries.values() if entry.refs <= 0),
+            key=lambda entry: entry.idle_since,
+        )
+        total = sum(entry.size for entry in self._entries.values())
+        for entry in idle:
+            if total <= self.max_bytes and now - entry.idle_since < self.idle_seconds:
+                continue
+            del self._entries[entry.key]
+            self._key_locks.pop(entry.key, None)
+            total -= entry.size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "datasets": len(self._entries),
+                "bytes": sum(entry.size for entry in self._entries.values()),
+                "references": sum(entry.refs for entry in self._entries.values()),
+            }
+
+
+@lru_cache(maxsize=None)
+def get_dataset_store():
+    return DatasetStore(os.path.join(CACHE_DIR, "datasets"))
@@ -7,6 +7,20 @@ def document_summarizer_app():
 
     doc_file = st.file_uploader('Upload your PDF or Word Document (Max 20MB for optimal performance):', type=['pdf', 'docx'], key="doc_summarizer_uploader")
 
+    summary_mode = st.radio(
+        'Summary mode',
+        ['Full document', 'Quick (top 5 passages)'],
+        horizontal=True,
+        key="doc_summary_mode",
+        help="Full document reads every page and merges partial summaries. Quick summarizes only the five most relevant passages.",
+    )
+
+    with st.expander("Page Options"):
+        col1, col2, col3 = st.columns(3)
+        first_page = col1.number_input('First page', min_value=1, value=1, step=1, key="doc_first_page")
+        last_page = col2.number_input('Last page (0 = end of document)', min_value=0, value=0, step=1, key="doc_last_page")
+        max_pages = col3.number_input('Max pages (0 = no limit)', min_value=0, value=0, step=1, key="doc_max_pages")
+
     if 'doc_summary_output' not in st.session_state:
         st.session_state.doc_summary_output = ""
 
@@ -18,7 +32,12 @@ def document_summarizer_app():
                 st.warning("File size exceeds 20MB. Processing large documents might be slow or hit API limits.")
 
             with st.spinner("Analyzing document and generating summary... This might take a moment based on document size."):
-                response = summerizer(doc_file)
+                response = summerizer(
+                    doc_file,
+                    page_range=(int(first_page), int(last_page) or None),
+                    max_pages=int(max_pages) or None,
+                    mode="map_reduce" if summary_mode == 'Full document' else "retrieval",
+                )
 
             if response and not response.startswith("ERROR:"):
                 st.subheader('Generated Summary:')
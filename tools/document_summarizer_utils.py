@@ -1,139 +1,405 @@
-from langchain.text_splitter import CharacterTextSplitter
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain.chains.question_answering import load_qa_chain
-from pypdf import PdfReader, errors as pypdf_errors
-from docx import Document
-from langchain_community.vectorstores import FAISS
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 import os
+import shutil
+import tempfile
 import streamlit as st
+from . import llm_client, metrics
+from .chunking import chunk_pages
+from .summarization import DEFAULT_INSTRUCTION, SECTION_SEPARATOR, map_reduce_summarize
+
+# langchain, FAISS, pypdf and python-docx are imported where they are used, so that
+# importing this module (and opening the Document Summarizer) stays cheap.
+
+TOOL_NAME = "document_summarizer"
+EMBEDDING_MODEL = llm_client.EMBEDDING_MODEL
+SUMMARY_MODEL = "gemini-1.5-flash"
+SUMMARY_GENERATION_CONFIG = {"temperature": 0.1}
+# Retrieval mode summarizes only the chunks most similar to the summary request.
+RETRIEVAL_CHUNKS = 5
+RETRIEVAL_PROMPT = (
+    "The following are the passages of a document most relevant to a summary of it. "
+    "Using only these passages, {instruction}\n\n{text}"
+)
+EXTRACTION_WORKERS = int(os.getenv("LLM_TOOLS_EXTRACTION_WORKERS", str(min(os.cpu_count() or 1, 4))))
+PAGES_PER_TASK = 8
+EXTRACTION_SPOOL_BLOCK = 1024 * 1024
+
+class DocumentExtractionError(Exception):
+    """Raised when a document cannot be read; the message is shown to the user."""
+
+
+def split_pages(pages, text_splitter=None):
+    """
+    Splits a stream of page texts into chunks without joining the whole document first.
+
+    By default pages are chunked by `chunking.chunk_pages`: token-sized chunks that
+    follow headings, paragraphs and sentences, in one pass over the stream. With a
+    LangChain `text_splitter`, only the last, still-open chunk of the previous page is
+    carried over, so memory stays proportional to a page rather than to the document.
+
+    Args:
+        pages (Iterable[str]): Page texts in document order.
+        text_splitter (langchain_text_splitters.TextSplitter, optional): Splitter to use
+            instead of the token-aware chunker.
+
+    Yields:
+        str: The text chunks, in document order.
+    """
+    if text_splitter is None:
+        yield from chunk_pages(pages)
+        return
+    carry = ''
+    for page in pages:
+        if not page or not page.strip():
+            continue
+        chunks = text_splitter.split_text(f"{carry}\n{page}" if carry else page)
+        if not chunks:
+            continue
+        yield from chunks[:-1]
+        carry = chunks[-1]
+    if carry:
+        yield carry
+
 
 def process_text(text):
     """
     Processes the input text by splitting it into chunks and creating a FAISS knowledge base.
 
     Args:
-        text (str): The raw text extracted from the PDF or Word document.
+        text (str | Iterable[str]): The raw text extracted from the PDF or Word document,
+            or a stream of its page texts.
 
     Returns:
         FAISS: A FAISS vector store containing the text chunks and their embeddings.
     """
-    text_splitter = CharacterTextSplitter(
-        separator="\n",
-        chunk_size=1000,
-        chunk_overlap=200,
-        length_function=len
-    )
-    chunks = text_splitter.split_text(text)
+    pages = [text] if isinstance(text, str) else text
+    return build_knowledge_base(list(split_pages(pages)))
+
+
+def build_knowledge_base(chunks):
+    """
+    Embeds text chunks and builds a FAISS knowledge base from them.
+
+    Chunk embeddings are served from the on-disk embedding cache, so only chunks that
+    have not been embedded before reach the API, and a document whose chunks were all
+    seen before reuses its saved FAISS index instead of building a new one.
+
+    Args:
+        chunks (list[str]): The document's text chunks.
 
-    gemini_api_key = os.getenv("GEMINI_API_KEY")
-    if not gemini_api_key:
+    Returns:
+        FAISS: A FAISS vector store containing the text chunks and their embeddings.
+    """
+    if llm_client.api_key_missing():
         raise ValueError("GEMINI_API_KEY environment variable not set.")
-    os.environ['GOOGLE_API_KEY'] = gemini_api_key
+    from langchain_community.vectorstores import FAISS
+
+    from .embedding_cache import CachedEmbeddings, document_key, get_embedding_cache, get_index_store
 
-    embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+    # Vectors from different backends must never share cache entries.
+    cache_model_name = f"{llm_client.get_backend().name}/{EMBEDDING_MODEL}"
+    embeddings = CachedEmbeddings(
+        llm_client.get_embeddings(EMBEDDING_MODEL),
+        cache_model_name,
+        get_embedding_cache(),
+    )
 
-    KnowledgeBase = FAISS.from_texts(chunks, embeddings)
+    index_store = get_index_store()
+    doc_key = document_key(chunks, cache_model_name)
+    KnowledgeBase = index_store.load(doc_key, embeddings)
+    metrics.record_cache("faiss_index", hit=KnowledgeBase is not None)
+    if KnowledgeBase is None:
+        with metrics.span("embed", TOOL_NAME):
+            vectors = embeddings.embed_documents(chunks)
+        metrics.record_cache("embedding", hit=True, count=embeddings.hits)
+        metrics.record_cache("embedding", hit=False, count=embeddings.misses)
+        with metrics.span("index", TOOL_NAME):
+            KnowledgeBase = FAISS.from_embeddings(list(zip(chunks, vectors)), embeddings)
+            index_store.save(doc_key, KnowledgeBase)
     return KnowledgeBase
 
-def extract_text_from_pdf(pdf_file):
+
+def _select_pages(page_count, page_range=None, max_pages=None):
+    first, last = page_range or (None, None)
+    first = max(first or 1, 1)
+    last = min(last or page_count, page_count)
+    if max_pages:
+        last = min(last, first + max_pages - 1)
+    return range(first - 1, last) if first <= last else range(0)
+
+
+_worker_pdf_reader = None
+
+
+def _init_pdf_worker(pdf_path):
+    global _worker_pdf_reader
+    from pypdf import PdfReader
+
+    _worker_pdf_reader = PdfReader(pdf_path)
+
+
+def _extract_pdf_page_batch(page_numbers):
+    return [_worker_pdf_reader.pages[i].extract_text() or '' for i in page_numbers]
+
+
+def _spool_to_disk(uploaded_file):
+    uploaded_file.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as spool:
+        shutil.copyfileobj(uploaded_file, spool, EXTRACTION_SPOOL_BLOCK)
+    return spool.name
+
+
+def iter_pdf_pages(pdf_file, page_range=None, max_pages=None, workers=None):
+    """
+    Extracts the text of a PDF page by page through a process pool.
+
+    Pages are extracted in batches of `PAGES_PER_TASK` by up to `workers` processes,
+    and at most two batches per worker are in flight at once, so peak memory depends
+    on the pool width rather than on the page count. Small selections are extracted
+    in-process to avoid the pool start-up cost.
+
+    Args:
+        pdf_file (streamlit.runtime.uploaded_file_manager.UploadedFile | str): The uploaded
+            PDF file object or a path to a PDF file.
+        page_range (tuple[int | None, int | None], optional): 1-based, inclusive first and
+            last page to extract.
+        max_pages (int, optional): Maximum number of pages to extract.
+        workers (int, optional): Process pool size. Defaults to `EXTRACTION_WORKERS`.
+
+    Yields:
+        str: The text of each selected page, in page order.
+
+    Raises:
+        DocumentExtractionError: If the PDF cannot be read.
+    """
+    from pypdf import PdfReader, errors as pypdf_errors
+
+    workers = workers or EXTRACTION_WORKERS
+    spooled_path = None
+    try:
+        if isinstance(pdf_file, (str, os.PathLike)):
+            pdf_path = pdf_file
+        else:
+            spooled_path = pdf_path = _spool_to_disk(pdf_file)
+
+        reader = PdfReader(pdf_path)
+        selected = _select_pages(len(reader.pages), page_range, max_pages)
+        batches = [selected[i:i + PAGES_PER_TASK] for i in range(0, len(selected), PAGES_PER_TASK)]
+
+        if workers <= 1 or len(batches) <= 1:
+            for page_number in selected:
+                yield reader.pages[page_number].extract_text() or ''
+            return
+        del reader
+
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(batches)),
+            initializer=_init_pdf_worker,
+            initargs=(pdf_path,),
+        ) as pool:
+            pending = deque()
+            batch_iter = iter(batches)
+            for batch in islice(batch_iter, workers * 2):
+                pending.append(pool.submit(_extract_pdf_page_batch, batch))
+            while pending:
+                page_texts = pending.popleft().result()
+                for batch in islice(batch_iter, 1):
+                    pending.append(pool.submit(_extract_pdf_page_batch, batch))
+                yield from page_texts
+    except pypdf_errors.PdfStreamError:
+        raise DocumentExtractionError("Could not read PDF. The file might be corrupted, malformed, or encrypted.")
+    except Exception as e:
+        raise DocumentExtractionError(f"An unexpected error occurred while processing the PDF: {e}")
+    finally:
+        if spooled_path:
+            os.remove(spooled_path)
+
+
+def iter_docx_pages(docx_file, page_range=None, max_pages=None):
+    """
+    Extracts the text of a DOCX (Word) file page by page.
+
+    Pages are delimited by the page breaks Word records in the document, so the
+    page limits match what the user sees in Word as closely as the file allows.
+
+    Args:
+        docx_file (streamlit.runtime.uploaded_file_manager.UploadedFile | str): The uploaded
+            DOCX file object or a path to a DOCX file.
+        page_range (tuple[int | None, int | None], optional): 1-based, inclusive first and
+            last page to extract.
+        max_pages (int, optional): Maximum number of pages to extract.
+
+    Yields:
+        str: The text of each selected page, in page order.
+
+    Raises:
+        DocumentExtractionError: If the document cannot be read.
+    """
+    from docx import Document
+
+    try:
+        document = Document(docx_file)
+    except Exception as e:
+        raise DocumentExtractionError(f"An error occurred while processing the Word document: {e}")
+
+    first, last = page_range or (None, None)
+    first = max(first or 1, 1)
+    if max_pages:
+        last = min(last or first + max_pages - 1, first + max_pages - 1)
+
+    page_number = 1
+    lines = []
+    # Whether the current page has any paragraphs, collected or skipped: pages before
+    # `first` must be counted too.
+    page_started = False
+    for paragraph in document.paragraphs:
+        if getattr(paragraph, 'contains_page_break', False) and page_started:
+            if page_number >= first:
+                yield '\n'.join(lines)
+            lines = []
+            page_number += 1
+            if last and page_number > last:
+                return
+        page_started = True
+        if page_number >= first:
+            lines.append(paragraph.text)
+    if lines and page_number >= first:
+        yield '\n'.join(lines)
+
+
+def iter_document_pages(doc_file, page_range=None, max_pages=None):
+    """
+    Streams the page texts of an uploaded PDF or Word document.
+
+    Args:
+        doc_file (streamlit.runtime.uploaded_file_manager.UploadedFile | str): The uploaded
+            document or a path to one.
+        page_range (tuple[int | None, int | None], optional): 1-based, inclusive page range.
+        max_pages (int, optional): Maximum number of pages to extract.
+
+    Returns:
+        Iterator[str]: The page texts, in page order.
+
+    Raises:
+        DocumentExtractionError: If the file type is not supported.
+    """
+    name = doc_file if isinstance(doc_file, (str, os.PathLike)) else doc_file.name
+    file_extension = os.path.splitext(name)[1].lower()
+    if file_extension == '.pdf':
+        return iter_pdf_pages(doc_file, page_range, max_pages)
+    if file_extension == '.docx':
+        return iter_docx_pages(doc_file, page_range, max_pages)
+    raise DocumentExtractionError("Unsupported file type. Please upload a PDF or DOCX document.")
+
+
+def extract_text_from_pdf(pdf_file, page_range=None, max_pages=None):
     """
     Extracts text from a PDF file.
 
     Args:
         pdf_file (streamlit.runtime.uploaded_file_manager.UploadedFile): The uploaded PDF file object.
+        page_range (tuple[int | None, int | None], optional): 1-based, inclusive page range.
+        max_pages (int, optional): Maximum number of pages to extract.
 
     Returns:
         str: The extracted text, or an error message prefixed with "ERROR:".
     """
     try:
-        pdf_reader = PdfReader(pdf_file)
-        text = ''
-        for page in pdf_reader.pages:
-            text += page.extract_text() or ''
-        return text
-    except pypdf_errors.PdfStreamError:
-        return "ERROR: Could not read PDF. The file might be corrupted, malformed, or encrypted."
-    except Exception as e:
-        return f"ERROR: An unexpected error occurred while processing the PDF: {e}"
+        return '\n'.join(iter_pdf_pages(pdf_file, page_range, max_pages))
+    except DocumentExtractionError as e:
+        return f"ERROR: {e}"
 
 
-def extract_text_from_docx(docx_file):
+def extract_text_from_docx(docx_file, page_range=None, max_pages=None):
     """
     Extracts text from a DOCX (Word) file.
 
     Args:
         docx_file (streamlit.runtime.uploaded_file_manager.UploadedFile): The uploaded DOCX file object.
+        page_range (tuple[int | None, int | None], optional): 1-based, inclusive page range.
+        max_pages (int, optional): Maximum number of pages to extract.
 
     Returns:
         str: The extracted text, or an error message prefixed with "ERROR:".
     """
     try:
-        document = Document(docx_file)
-        text = ''
-        for paragraph in document.paragraphs:
-            text += paragraph.text + '\n'
-        return text
-    except Exception as e:
-        return f"ERROR: An error occurred while processing the Word document: {e}"
+        return '\n'.join(iter_docx_pages(docx_file, page_range, max_pages)) + '\n'
+    except DocumentExtractionError as e:
+        return f"ERROR: {e}"
 
 
-def summerizer(doc_file):
+def summerizer(doc_file, page_range=None, max_pages=None, mode="map_reduce"):
     """
     Summarizes the content of an uploaded PDF or Word document using the Gemini API.
 
+    In "map_reduce" mode every chunk of the document is summarized and the partial
+    summaries are merged hierarchically. In "retrieval" mode only the five chunks most
+    similar to the summary query are retrieved from a FAISS index and summarized.
+
     Args:
-        doc_file (streamlit.runtime.uploaded_file_manager.UploadedFile): The uploaded document file object (PDF or DOCX).
+        doc_file (streamlit.runtime.uploaded_file_manager.UploadedFile | str): The uploaded document file object (PDF or DOCX), or a path to one.
+        page_range (tuple[int | None, int | None], optional): 1-based, inclusive page range to summarize.
+        max_pages (int, optional): Maximum number of pages to summarize.
+        mode (str): "map_reduce" (whole document) or "retrieval" (top-5 chunks).
 
     Returns:
         str: The summarized text of the document, or an error message prefixed with "ERROR:".
     """
-    gemini_api_key = os.getenv("GEMINI_API_KEY")
-    if not gemini_api_key:
+    if llm_client.api_key_missing():
         return (
             "ERROR: Gemini API key not found for Document Summarizer. "
             "Please set it as an environment variable named `GEMINI_API_KEY` "
             "(e.g., in Streamlit Cloud secrets, Heroku config vars, or your local shell)."
         )
-    os.environ['GOOGLE_API_KEY'] = gemini_api_key
 
     if doc_file is None:
         return "ERROR: No document file uploaded."
 
-    file_extension = os.path.splitext(doc_file.name)[1].lower()
-    text = ''
+    try:
+        # Pages are parsed and split as they are extracted, so this times both.
+        with metrics.span("parse", TOOL_NAME):
+            chunks = list(split_pages(iter_document_pages(doc_file, page_range, max_pages)))
+    except DocumentExtractionError as e:
+        return f"ERROR: {e}"
 
-    if file_extension == '.pdf':
-        text = extract_text_from_pdf(doc_file)
-    elif file_extension == '.docx':
-        text = extract_text_from_docx(doc_file)
-    else:
-        return "ERROR: Unsupported file type. Please upload a PDF or DOCX document."
+    if not chunks:
+        return "ERROR: Could not extract any meaningful text from the provided document. It might be an image-based file, empty, or encrypted."
 
-    if text.startswith("ERROR:"):
-        return text
+    if mode == "map_reduce":
+        def generate(prompt):
+            return llm_client.generate(
+                prompt,
+                model=SUMMARY_MODEL,
+                generation_config=SUMMARY_GENERATION_CONFIG,
+                tool=TOOL_NAME,
+            )
 
-    if not text.strip():
-        return "ERROR: Could not extract any meaningful text from the provided document. It might be an image-based file, empty, or encrypted."
+        try:
+            return map_reduce_summarize(chunks, generate)
+        except Exception as e:
+            return f"ERROR: An error occurred during summarization with the LLM. This might be due to an API issue or rate limits. Details: {e}"
 
     try:
-        KnowledgeBase = process_text(text)
+        KnowledgeBase = build_knowledge_base(chunks)
     except Exception as e:
         return f"ERROR: Failed to create knowledge base from document due to embedding or API configuration issue. Ensure your `GEMINI_API_KEY` is correct and has access to embedding models. Details: {e}"
 
     query = 'summarize the entire content of the uploaded document concisely in 3-5 sentences, capturing the main points and key takeaways.'
 
     try:
-        llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0.1)
-    except Exception as e:
-        return f"ERROR: Failed to initialize Gemini LLM. Ensure your `GEMINI_API_KEY` is correct and has access to Gemini 1.5 Flash. Details: {e}"
-
-    chain = load_qa_chain(llm, chain_type='stuff')
-
-    try:
-        docs = KnowledgeBase.similarity_search(query, k=5)
-
-        response = chain.run(input_documents=docs, question=query)
-        return response
+        with metrics.span("search", TOOL_NAME):
+            docs = KnowledgeBase.similarity_search(query, k=RETRIEVAL_CHUNKS)
+        prompt = RETRIEVAL_PROMPT.format(
+            instruction=DEFAULT_INSTRUCTION,
+            text=SECTION_SEPARATOR.join(doc.page_content for doc in docs),
+        )
+        return llm_client.generate(
+            prompt,
+            model=SUMMARY_MODEL,
+            generation_config=SUMMARY_GENERATION_CONFIG,
+            tool=TOOL_NAME,
+        )
     except Exception as e:
         return f"ERROR: An error occurred during summarization with the LLM. This might be due to token limits for very large documents, or an API issue. Details: {e}"
@@ -0,0 +1,220 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from .settings import CACHE_DIR
+
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("LLM_TOOLS_EMBEDDING_CACHE_MB", "256")) * 1024 * 1024
+INDEX_STORE_MAX_BYTES = int(os.getenv("LLM_TOOLS_INDEX_STORE_MB", "512")) * 1024 * 1024
+
+
+def chunk_key(text, model_name):
+    """
+    Builds the content address of a single chunk embedding.
+
+    Args:
+        text (str): The chunk text.
+        model_name (str): The embedding model the vector was produced by.
+
+    Returns:
+        str: A hex SHA-256 digest of the model name and the chunk text.
+    """
+    digest = hashlib.sha256()
+    digest.update(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def document_key(chunks, model_name):
+    """
+    Builds the key of a per-document FAISS index from its ordered chunk keys.
+
+    Args:
+        chunks (list[str]): The chunk texts, in document order.
+        model_name (str): The embedding model name.
+
+    Returns:
+        str: A hex SHA-256 digest identifying the document's index.
+    """
+    digest = hashlib.sha256(model_name.encode("utf-8"))
+    for chunk in chunks:
+        digest.update(bytes.fromhex(chunk_key(chunk, model_name)))
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed store of embedding vectors keyed by `chunk_key`, evicted
+    least-recently-used first once the stored vectors exceed `max_bytes`.
+    """
+
+    def __init__(self, path, max_bytes=EMBEDDING_CACHE_MAX_BYTES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+    def get_many(self, keys):
+        found = {}
+        if not keys:
+            return found
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+                self._conn.execute(
+                    f"UPDATE embeddings SET last_used = ? WHERE key IN ({placeholders})", [now, *batch]
+                )
+            self._conn.commit()
+        return found
+
+    def put_many(self, items):
+        now = time.time()
+        rows = []
+        for key, vector in items:
+            blob = np.asarray(vector, dtype=np.float32).tobytes()
+            rows.append((key, blob, len(blob), now))
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+            self._conn.commit()
+            self._evict()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM embeddings ORDER BY last_used"):
+            stale.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", stale)
+        self._conn.commit()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps a LangChain embeddings model so that only chunks missing from the
+    `EmbeddingCache` are sent to the underlying API.
+    """
+
+    def __init__(self, underlying, model_name, cache):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts):
+        keys = [chunk_key(text, self.model_name) for text in texts]
+        vectors = self.cache.get_many(list(dict.fromkeys(keys)))
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            fresh = self.underlying.embed_documents(list(missing.values()))
+            new_items = list(zip(missing.keys(), fresh))
+            self.cache.put_many(new_items)
+            vectors.update(new_items)
+
+        return [list(vectors[key]) for key in keys]
+
+    def embed_query(self, text):
+        return self.underlying.embed_query(text)
+
+
+class FaissIndexStore:
+    """
+    Saves one FAISS index per document under `root` and memory-maps it back on
+    reuse. Least-recently-used indexes are deleted once the store exceeds `max_bytes`.
+    """
+
+    def __init__(self, root, max_bytes=INDEX_STORE_MAX_BYTES):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.root, key)
+
+    def load(self, key, embeddings):
+        from langchain_community.vectorstores import FAISS
+        import faiss
+
+        path = self._path(key)
+        if not os.path.isfile(os.path.join(path, "index.faiss")):
+            return None
+        io_flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+        try:
+            store = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True, io_flags=io_flags)
+        except Exception:
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        os.utime(path)
+        return store
+
+    def save(self, key, store):
+        path = self._path(key)
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        store.save_local(tmp_path)
+        with self._lock:
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp_path, path)
+            self._evict(keep=key)
+
+    def _evict(self, keep=None):
+        entries = []
+        total = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if not os.path.isdir(path) or ".tmp-" in name:
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+            entries.append((os.stat(path).st_mtime, size, name))
+            total += size
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            shutil.rmtree(self._path(name), ignore_errors=True)
+            total -= size
+
+
+@lru_cache(maxsize=None)
+def get_embedding_cache():
+    return EmbeddingCache(os.path.join(CACHE_DIR, "embeddings.sqlite3"))
+
+
+@lru_cache(maxsize=None)
+def get_index_store():
+    return FaissIndexStore(os.path.join(CACHE_DIR, "faiss_indexes"))
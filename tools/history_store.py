@@ -0,0 +1,112 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+from .settings import CACHE_DIR
+
+HISTORY_PATH = os.getenv("LLM_TOOLS_HISTORY_PATH", os.path.join(CACHE_DIR, "history.sqlite3"))
+# Marker rows: a "clear" row hides everything before it, a "summary" row holds a chat
+# memory summary. Neither is shown in the UI.
+CLEAR_ROLE = "clear"
+SUMMARY_ROLE = "summary"
+MESSAGE_ROLES = ("user", "assistant")
+
+
+class HistoryStore:
+    """
+    Append-only SQLite store of every tool's chat history, keyed by session and tool.
+
+    Rows are never updated or deleted: clearing a chat appends a marker row and reads
+    only look past the latest marker. Lookups use an index on (session, tool, id), so
+    reading the last page of a chat costs the same however long it is.
+    """
+
+    def __init__(self, path=HISTORY_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, session TEXT NOT NULL, tool TEXT NOT NULL, role TEXT NOT NULL, "
+            "content TEXT NOT NULL, meta TEXT, created REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS messages_session_tool ON messages (session, tool, id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS messages_session_tool_role ON messages (session, tool, role, id)")
+        self._conn.commit()
+
+    def append(self, session, tool, role, content, **meta):
+        """Appends one row and returns its id."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO messages (session, tool, role, content, meta, created) VALUES (?, ?, ?, ?, ?, ?)",
+                (session, tool, role, content, json.dumps(meta) if meta else None, time.time()),
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def clear(self, session, tool):
+        self.append(session, tool, CLEAR_ROLE, "")
+
+    def _latest(self, session, tool, role):
+        return self._conn.execute(
+            "SELECT id, content, meta FROM messages WHERE session = ? AND tool = ? AND role = ? ORDER BY id DESC LIMIT 1",
+            (session, tool, role),
+        ).fetchone()
+
+    def _start(self, session, tool):
+        marker = self._latest(session, tool, CLEAR_ROLE)
+        return marker[0] if marker else 0
+
+    @staticmethod
+    def _message(row):
+        message_id, role, content, meta = row
+        message = {"id": message_id, "role": role, "content": content}
+        if meta:
+            message.update(json.loads(meta))
+        return message
+
+    def page(self, session, tool, limit, before_id=None):
+        """
+        Returns up to `limit` of the most recent user/assistant messages (older than
+        `before_id`, if given) in chronological order, and whether older ones exist.
+        """
+        with self._lock:
+            start = self._start(session, tool)
+            rows = self._conn.execute(
+                "SELECT id, role, content, meta FROM messages "
+                "WHERE session = ? AND tool = ? AND id > ? AND id < ? AND role IN (?, ?) "
+                "ORDER BY id DESC LIMIT ?",
+                (session, tool, start, before_id or 2 ** 62, *MESSAGE_ROLES, limit + 1),
+            ).fetchall()
+        has_older = len(rows) > limit
+        return [self._message(row) for row in reversed(rows[:limit])], has_older
+
+    def messages(self, session, tool, after_id=0):
+        """Yields every user/assistant message since the last clear (and after `after_id`), oldest first."""
+        with self._lock:
+            start = max(self._start(session, tool), after_id)
+            rows = self._conn.execute(
+                "SELECT id, role, content, meta FROM messages "
+                "WHERE session = ? AND tool = ? AND id > ? AND role IN (?, ?) ORDER BY id",
+                (session, tool, start, *MESSAGE_ROLES),
+            ).fetchall()
+        for row in rows:
+            yield self._message(row)
+
+    def latest_summary(self, session, tool):
+        """Returns (summary text, id of the last message it covers), or ("", 0)."""
+        with self._lock:
+            start = self._start(session, tool)
+            row = self._latest(session, tool, SUMMARY_ROLE)
+        if row is None or row[0] < start:
+            return "", start
+        return row[1], json.loads(row[2])["upto"]
+
+
+@lru_cache(maxsize=None)
+def get_history_store():
+    return HistoryStore()
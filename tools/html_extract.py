@@ -0,0 +1,336 @@
+import codecs
+import os
+import re
+from html.parser import HTMLParser
+
+MAX_HTML_BYTES = int(os.getenv("LLM_TOOLS_MAX_HTML_KB", "2048")) * 1024
+FEED_CHUNK = 64 * 1024
+# Blocks shorter than this do not contribute to their container's score.
+MIN_SCORED_CHARS = 25
+# Blocks with a higher share of link text are navigation, not content.
+MAX_BLOCK_LINK_DENSITY = 0.5
+
+SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "math", "canvas", "iframe", "object", "nav", "footer",
+    "header", "aside", "form", "button", "select", "textarea",
+}
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr",
+}
+BLOCK_TAGS = {
+    "address", "article", "blockquote", "body", "br", "dd", "div", "dl", "dt", "figcaption", "figure", "h1", "h2",
+    "h3", "h4", "h5", "h6", "hr", "li", "main", "ol", "p", "pre", "section", "table", "td", "th", "tr", "ul",
+}
+# Starting scores by tag, as in Readability: divs usually hold content, lists and headings rarely do.
+TAG_SCORES = {
+    "div": 5, "article": 10, "main": 10, "section": 3, "pre": 3, "td": 3, "blockquote": 3,
+    "address": -3, "ol": -3, "ul": -3, "dl": -3, "dd": -3, "dt": -3, "li": -3,
+    "h1": -5, "h2": -5, "h3": -5, "h4": -5, "h5": -5, "h6": -5, "th": -5,
+}
+POSITIVE_NAMES = re.compile(r"article|body|content|entry|main|page|post|text|blog|story", re.I)
+NEGATIVE_NAMES = re.compile(
+    r"comment|footer|footnote|sidebar|widget|sponsor|promo|related|share|social|advert|banner|"
+    r"breadcrumb|menu|nav|popup|cookie|subscribe|newsletter|masthead|\bads?\b",
+    re.I,
+)
+CHARSET_PATTERN = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w.:-]+)""", re.I)
+
+
+class TextBlock:
+    """A paragraph-level run of text from the page, in document order."""
+
+    def __init__(self, text, tag, link_density):
+        self.text = text
+        self.tag = tag
+        self.link_density = link_density
+
+
+class Extraction:
+    def __init__(self, title, blocks, truncated=False):
+        self.title = title
+        self.blocks = blocks
+        self.truncated = truncated
+
+    @property
+    def text(self):
+        return "\n".join(block.text for block in self.blocks)
+
+
+class _Node:
+    __slots__ = ("tag", "parent", "score", "scored", "text_len", "link_len")
+
+    def __init__(self, tag, parent, score):
+        self.tag = tag
+        self.parent = parent
+        self.score = score
+        self.scored = False
+        self.text_len = 0
+        self.link_len = 0
+
+    def final_score(self):
+        link_density = self.link_len / self.text_len if self.text_len else 0.0
+        return self.score * (1.0 - link_density)
+
+
+def _name_weight(attrs):
+    weight = 0
+    for name in ("class", "id"):
+        value = attrs.get(name)
+        if value:
+            if NEGATIVE_NAMES.search(value):
+                weight -= 25
+            if POSITIVE_NAMES.search(value):
+                weight += 25
+    return weight
+
+
+class _Collector:
+    """
+    Parser target that builds text blocks and scores their containers in one pass
+    over the start/end/data events, without keeping a document tree. Implements the
+    lxml parser-target interface; the stdlib backend forwards the same events.
+    """
+
+    def __init__(self):
+        self.root = _Node("#document", None, 0)
+        self.stack = [self.root]
+        self.candidates = []
+        self.blocks = []
+        self.title_parts = None
+        self.in_title = False
+        self.skip_tag = None
+        self.skip_depth = 0
+        self.link_depth = 0
+        self.buffer = []
+        self.buffer_links = 0
+
+    def start(self, tag, attrs):
+        tag = tag.lower()
+        if self.skip_tag:
+            if tag == self.skip_tag:
+                self.skip_depth += 1
+            return
+        if tag == "title" and self.title_parts is None:
+            self.title_parts = []
+            self.in_title = True
+            return
+        if tag in SKIP_TAGS:
+            self.skip_tag, self.skip_depth = tag, 1
+            return
+        if tag in BLOCK_TAGS:
+            self._flush()
+        if tag in VOID_TAGS:
+            return
+        if tag == "a":
+            self.link_depth += 1
+        node = _Node(tag, self.stack[-1], TAG_SCORES.get(tag, 0) + _name_weight(attrs))
+        self.stack.append(node)
+
+    def end(self, tag):
+        tag = tag.lower()
+        if self.skip_tag:
+            if tag == self.skip_tag:
+                self.skip_depth -= 1
+                if not self.skip_depth:
+                    self.skip_tag = None
+            return
+        if tag == "title":
+            self.in_title = False
+            return
+        if tag in VOID_TAGS or not any(node.tag == tag for node in self.stack[1:]):
+            return
+        if tag in BLOCK_TAGS:
+            self._flush()
+        while True:
+            node = self._pop()
+            if node.tag == tag:
+                break
+
+    def data(self, text):
+        if self.in_title:
+            self.title_parts.append(text)
+        elif not self.skip_tag:
+            self.buffer.append(text)
+            if self.link_depth:
+                self.buffer_links += len(text.strip())
+
+    def close(self):
+        self._flush()
+        while len(self.stack) > 1:
+            self._pop()
+        return self
+
+    def _pop(self):
+        node = self.stack.pop()
+        if node.tag == "a":
+            self.link_depth -= 1
+        parent = node.parent
+        parent.text_len += node.text_len
+        parent.link_len += node.link_len
+        if node.scored:
+            self.candidates.append(node)
+        return node
+
+    def _flush(self):
+        if not self.buffer:
+            return
+        text = " ".join("".join(self.buffer).split())
+        links = min(self.buffer_links, len(text))
+        self.buffer = []
+        self.buffer_links = 0
+        if not text:
+            return
+        node = self.stack[-1]
+        node.text_len += len(text)
+        node.link_len += links
+        self.blocks.append((text, node, links / len(text)))
+        # Readability: a paragraph scores its parent fully and its grandparent by half.
+        if len(text) >= MIN_SCORED_CHARS and node.parent is not None:
+            score = 1 + text.count(",") + min(len(text) // 100, 3)
+            node.parent.score += score
+            node.parent.scored = True
+            if node.parent.parent is not None:
+                node.parent.parent.score += score / 2
+                node.parent.parent.scored = True
+
+
+def _select_blocks(collector):
+    candidates = [node for node in collector.candidates if node.score > 0]
+    blocks = [
+        TextBlock(text, node.tag, link_density)
+        for text, node, link_density in collector.blocks
+        if link_density <= MAX_BLOCK_LINK_DENSITY
+    ]
+    if not candidates:
+        return blocks
+
+    top = max(candidates, key=_Node.final_score)
+    threshold = max(10.0, top.final_score() * 0.2)
+    selected = {top}
+    selected.update(
+        node for node in candidates
+        if node.parent is top.parent and node is not top and node.final_score() >= threshold
+    )
+
+    kept = []
+    for text, node, link_density in collector.blocks:
+        if link_density > MAX_BLOCK_LINK_DENSITY:
+            continue
+        ancestor = node
+        while ancestor is not None and ancestor not in selected:
+            ancestor = ancestor.parent
+        if ancestor is not None:
+            kept.append(TextBlock(text, node.tag, link_density))
+    return kept or blocks
+
+
+def _sniff_encoding(head):
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    match = CHARSET_PATTERN.search(head)
+    if match:
+        try:
+            return codecs.lookup(match.group(1).decode("ascii")).name
+        except (LookupError, UnicodeDecodeError):
+            pass
+    return "utf-8"
+
+
+def _text_chunks(html, max_bytes):
+    """Yields the page as decoded text chunks, stopping after `max_bytes` bytes."""
+    if isinstance(html, str):
+        for start in range(0, min(len(html), max_bytes), FEED_CHUNK):
+            yield html[start:min(start + FEED_CHUNK, max_bytes)]
+        return
+    decoder = codecs.getincrementaldecoder(_sniff_encoding(html[:4096]))(errors="replace")
+    limit = min(len(html), max_bytes)
+    for start in range(0, limit, FEED_CHUNK):
+        yield decoder.decode(html[start:min(start + FEED_CHUNK, limit)])
+    yield decoder.decode(b"", final=True)
+
+
+def _parse_with_lxml(collector, chunks):
+    from lxml import etree
+
+    parser = etree.HTMLParser(target=collector, remove_comments=True, remove_pis=True)
+    for chunk in chunks:
+        if chunk:
+            parser.feed(chunk)
+    try:
+        parser.close()
+    except etree.LxmlError:
+        # Raised for an empty document; the collector holds whatever was parsed.
+        collector.close()
+
+
+class _StdlibParser(HTMLParser):
+    def __init__(self, target):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, {name: value or "" for name, value in attrs})
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+
+def _parse_with_stdlib(collector, chunks):
+    parser = _StdlibParser(collector)
+    for chunk in chunks:
+        parser.feed(chunk)
+    parser.close()
+    collector.close()
+
+
+ENGINES = {
+    "lxml": _parse_with_lxml,
+    "html.parser": _parse_with_stdlib,
+}
+
+
+def available_engines():
+    engines = ["html.parser"]
+    try:
+        import lxml.etree  # noqa: F401
+        engines.insert(0, "lxml")
+    except ImportError:
+        pass
+    return engines
+
+
+def default_engine():
+    """The engine set in `LLM_TOOLS_HTML_ENGINE`, else lxml when it is installed."""
+    configured = os.getenv("LLM_TOOLS_HTML_ENGINE")
+    if configured in ENGINES:
+        return configured
+    return available_engines()[0]
+
+
+def extract_html(html, engine=None, max_bytes=MAX_HTML_BYTES):
+    """
+    Extracts the title and main content of an HTML page.
+
+    The page is fed to the parser incrementally and parsing stops after `max_bytes`,
+    so huge pages cost no more than the limit. A single pass over the parser events
+    collects paragraph-level text blocks and scores each container Readability-style
+    (text length and commas of its paragraphs, tag, class/id hints, link density);
+    the best container and its high-scoring siblings are kept.
+
+    Args:
+        html (bytes | str): The page.
+        engine (str, optional): "lxml" or "html.parser"; defaults to `default_engine()`.
+        max_bytes (int): Maximum number of bytes (characters for `str`) to parse.
+
+    Returns:
+        Extraction: The title (None if missing) and the content blocks in document order.
+    """
+    collector = _Collector()
+    ENGINES[engine or default_engine()](collector, _text_chunks(html, max_bytes))
+    title = " ".join("".join(collector.title_parts or []).split()) or None
+    return Extraction(title, _select_blocks(collector), truncated=len(html) > max_bytes)
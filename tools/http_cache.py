@@ -0,0 +1,214 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+
+from .settings import CACHE_DIR
+
+PAGE_MAX_ENTRIES = int(os.getenv("LLM_TOOLS_HTTP_CACHE_ENTRIES", "2000"))
+SUMMARY_MAX_ENTRIES = int(os.getenv("LLM_TOOLS_SUMMARY_CACHE_ENTRIES", "20000"))
+
+
+def parse_cache_control(value):
+    """Parses a Cache-Control header into a dict of lower-cased directives (valueless ones map to True)."""
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip().strip('"') or True
+    return directives
+
+
+def freshness_lifetime(headers, now=None):
+    """
+    Returns the absolute time until which a response may be reused without
+    revalidation, from `Cache-Control: max-age` or else `Expires`. Responses that
+    carry neither, or `no-cache`, are stale immediately and are always revalidated.
+    """
+    now = time.time() if now is None else now
+    directives = parse_cache_control(headers.get("Cache-Control"))
+    if "no-cache" in directives:
+        return now
+    max_age = directives.get("max-age")
+    if max_age not in (None, True):
+        try:
+            return now + max(int(max_age), 0)
+        except ValueError:
+            return now
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            return parsedate_to_datetime(expires).timestamp()
+        except (TypeError, ValueError):
+            return now
+    return now
+
+
+def is_storable(headers):
+    return "no-store" not in parse_cache_control(headers.get("Cache-Control"))
+
+
+def text_hash(title, text):
+    """Hash of a page's extracted title and text; summaries are keyed by it."""
+    digest = hashlib.sha256()
+    digest.update((title or "").encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class CachedPage:
+    def __init__(self, url, etag, last_modified, expires_at, body, extractor, title, text):
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+        self.body = body
+        self.extractor = extractor
+        self.title = title
+        self.text = text
+
+    @property
+    def fresh(self):
+        return self.expires_at > time.time()
+
+    def validators(self):
+        """Headers for a conditional GET that revalidates this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """
+    On-disk cache of fetched web pages and of the summaries made from them.
+
+    Pages are keyed by URL and hold the compressed body, its validators (ETag and
+    Last-Modified), its freshness lifetime and the text extracted from it, tagged
+    with the extractor that produced it. Summaries are keyed by the hash of the
+    extracted text, so an unchanged page maps to the same summary whatever its URL.
+    Both tables are bounded by row count and evict least-recently-used rows.
+    """
+
+    def __init__(self, path, page_max_entries=PAGE_MAX_ENTRIES, summary_max_entries=SUMMARY_MAX_ENTRIES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.page_max_entries = page_max_entries
+        self.summary_max_entries = summary_max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, expires_at REAL NOT NULL, body BLOB NOT NULL, "
+            "extractor TEXT, title TEXT, text TEXT, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            "key TEXT PRIMARY KEY, summary TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries (last_used)")
+        self._conn.commit()
+
+    def lookup(self, url):
+        """Returns the cached page for `url`, fresh or stale, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, expires_at, body, extractor, title, text FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE pages SET last_used = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+        etag, last_modified, expires_at, body, extractor, title, text = row
+        return CachedPage(url, etag, last_modified, expires_at, zlib.decompress(body), extractor, title, text)
+
+    def store(self, url, response):
+        """
+        Stores a 200 response's body and validators, dropping any text extracted from
+        an earlier version. Responses marked `no-store` are not kept.
+        """
+        if not is_storable(response.headers):
+            with self._lock:
+                self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+                self._conn.commit()
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, NULL, NULL, NULL, ?)",
+                (
+                    url,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    freshness_lifetime(response.headers, now),
+                    zlib.compress(response.content),
+                    now,
+                ),
+            )
+            self._evict("pages", "url", self.page_max_entries)
+            self._conn.commit()
+
+    def refresh(self, url, response):
+        """Updates a cached page's freshness and validators after a 304 Not Modified."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET expires_at = ?, etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified), last_used = ? WHERE url = ?",
+                (
+                    freshness_lifetime(response.headers),
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    time.time(),
+                    url,
+                ),
+            )
+            self._conn.commit()
+
+    def store_text(self, url, extractor, title, text):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET extractor = ?, title = ?, text = ? WHERE url = ?", (extractor, title, text, url)
+            )
+            self._conn.commit()
+
+    def get_summary(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+        return row[0] if row else None
+
+    def put_summary(self, key, summary):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO summaries VALUES (?, ?, ?)", (key, summary, time.time()))
+            self._evict("summaries", "key", self.summary_max_entries)
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+            self._conn.execute("DELETE FROM summaries")
+            self._conn.commit()
+
+    def _evict(self, table, key_column, max_entries):
+        excess = self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] - max_entries
+        if excess > 0:
+            self._conn.execute(
+                f"DELETE FROM {table} WHERE {key_column} IN "
+                f"(SELECT {key_column} FROM {table} ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+
+
+@lru_cache(maxsize=None)
+def get_http_cache():
+    return HttpCache(os.path.join(CACHE_DIR, "http.sqlite3"))
@@ -0,0 +1,136 @@
+"""
+A small async HTTP service for the tools, for callers that cannot import Python.
+
+    POST /v1/{task}    JSON object of the task's arguments -> {"task", "result", "elapsed"}
+    POST /v1/document  (non-JSON body) the document itself, with `filename` and the
+                       other arguments as query parameters
+    GET  /healthz      readiness probe
+    GET  /metrics      latency, token and cache metrics in Prometheus text format
+
+Requests run in worker threads, at most `LLM_TOOLS_API_CONCURRENCY` at a time, so the
+event loop keeps accepting connections while models are called. Errors come back as
+{"error": ...} with 400 (bad request), 404 (unknown task), 413 (upload too large),
+422 (the tool could not handle the input) or 500.
+
+    python -m tools.http_service [--host HOST] [--port PORT]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from . import metrics
+from .api import DOCUMENT_EXTENSIONS, TASKS, ToolError, check_arguments, parse_text_argument, run_task
+
+MAX_CONCURRENCY = int(os.getenv("LLM_TOOLS_API_CONCURRENCY", "16"))
+MAX_UPLOAD_BYTES = int(os.getenv("LLM_TOOLS_API_MAX_UPLOAD_MB", "50")) * 1024 * 1024
+
+_slots = asyncio.Semaphore(MAX_CONCURRENCY)
+_metrics = metrics.get_registry()
+
+
+def _error(status, message):
+    return JSONResponse({"error": message}, status_code=status)
+
+
+async def _upload_to_file(request):
+    """Spools an uploaded document to a temporary file and returns its path."""
+    filename = request.query_params.get("filename", "")
+    suffix = os.path.splitext(filename)[1].lower()
+    if suffix not in DOCUMENT_EXTENSIONS:
+        raise ValueError(f"Pass the document's `filename` ending in {' or '.join(DOCUMENT_EXTENSIONS)}.")
+    size = 0
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as spool:
+        try:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise OverflowError(f"Uploads are limited to {MAX_UPLOAD_BYTES // (1024 * 1024)} MB.")
+                spool.write(chunk)
+        except BaseException:
+            spool.close()
+            os.remove(spool.name)
+            raise
+    return spool.name
+
+
+async def run_tool(request):
+    task = request.path_params["task"]
+    if task not in TASKS:
+        return _error(404, f"Unknown task '{task}'. Choose from: {', '.join(TASKS)}.")
+
+    upload = None
+    try:
+        try:
+            if request.headers.get("content-type", "").startswith("application/json"):
+                if task == "document":
+                    raise ValueError("Send the document itself as the body, with `filename` as a query parameter.")
+                arguments = await request.json()
+                if not isinstance(arguments, dict):
+                    raise ValueError("The request body must be a JSON object of arguments.")
+            elif task == "document":
+                arguments = {
+                    key: parse_text_argument(value)
+                    for key, value in request.query_params.items() if key != "filename"
+                }
+            else:
+                raise ValueError("Send the arguments as a JSON object (Content-Type: application/json).")
+            # Callers send code and documents as content; they never name files on the server.
+            if "path" in arguments:
+                raise ValueError("`path` is not accepted over HTTP. Send code as `code`, or upload the document.")
+            if task == "document":
+                upload = arguments["path"] = await _upload_to_file(request)
+            check_arguments(task, arguments)
+        except OverflowError as e:
+            return _error(413, str(e))
+        except ValueError as e:
+            return _error(400, str(e))
+
+        started = time.perf_counter()
+        try:
+            async with _slots:
+                result = await asyncio.to_thread(run_task, task, arguments)
+        except ToolError as e:
+            return _error(422, str(e))
+        except Exception as e:
+            return _error(500, f"{type(e).__name__}: {e}")
+        finally:
+            _metrics.observe("request_seconds", time.perf_counter() - started, task=task)
+    finally:
+        if upload is not None:
+            os.unlink(upload)
+    return JSONResponse({"task": task, "result": result, "elapsed": round(time.perf_counter() - started, 3)})
+
+
+async def health(request):
+    return JSONResponse({"status": "ok", "tasks": sorted(TASKS)})
+
+
+async def export_metrics(request):
+    return PlainTextResponse(_metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+app = Starlette(routes=[
+    Route("/v1/{task}", run_tool, methods=["POST"]),
+    Route("/healthz", health, methods=["GET"]),
+    Route("/metrics", export_metrics, methods=["GET"]),
+])
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,510 @@
+import asyncio
+import contextvars
+import hashlib
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from functools import lru_cache
+
+from . import llm_scheduler, response_cache
+from .tokens import count_tokens
+
+DEFAULT_MODEL = "gemini-2.0-flash"
+EMBEDDING_MODEL = "models/embedding-001"
+# Output tokens charged against the tokens-per-minute budget when a call does not set
+# `max_output_tokens`.
+DEFAULT_OUTPUT_TOKENS = 1024
+
+
+class LLMConfigurationError(Exception):
+    """Raised when the selected backend cannot be configured (e.g. no API key)."""
+
+
+class FakeQuotaError(Exception):
+    """The fake backend's simulated "429 Resource exhausted"."""
+
+    code = 429
+
+
+def _freeze(value):
+    """Turns a generation config or safety settings value into a hashable cache key."""
+    if value is None:
+        return None
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+class LLMBackend:
+    """
+    Interface every LLM backend implements. `generate` returns the response text, or
+    an iterator of text chunks when `stream` is True.
+    """
+
+    name = "base"
+
+    def api_key_missing(self):
+        return False
+
+    def generate(self, prompt, model_name, generation_config=None, safety_settings=None, stream=False):
+        raise NotImplementedError
+
+    def start_chat(self, history, model_name, generation_config=None, safety_settings=None):
+        raise NotImplementedError
+
+    def embeddings(self, model_name):
+        raise NotImplementedError
+
+
+class GeminiBackend(LLMBackend):
+    """
+    Google Gemini backend. `genai.configure` is called once per process: every call
+    to it drops the cached API clients, so calling it on each Streamlit rerun opened
+    a new connection for every request. Model handles are cached per
+    (model name, generation config, safety settings) and share that one client.
+    """
+
+    name = "gemini"
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key or os.getenv("GEMINI_API_KEY")
+        self._configure_lock = threading.Lock()
+        self._configured = False
+
+    def api_key_missing(self):
+        return not self.api_key
+
+    def _configure(self):
+        if self._configured:
+            return
+        with self._configure_lock:
+            if self._configured:
+                return
+            if not self.api_key:
+                raise LLMConfigurationError("GEMINI_API_KEY environment variable not set.")
+            import google.generativeai as genai
+
+            genai.configure(api_key=self.api_key)
+            os.environ.setdefault('GOOGLE_API_KEY', self.api_key)
+            self._configured = True
+
+    @lru_cache(maxsize=64)
+    def _model(self, model_name, generation_config_key, safety_settings_key):
+        self._configure()
+        import google.generativeai as genai
+
+        return genai.GenerativeModel(
+            model_name=model_name,
+            generation_config=json.loads(generation_config_key) if generation_config_key else None,
+            safety_settings=json.loads(safety_settings_key) if safety_settings_key else None,
+        )
+
+    def model(self, model_name, generation_config=None, safety_settings=None):
+        return self._model(model_name, _freeze(generation_config), _freeze(safety_settings))
+
+    def generate(self, prompt, model_name, generation_config=None, safety_settings=None, stream=False):
+        model = self.model(model_name, generation_config, safety_settings)
+        if stream:
+            return (chunk.text for chunk in model.generate_content(prompt, stream=True))
+        return model.generate_content(prompt).text
+
+    def start_chat(self, history, model_name, generation_config=None, safety_settings=None):
+        return GeminiChatSession(self.model(model_name, generation_config, safety_settings).start_chat(history=history))
+
+    @lru_cache(maxsize=8)
+    def embeddings(self, model_name):
+        self._configure()
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+        return GoogleGenerativeAIEmbeddings(model=model_name, google_api_key=self.api_key)
+
+
+class GeminiChatSession:
+    def __init__(self, session):
+        self._session = session
+
+    def send_message(self, text, stream=False):
+        if stream:
+            return (chunk.text for chunk in self._session.send_message(text, stream=True))
+        return self._session.send_message(text).text
+
+
+class FakeBackend(LLMBackend):
+    """
+    Deterministic offline backend for load tests and benchmarks. The same prompt and
+    model always produce the same text, built from the prompt's own words.
+    `latency` simulates time to first token and `token_latency` the time per
+    streamed word; `failure_rate` is the share of calls that fail with a 429.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency=0.0, token_latency=0.0, response_words=80, failure_rate=0.0):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.response_words = response_words
+        self.failure_rate = failure_rate
+
+    def _check_quota(self):
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise FakeQuotaError("429 Resource has been exhausted (simulated).")
+
+    def _response(self, prompt, model_name, generation_config=None):
+        if not isinstance(prompt, str):
+            prompt = "\n".join(str(part) for part in prompt)
+        digest = hashlib.sha256(f"{model_name}\0{prompt}".encode("utf-8")).hexdigest()
+        rng = random.Random(digest)
+        vocabulary = [word for word in prompt.split() if word.isalpha()] or ["lorem", "ipsum", "dolor"]
+
+        def text(word_count):
+            return " ".join(rng.choice(vocabulary) for _ in range(word_count))
+
+        schema = (generation_config or {}).get("response_schema")
+        if isinstance(schema, dict) and schema.get("properties"):
+            fields = list(schema["properties"])
+            per_field = max(self.response_words // len(fields), 1)
+            return json.dumps({field: text(per_field) for field in fields})
+        return f"Fake response {digest[:12]}.\n\n" + text(self.response_words)
+
+    def _stream(self, text):
+        time.sleep(self.latency)
+        pieces = text.split(" ")
+        for i, piece in enumerate(pieces):
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            yield piece if i == len(pieces) - 1 else piece + " "
+
+    def generate(self, prompt, model_name, generation_config=None, safety_settings=None, stream=False):
+        self._check_quota()
+        text = self._response(prompt, model_name, generation_config)
+        if stream:
+            return self._stream(text)
+        time.sleep(self.latency + self.token_latency * self.response_words)
+        return text
+
+    def start_chat(self, history, model_name, generation_config=None, safety_settings=None):
+        return FakeChatSession(self, model_name, history)
+
+    def embeddings(self, model_name):
+        return FakeEmbeddings()
+
+
+class FakeChatSession:
+    def __init__(self, backend, model_name, history):
+        self.backend = backend
+        self.model_name = model_name
+        self.history = list(history or [])
+
+    def send_message(self, text, stream=False):
+        self.backend._check_quota()
+        self.history.append({"role": "user", "parts": [text]})
+        reply = self.backend._response(f"{len(self.history)}\n{text}", self.model_name)
+        self.history.append({"role": "model", "parts": [reply]})
+        if stream:
+            return self.backend._stream(reply)
+        return reply
+
+
+class FakeEmbeddings:
+    """Deterministic hash-based embeddings with the LangChain `Embeddings` interface."""
+
+    def __init__(self, size=64):
+        self.size = size
+
+    def _embed(self, text):
+        vector = [0.0] * self.size
+        for word in text.lower().split():
+            digest = hashlib.md5(word.encode("utf-8")).digest()
+            vector[digest[0] % self.size] += 1.0 if digest[1] & 1 else -1.0
+        norm = sum(value * value for value in vector) ** 0.5 or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+_listeners = []
+
+
+def _backend_from_env():
+    name = os.getenv("LLM_TOOLS_BACKEND", "gemini").lower()
+    if name == "fake":
+        return FakeBackend(
+            latency=float(os.getenv("LLM_TOOLS_FAKE_LATENCY", "0")),
+            token_latency=float(os.getenv("LLM_TOOLS_FAKE_TOKEN_LATENCY", "0")),
+            failure_rate=float(os.getenv("LLM_TOOLS_FAKE_FAILURE_RATE", "0")),
+        )
+    if name == "gemini":
+        return GeminiBackend()
+    raise LLMConfigurationError(f"Unknown LLM backend '{name}'. Use 'gemini' or 'fake'.")
+
+
+def get_backend():
+    """Returns the process-wide backend, selected by `LLM_TOOLS_BACKEND` on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _backend_from_env()
+    return _backend
+
+
+def set_backend(backend):
+    """Replaces the process-wide backend, e.g. with a `FakeBackend` for benchmarks."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def api_key_missing():
+    return get_backend().api_key_missing()
+
+
+def add_listener(listener):
+    """
+    Registers `listener(event)` to be called after every LLM call. `event` is a dict with
+    the tool, model, backend, elapsed seconds, streaming flag, whether the response came
+    from the response cache, whether the call could have (`cacheable`), the error (or
+    None), the seconds spent queued in the scheduler, the time to first token (when
+    streaming) and the prompt and completion token counts.
+    """
+    _listeners.append(listener)
+
+
+def _notify(tool, model, started, stream, error, cached=False, cacheable=False, queued=0.0, ttft=None,
+            prompt_tokens=0, completion=None):
+    if not _listeners:
+        return
+    event = {
+        "tool": tool,
+        "model": model,
+        "backend": get_backend().name,
+        "elapsed": time.perf_counter() - started,
+        "stream": stream,
+        "cached": cached,
+        "cacheable": cacheable,
+        "error": error,
+        "queued": queued,
+        "ttft": ttft,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": count_tokens(completion) if completion else 0,
+    }
+    for listener in _listeners:
+        listener(event)
+
+
+class _CallTiming:
+    """Records when a scheduled call first started running, i.e. how long it was queued."""
+
+    def __init__(self, started, call):
+        self.started = started
+        self.call = call
+        self.queued = None
+
+    def __call__(self):
+        if self.queued is None:
+            self.queued = time.perf_counter() - self.started
+        return self.call()
+
+    def queued_seconds(self):
+        return self.queued if self.queued is not None else time.perf_counter() - self.started
+
+
+def _instrumented_stream(chunks, tool, model, started, on_complete=None, **stats):
+    parts = []
+    try:
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+    except Exception as e:
+        _notify(tool, model, started, True, e, completion="".join(parts), **stats)
+        raise
+    text = "".join(parts)
+    if on_complete:
+        on_complete(text)
+    _notify(tool, model, started, True, None, completion=text, **stats)
+
+
+def _prompt_tokens(prompt):
+    if not isinstance(prompt, str):
+        prompt = "\n".join(str(part) for part in prompt)
+    return count_tokens(prompt)
+
+
+def _output_budget(generation_config=None):
+    return (generation_config or {}).get("max_output_tokens", DEFAULT_OUTPUT_TOKENS)
+
+
+def _start_stream(chunks):
+    """
+    Starts a stream and waits for its first chunk, so that errors the API reports
+    lazily (such as a 429) surface inside the scheduled, retried call.
+    """
+    chunks = iter(chunks)
+    for first in chunks:
+        return itertools.chain([first], chunks)
+    return iter(())
+
+
+def generate(prompt, model=DEFAULT_MODEL, generation_config=None, safety_settings=None, stream=False, tool=None,
+             cache=True, timeout=None):
+    """
+    Sends a prompt through the process-wide backend.
+
+    Responses of tools listed in `response_cache.TOOL_TTLS` are served from and stored
+    in the response cache, unless `cache` is False or the temperature is high. Every
+    other call goes through the `llm_scheduler` queue, which enforces the process's
+    rate limits, runs it by its tool's priority and retries transient API errors;
+    identical non-streaming calls in flight at the same time share one request.
+
+    Args:
+        prompt (str | list): The prompt, or a list of prompt parts.
+        model (str): Model name.
+        generation_config (dict, optional): Generation parameters such as temperature.
+        safety_settings (list[dict], optional): Safety settings.
+        stream (bool): Whether to return the response as an iterator of text chunks.
+        tool (str, optional): Name of the calling tool, for instrumentation and caching.
+        cache (bool): Whether the response cache may be used for this call.
+        timeout (float, optional): Seconds the call may take, queueing and retries
+            included; defaults to `llm_scheduler.REQUEST_DEADLINE`.
+
+    Returns:
+        str | Iterator[str]: The response text, or its chunks when streaming.
+
+    Raises:
+        llm_scheduler.DeadlineExceeded: If the call could not finish in time.
+    """
+    started = time.perf_counter()
+    ttl = response_cache.ttl_for(tool, generation_config) if cache else None
+    store = None
+    if ttl:
+        key = response_cache.cache_key(prompt, f"{get_backend().name}/{model}", generation_config, safety_settings)
+        cached = response_cache.get_response_cache().get(key)
+        if cached is not None:
+            _notify(tool, model, started, stream, None, cached=True, cacheable=True)
+            return iter([cached]) if stream else cached
+
+        def store(text):
+            response_cache.get_response_cache().put(key, text, ttl)
+
+    backend = get_backend()
+    if stream:
+        def call():
+            return _start_stream(backend.generate(prompt, model, generation_config, safety_settings, stream=True))
+        dedup_key = None
+    else:
+        def call():
+            return backend.generate(prompt, model, generation_config, safety_settings)
+        temperature = (generation_config or {}).get("temperature")
+        deterministic = temperature is None or temperature <= response_cache.MAX_CACHEABLE_TEMPERATURE
+        dedup_key = response_cache.cache_key(prompt, f"{backend.name}/{model}", generation_config, safety_settings) \
+            if deterministic else None
+    prompt_tokens = _prompt_tokens(prompt)
+    return _run_scheduled(
+        call, tool, model, started, stream, prompt_tokens, prompt_tokens + _output_budget(generation_config), timeout,
+        key=dedup_key, cacheable=bool(ttl), on_complete=store,
+    )
+
+
+def _run_scheduled(call, tool, model, started, stream, prompt_tokens, tokens, timeout, key=None, cacheable=False,
+                   on_complete=None):
+    """
+    Runs `call` through the scheduler and reports it to the listeners, once the
+    response (or the whole stream) has arrived. A call that shares another caller's
+    execution counts as queued until that one finishes.
+    """
+    timing = _CallTiming(started, call)
+    try:
+        result = llm_scheduler.get_scheduler().run(
+            timing,
+            tokens=tokens,
+            priority=llm_scheduler.priority_for(tool),
+            timeout=timeout or llm_scheduler.REQUEST_DEADLINE,
+            key=key,
+        )
+    except Exception as e:
+        _notify(tool, model, started, stream, e, cacheable=cacheable, queued=timing.queued_seconds())
+        raise
+    stats = {"cacheable": cacheable, "queued": timing.queued_seconds(), "prompt_tokens": prompt_tokens}
+    if stream:
+        # The scheduled call already waited for the first chunk.
+        ttft = time.perf_counter() - started
+        return _instrumented_stream(result, tool, model, started, on_complete, ttft=ttft, **stats)
+    if on_complete:
+        on_complete(result)
+    _notify(tool, model, started, stream, None, completion=result, **stats)
+    return result
+
+
+async def astream(prompt, **kwargs):
+    """
+    Async version of `generate(prompt, stream=True, **kwargs)`. The blocking stream is
+    consumed in a worker thread and its chunks are yielded on the calling event loop,
+    so several streams can be awaited concurrently.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    done = object()
+
+    def produce():
+        try:
+            for chunk in generate(prompt, stream=True, **kwargs):
+                loop.call_soon_threadsafe(queue.put_nowait, chunk)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    producer = loop.run_in_executor(None, contextvars.copy_context().run, produce)
+    while True:
+        item = await queue.get()
+        if item is done:
+            break
+        if isinstance(item, Exception):
+            raise item
+        yield item
+    await producer
+
+
+class ScheduledChatSession:
+    """Sends a chat session's messages through the `llm_scheduler` queue."""
+
+    def __init__(self, session, tool, history_tokens=0, generation_config=None, model=DEFAULT_MODEL):
+        self._session = session
+        self.tool = tool
+        self.history_tokens = history_tokens
+        self.generation_config = generation_config
+        self.model = model
+
+    def send_message(self, text, stream=False, timeout=None):
+        started = time.perf_counter()
+        if stream:
+            def call():
+                return _start_stream(self._session.send_message(text, stream=True))
+        else:
+            def call():
+                return self._session.send_message(text)
+        # The history is sent again with every message.
+        prompt_tokens = self.history_tokens + _prompt_tokens(text)
+        return _run_scheduled(
+            call, self.tool, self.model, started, stream, prompt_tokens,
+            prompt_tokens + _output_budget(self.generation_config), timeout,
+        )
+
+
+def start_chat(history, model=DEFAULT_MODEL, generation_config=None, safety_settings=None, tool="assistant"):
+    """Starts a multi-turn chat session whose `send_message(text, stream=False)` returns text."""
+    session = get_backend().start_chat(history, model, generation_config, safety_settings)
+    history_tokens = sum(count_tokens(str(part)) for message in history or () for part in message["parts"])
+    return ScheduledChatSession(session, tool, history_tokens, generation_config, model)
+
+
+def get_embeddings(model=EMBEDDING_MODEL):
+    """Returns the backend's LangChain-compatible embeddings model."""
+    return get_backend().embeddings(model)
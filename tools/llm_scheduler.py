@@ -0,0 +1,277 @@
+import asyncio
+import atexit
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from functools import lru_cache
+
+# Budgets shared by every LLM call in the process; 0 disables a limit.
+REQUESTS_PER_MINUTE = int(os.getenv("LLM_TOOLS_LLM_RPM", "1000"))
+TOKENS_PER_MINUTE = int(os.getenv("LLM_TOOLS_LLM_TPM", "1000000"))
+MAX_IN_FLIGHT = int(os.getenv("LLM_TOOLS_LLM_MAX_IN_FLIGHT", "32"))
+# Seconds a call may spend queued, running and retrying before it fails.
+REQUEST_DEADLINE = float(os.getenv("LLM_TOOLS_LLM_DEADLINE", "180"))
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+RETRY_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Lower runs first. Chat replies beat tool buttons, which beat background summaries
+# and batch jobs.
+INTERACTIVE = 0
+DEFAULT = 1
+BACKGROUND = 2
+BULK = 3
+TOOL_PRIORITIES = {
+    "assistant": INTERACTIVE,
+    "chat_memory": BACKGROUND,
+}
+
+_priority_override = contextvars.ContextVar("llm_priority", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when an LLM call could not finish before its deadline."""
+
+
+@contextmanager
+def priority(level):
+    """Runs the LLM calls made inside the block (in this thread or task) at `level`."""
+    token = _priority_override.set(level)
+    try:
+        yield
+    finally:
+        _priority_override.reset(token)
+
+
+def priority_for(tool):
+    override = _priority_override.get()
+    return override if override is not None else TOOL_PRIORITIES.get(tool, DEFAULT)
+
+
+def status_code(error):
+    """The HTTP status of an API error, from google-api-core, requests or a backend's own errors."""
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code
+    code = getattr(error, "status_code", None)
+    if isinstance(code, int):
+        return code
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def is_retryable(error):
+    return status_code(error) in RETRY_STATUS_CODES or isinstance(error, (ConnectionError, TimeoutError))
+
+
+class TokenBucket:
+    """A per-minute budget that refills continuously; a limit of 0 never blocks."""
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` is available; amounts over the capacity wait for a full bucket."""
+        if not self.capacity:
+            return 0.0
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(missing, 0.0) / self.rate
+
+    def take(self, amount, now):
+        if self.capacity:
+            self._refill(now)
+            self.level -= min(amount, self.capacity)
+
+
+class _Request:
+    __slots__ = ("priority", "seq", "call", "tokens", "deadline", "future", "attempts")
+
+    def __init__(self, priority, seq, call, tokens, deadline):
+        self.priority = priority
+        self.seq = seq
+        self.call = call
+        self.tokens = tokens
+        self.deadline = deadline
+        self.future = Future()
+        self.attempts = 0
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class LLMScheduler:
+    """
+    Admits every LLM call in the process through one priority queue.
+
+    The scheduler owns an event loop in a daemon thread. Callers on any thread submit a
+    blocking `call` with its estimated token cost and priority; the loop starts the
+    highest-priority waiting call as soon as the requests- and tokens-per-minute
+    buckets and the in-flight limit allow, and runs it in a worker thread. Calls that
+    fail with 429, 5xx or a connection error are requeued after a full-jitter
+    exponential backoff, keeping their place in line; a 429 also pauses all admissions
+    for that delay, so a saturated quota makes callers queue instead of failing
+    together. Identical in-flight calls (same `key`) share one execution, and a call
+    that cannot finish before its deadline fails with `DeadlineExceeded`.
+    """
+
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE,
+                 max_in_flight=MAX_IN_FLIGHT, max_attempts=MAX_ATTEMPTS, backoff_base=BACKOFF_BASE,
+                 backoff_max=BACKOFF_MAX):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_in_flight = max_in_flight
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retries = 0
+        self.deduplicated = 0
+        self._queue = []
+        self._in_flight = 0
+        self._cooldown_until = 0.0
+        self._seq = itertools.count()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="llm-call")
+        self._loop = asyncio.new_event_loop()
+        self._wakeup = asyncio.Event()
+        self._dispatcher = self._loop.create_task(self._dispatch())
+        self._thread = threading.Thread(target=self._run, name="llm-scheduler", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        try:
+            self._loop.run_until_complete(self._dispatcher)
+        except asyncio.CancelledError:
+            pass
+
+    def close(self):
+        """Stops admitting calls; queued ones never start."""
+        if self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._dispatcher.cancel)
+            self._thread.join(timeout=1)
+
+    def submit(self, call, tokens=0, priority=DEFAULT, timeout=REQUEST_DEADLINE, key=None):
+        """
+        Queues `call()` and returns a `concurrent.futures.Future` of its result. With a
+        `key`, a call identical to one still in flight returns that call's future.
+        """
+        if key is not None:
+            with self._pending_lock:
+                future = self._pending.get(key)
+                if future is not None:
+                    self.deduplicated += 1
+                    return future
+                request = self._new_request(call, tokens, priority, timeout)
+                self._pending[key] = request.future
+            request.future.add_done_callback(lambda _: self._forget(key))
+        else:
+            request = self._new_request(call, tokens, priority, timeout)
+        self._loop.call_soon_threadsafe(self._enqueue, request)
+        return request.future
+
+    def run(self, call, tokens=0, priority=DEFAULT, timeout=REQUEST_DEADLINE, key=None):
+        """Runs `call()` through the queue and returns its result, waiting at most `timeout` seconds."""
+        future = self.submit(call, tokens, priority, timeout, key)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            # Drops the call if it has not started (and no other caller shares it); a
+            # running one cannot be interrupted.
+            if key is None:
+                future.cancel()
+            raise DeadlineExceeded(f"The LLM call did not finish within {timeout:g} seconds.")
+
+    def queue_length(self):
+        return len(self._queue)
+
+    def _new_request(self, call, tokens, priority, timeout):
+        deadline = time.monotonic() + timeout if timeout else None
+        return _Request(priority, next(self._seq), call, tokens, deadline)
+
+    def _forget(self, key):
+        with self._pending_lock:
+            self._pending.pop(key, None)
+
+    def _enqueue(self, request):
+        heapq.heappush(self._queue, request)
+        self._wakeup.set()
+
+    async def _dispatch(self):
+        while True:
+            self._wakeup.clear()
+            if not self._queue or self._in_flight >= self.max_in_flight:
+                await self._wakeup.wait()
+                continue
+
+            request = self._queue[0]
+            now = time.monotonic()
+            if request.future.cancelled() or (request.deadline is not None and now >= request.deadline):
+                heapq.heappop(self._queue)
+                if not request.future.cancelled():
+                    request.future.set_exception(DeadlineExceeded("The LLM call timed out while queued for the rate limit."))
+                continue
+
+            wait = max(
+                self._cooldown_until - now,
+                self.requests.wait_time(1, now),
+                self.tokens.wait_time(request.tokens, now),
+            )
+            if wait > 0:
+                if request.deadline is not None:
+                    wait = min(wait, request.deadline - now)
+                # A new, higher-priority request or a finished call wakes the loop early.
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._queue)
+            if request.attempts == 0 and not request.future.set_running_or_notify_cancel():
+                continue
+            self.requests.take(1, now)
+            self.tokens.take(request.tokens, now)
+            self._in_flight += 1
+            request.attempts += 1
+            attempt = self._loop.run_in_executor(self._executor, request.call)
+            attempt.add_done_callback(lambda attempt, request=request: self._finished(request, attempt))
+
+    def _finished(self, request, attempt):
+        self._in_flight -= 1
+        self._wakeup.set()
+        error = attempt.exception()
+        if error is None:
+            request.future.set_result(attempt.result())
+            return
+
+        now = time.monotonic()
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** request.attempts))
+        if (not is_retryable(error) or request.attempts >= self.max_attempts
+                or (request.deadline is not None and now + delay >= request.deadline)):
+            request.future.set_exception(error)
+            return
+        if status_code(error) == 429:
+            self._cooldown_until = max(self._cooldown_until, now + delay)
+        self.retries += 1
+        self._loop.call_later(delay, self._enqueue, request)
+
+
+@lru_cache(maxsize=None)
+def get_scheduler():
+    return LLMScheduler()
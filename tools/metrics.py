@@ -0,0 +1,231 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+
+from . import llm_client, llm_scheduler
+
+# Upper bounds (seconds) of the exported latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Percentiles are computed over the most recent samples of each series.
+RECENT_SAMPLES = 2048
+# Port of the Prometheus exporter started with the app; unset or 0 disables it.
+EXPORTER_PORT = int(os.getenv("LLM_TOOLS_METRICS_PORT", "0"))
+PANEL_ENABLED = os.getenv("LLM_TOOLS_METRICS_PANEL", "").lower() in ("1", "true", "yes")
+PREFIX = "llm_tools"
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class _Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, value):
+        index = bisect_left(LATENCY_BUCKETS, value)
+        if index < len(self.buckets):
+            self.buckets[index] += 1
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+
+class MetricsRegistry:
+    """
+    In-process latency histograms and counters, labelled like Prometheus series.
+
+    Histograms keep cumulative bucket counts for export and a window of recent samples
+    for the p50/p95/p99 figures shown in the app; counters only ever increase.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram()
+            histogram.observe(value)
+
+    def increment(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def latency_summary(self, name):
+        """
+        Returns one row per series of histogram `name`: its labels, sample count and
+        p50/p95/p99 over the recent samples, in seconds.
+        """
+        with self._lock:
+            series = [(labels, h.count, sorted(h.recent)) for (n, labels), h in self._histograms.items() if n == name]
+        rows = []
+        for labels, count, values in sorted(series):
+            row = dict(labels)
+            row.update({
+                "count": count,
+                "p50": percentile(values, 0.50),
+                "p95": percentile(values, 0.95),
+                "p99": percentile(values, 0.99),
+            })
+            rows.append(row)
+        return rows
+
+    def counter_values(self, name):
+        """Returns {labels dict as a tuple of items: value} for counter `name`."""
+        with self._lock:
+            return {labels: value for (n, labels), value in self._counters.items() if n == name}
+
+    def cache_hit_rates(self):
+        """Returns {cache name: (hits, lookups)} from the `cache_requests_total` counter."""
+        rates = {}
+        for labels, value in self.counter_values("cache_requests_total").items():
+            labels = dict(labels)
+            hits, lookups = rates.get(labels["cache"], (0, 0))
+            rates[labels["cache"]] = (hits + (value if labels["result"] == "hit" else 0), lookups + value)
+        return rates
+
+    def render_prometheus(self):
+        """Renders every series in the Prometheus text exposition format."""
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+        with self._lock:
+            histograms = sorted((key, (list(h.buckets), h.count, h.sum)) for key, h in self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        lines, typed = [], set()
+        for (name, labels), (buckets, count, total) in histograms:
+            metric = f"{PREFIX}_{name}"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, bucket in zip(LATENCY_BUCKETS, buckets):
+                cumulative += bucket
+                lines.append(f"{metric}_bucket{label_text(labels, [('le', repr(bound))])} {cumulative}")
+            lines.append(f"{metric}_bucket{label_text(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{metric}_sum{label_text(labels)} {total}")
+            lines.append(f"{metric}_count{label_text(labels)} {count}")
+        for (name, labels), value in counters:
+            metric = f"{PREFIX}_{name}"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{label_text(labels)} {value}")
+
+        scheduler = llm_scheduler.get_scheduler()
+        lines += [
+            f"# TYPE {PREFIX}_llm_queue_length gauge",
+            f"{PREFIX}_llm_queue_length {scheduler.queue_length()}",
+            f"# TYPE {PREFIX}_llm_retries_total counter",
+            f"{PREFIX}_llm_retries_total {scheduler.retries}",
+            f"# TYPE {PREFIX}_llm_deduplicated_total counter",
+            f"{PREFIX}_llm_deduplicated_total {scheduler.deduplicated}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+@lru_cache(maxsize=None)
+def get_registry():
+    """
+    Returns the process-wide registry. The first call subscribes it to every LLM call,
+    so entry points call it at startup.
+    """
+    registry = MetricsRegistry()
+    llm_client.add_listener(lambda event: _record_llm_call(registry, event))
+    return registry
+
+
+@contextmanager
+def span(stage, tool=""):
+    """
+    Times one stage of a tool's work (fetch, extract, embed, index, search, ...) into
+    the `stage_seconds` histogram; a stage that raises is also counted in
+    `stage_errors_total`.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        get_registry().increment("stage_errors_total", stage=stage, tool=tool)
+        raise
+    finally:
+        get_registry().observe("stage_seconds", time.perf_counter() - started, stage=stage, tool=tool)
+
+
+def record_cache(cache, hit, count=1):
+    """Counts `count` lookups in the named cache as hits or misses."""
+    if count:
+        get_registry().increment("cache_requests_total", count, cache=cache, result="hit" if hit else "miss")
+
+
+def _record_llm_call(registry, event):
+    tool = event["tool"] or ""
+    if event["cacheable"]:
+        registry.increment("cache_requests_total", cache="llm_response", result="hit" if event["cached"] else "miss")
+    if event["cached"]:
+        registry.increment("llm_requests_total", tool=tool, status="cached")
+        return
+    registry.increment("llm_requests_total", tool=tool, status="error" if event["error"] else "ok")
+    registry.observe("stage_seconds", event["queued"], stage="queue", tool=tool)
+    registry.observe("stage_seconds", event["elapsed"] - event["queued"], stage="generate", tool=tool)
+    if event["ttft"] is not None:
+        registry.observe("llm_ttft_seconds", event["ttft"], tool=tool, model=event["model"])
+    registry.increment("llm_tokens_total", event["prompt_tokens"], tool=tool, kind="prompt")
+    registry.increment("llm_tokens_total", event["completion_tokens"], tool=tool, kind="completion")
+
+
+def _exporter_handler():
+    from http.server import BaseHTTPRequestHandler
+
+    class ExporterHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = get_registry().render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ExporterHandler
+
+
+@lru_cache(maxsize=None)
+def start_exporter(port=EXPORTER_PORT, host="127.0.0.1"):
+    """Serves /metrics on `host:port` from a daemon thread, once per process."""
+    # http.server is only imported when the exporter is enabled, to keep app startup lean.
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((host, port), _exporter_handler())
+    threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+    return server
@@ -0,0 +1,251 @@
+import ast
+import re
+
+import numpy as np
+import pandas as pd
+
+
+class SandboxError(Exception):
+    """Raised when a generated pandas expression is rejected or fails to run."""
+
+
+MAX_INT_CONSTANT = 10 ** 7
+MAX_STR_CONSTANT = 1000
+
+ALLOWED_NODES = (
+    ast.Expression, ast.Call, ast.Attribute, ast.Name, ast.Load, ast.Constant, ast.Subscript,
+    ast.Slice, ast.Compare, ast.BoolOp, ast.BinOp, ast.UnaryOp, ast.List, ast.Tuple, ast.Dict,
+    ast.keyword, ast.IfExp,
+    ast.And, ast.Or, ast.Not, ast.Invert, ast.USub, ast.UAdd,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.BitAnd, ast.BitOr, ast.BitXor,
+    ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn, ast.Is, ast.IsNot,
+)
+
+ALLOWED_MODULE_ATTRIBUTES = {
+    "pd": {
+        "to_datetime", "to_numeric", "to_timedelta", "cut", "qcut", "crosstab", "pivot_table",
+        "concat", "Timestamp", "Timedelta", "DateOffset", "Grouper", "NamedAgg", "NA", "NaT",
+        "isna", "notna", "IndexSlice",
+    },
+    "np": {
+        "abs", "ceil", "clip", "corrcoef", "cumsum", "exp", "floor", "inf", "isnan", "log", "log10",
+        "log1p", "max", "mean", "median", "min", "nan", "percentile", "quantile", "round", "sign",
+        "sqrt", "std", "sum", "unique", "var", "where", "select", "int64", "float64",
+    },
+}
+
+# Attributes and methods usable on frames, series, indexes, group-bys, windows and the
+# `.str`/`.dt`/`.cat` accessors. They only read data or return new objects; anything
+# that writes files, evaluates strings or mutates the frame is left out.
+ALLOWED_ATTRIBUTES = {
+    # Properties and indexers.
+    "T", "at", "iat", "iloc", "loc", "columns", "index", "dtype", "dtypes", "shape", "size", "ndim",
+    "empty", "values", "name", "names", "array", "hasnans", "is_unique", "is_monotonic_increasing",
+    "is_monotonic_decreasing", "str", "dt", "cat", "codes", "categories", "levels", "groups", "ngroups",
+    # Selection and reshaping.
+    "head", "tail", "sample", "get", "filter", "select_dtypes", "xs", "nlargest", "nsmallest",
+    "sort_values", "sort_index", "reset_index", "set_index", "reindex", "rename", "rename_axis",
+    "drop", "drop_duplicates", "duplicated", "dropna", "fillna", "ffill", "bfill", "interpolate",
+    "replace", "astype", "copy", "assign", "where", "mask", "clip", "explode", "melt", "pivot",
+    "pivot_table", "stack", "unstack", "merge", "join", "squeeze", "to_frame", "to_list", "tolist",
+    "to_dict", "to_numpy", "to_period", "keys", "items", "isin", "between", "isna", "isnull", "notna",
+    "notnull", "combine_first", "factorize", "argsort", "argmax", "argmin", "item", "memory_usage",
+    # Arithmetic and comparison.
+    "abs", "round", "add", "sub", "mul", "div", "truediv", "floordiv", "mod", "pow", "eq", "ne",
+    "lt", "le", "gt", "ge",
+    # Reductions and statistics.
+    "all", "any", "count", "sum", "prod", "product", "mean", "median", "mode", "min", "max", "std",
+    "var", "sem", "skew", "kurt", "kurtosis", "quantile", "describe", "value_counts", "unique",
+    "nunique", "idxmin", "idxmax", "corr", "corrwith", "cov", "cumsum", "cumprod", "cummax", "cummin",
+    "diff", "pct_change", "shift", "rank",
+    # Grouping and windows.
+    "groupby", "resample", "rolling", "expanding", "ewm", "agg", "aggregate", "apply", "transform",
+    "map", "first", "last", "nth", "get_group", "cumcount", "ngroup",
+    # `.str`, `.dt` and `.cat` accessor members.
+    "contains", "startswith", "endswith", "match", "fullmatch", "extract", "findall", "find", "len",
+    "lower", "upper", "title", "capitalize", "strip", "lstrip", "rstrip", "split", "slice", "zfill",
+    "pad", "year", "month", "day", "hour", "minute", "second", "date", "time", "quarter", "weekday",
+    "dayofweek", "day_of_week", "dayofyear", "day_of_year", "days", "seconds", "total_seconds",
+    "day_name", "month_name", "strftime", "floor", "ceil", "normalize", "is_month_start",
+    "is_month_end", "is_year_start", "is_year_end",
+}
+
+# Function names pandas may resolve from a string (`df.agg("sum")`, `aggfunc="mean"`).
+ALLOWED_FUNCTION_NAMES = {
+    "all", "any", "count", "cumcount", "cummax", "cummin", "cumprod", "cumsum", "describe", "diff",
+    "first", "idxmax", "idxmin", "kurt", "last", "max", "mean", "median", "min", "mode", "ngroup",
+    "nunique", "pct_change", "prod", "quantile", "rank", "sem", "shift", "size", "skew", "std", "sum",
+    "unique", "value_counts", "var",
+}
+
+# Position of the function argument of calls that dispatch on a function or its name.
+# Module-level `pd.pivot_table` takes the data first, so its position is one further.
+FUNCTION_ARGUMENTS = {
+    "agg": 0, "aggregate": 0, "apply": 0, "map": 0, "transform": 0, "NamedAgg": 1, "pivot_table": 3,
+    "crosstab": 5,
+}
+FUNCTION_KEYWORDS = {"func", "aggfunc"}
+
+# Keyword arguments that name a file or buffer to write to.
+DENIED_KEYWORDS = {"path", "buf", "path_or_buf", "path_or_buffer", "excel_writer", "con", "inplace"}
+
+SAFE_NAMES = {"df", "pd", "np", "True", "False", "None"}
+
+
+def _is_string(node):
+    return isinstance(node, ast.Constant) and isinstance(node.value, (str, bytes))
+
+
+def _check_function(node, method):
+    """Checks a function passed to `method`: an allowed name, a `pd`/`np` function, or a list or dict of them."""
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, str) and node.value not in ALLOWED_FUNCTION_NAMES:
+            raise SandboxError(f"'{node.value}' cannot be passed to `{method}`.")
+    elif isinstance(node, (ast.List, ast.Tuple)):
+        for element in node.elts:
+            _check_function(element, method)
+    elif isinstance(node, ast.Dict):
+        if not all(isinstance(key, ast.Constant) for key in node.keys):
+            raise SandboxError(f"Column names passed to `{method}` must be literals.")
+        for value in node.values:
+            _check_function(value, method)
+    elif not (isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name)
+              and node.value.id in ALLOWED_MODULE_ATTRIBUTES):
+        # Anything computed (a column name, an index, an f-string) could name any method.
+        raise SandboxError(f"Functions passed to `{method}` must be names such as 'sum' or `np` functions.")
+
+
+def _check_call(node):
+    for keyword in node.keywords:
+        if keyword.arg is None:
+            raise SandboxError("Unpacking keyword arguments is not allowed.")
+        if keyword.arg in DENIED_KEYWORDS:
+            raise SandboxError(f"The `{keyword.arg}` argument is not allowed.")
+    if not isinstance(node.func, ast.Attribute):
+        return
+    method = node.func.attr
+    for keyword in node.keywords:
+        if keyword.arg in FUNCTION_KEYWORDS:
+            _check_function(keyword.value, method)
+    if method not in FUNCTION_ARGUMENTS:
+        return
+    position = FUNCTION_ARGUMENTS[method]
+    if method == "pivot_table" and isinstance(node.func.value, ast.Name) and node.func.value.id == "pd":
+        position += 1
+    if len(node.args) > position:
+        _check_function(node.args[position], method)
+    for keyword in node.keywords:
+        if keyword.arg in FUNCTION_KEYWORDS:
+            continue
+        value = keyword.value
+        if isinstance(value, ast.Tuple) and len(value.elts) == 2 and isinstance(value.elts[0], ast.Constant):
+            # Named aggregation: `agg(total=("sales", "sum"))`.
+            _check_function(value.elts[1], method)
+        elif not isinstance(value, ast.Constant):
+            raise SandboxError(f"Keyword arguments of `{method}` must be literals.")
+
+
+def validate_expression(expression):
+    """
+    Parses `expression` and checks it against the sandbox rules: a single expression
+    over `df`, `pd` and `np` only, using allowed read-only attributes, with functions
+    passed by allowed name or as `np`/`pd` functions, no strings built at run time, no
+    file or in-place arguments, and no oversized constants.
+
+    Args:
+        expression (str): The pandas expression.
+
+    Returns:
+        ast.Expression: The validated syntax tree.
+
+    Raises:
+        SandboxError: If the expression is not allowed.
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise SandboxError(f"The generated expression is not valid Python: {e.msg}")
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise SandboxError(f"'{type(node).__name__}' is not allowed in analysis expressions.")
+        if isinstance(node, ast.Name) and node.id not in SAFE_NAMES:
+            raise SandboxError(f"Unknown name '{node.id}'. Only `df`, `pd` and `np` are available.")
+        if isinstance(node, ast.Attribute):
+            if isinstance(node.value, ast.Name) and node.value.id in ALLOWED_MODULE_ATTRIBUTES:
+                if node.attr not in ALLOWED_MODULE_ATTRIBUTES[node.value.id]:
+                    raise SandboxError(f"'{node.value.id}.{node.attr}' is not allowed.")
+            elif node.attr not in ALLOWED_ATTRIBUTES:
+                raise SandboxError(f"Attribute '{node.attr}' is not allowed.")
+            if isinstance(node.value, ast.Constant):
+                raise SandboxError("Methods of literals are not allowed.")
+        if isinstance(node, ast.Subscript) and _is_string(node.value):
+            raise SandboxError("Slicing string literals is not allowed.")
+        if isinstance(node, ast.BinOp) and (_is_string(node.left) or _is_string(node.right)):
+            # Joining, repeating or formatting strings could spell out a denied name.
+            raise SandboxError("Building strings is not allowed.")
+        if isinstance(node, ast.Call):
+            _check_call(node)
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, int) and abs(node.value) > MAX_INT_CONSTANT:
+                raise SandboxError("Numeric constants in analysis expressions are limited in size.")
+            if isinstance(node.value, (str, bytes)) and len(node.value) > MAX_STR_CONSTANT:
+                raise SandboxError("String constants in analysis expressions are limited in size.")
+    return tree
+
+
+def extract_expression(response_text):
+    """Returns the expression from an LLM response, removing a Markdown code fence if present."""
+    match = re.search(r"```(?:python|py)?\s*\n?(.*?)```", response_text, re.DOTALL)
+    expression = match.group(1) if match else response_text
+    lines = [line for line in expression.strip().splitlines() if line.strip() and not line.strip().startswith("#")]
+    return " ".join(line.strip() for line in lines)
+
+
+def run_expression(expression, df):
+    """
+    Evaluates a validated pandas expression against the full DataFrame.
+
+    The expression runs without builtins and sees only `df`, `pd` and `np`.
+
+    Args:
+        expression (str): The pandas expression.
+        df (pandas.DataFrame): The uploaded data.
+
+    Returns:
+        object: The result (DataFrame, Series or scalar).
+
+    Raises:
+        SandboxError: If the expression is rejected or raises an error.
+    """
+    tree = validate_expression(expression)
+    code = compile(tree, "<analysis>", "eval")
+    try:
+        return eval(code, {"__builtins__": {}}, {"df": df, "pd": pd, "np": np})
+    except Exception as e:
+        raise SandboxError(f"The analysis failed: {type(e).__name__}: {e}")
+
+
+def build_expression_prompt(schema_text, question):
+    return (
+        "You are an expert data analyst working with a pandas DataFrame named `df`.\n"
+        f"{schema_text}\n\n"
+        "Write ONE Python expression that computes the answer to the question below from `df`. "
+        "Rules: use only `df`, `pd` and `np`; no imports, assignments, loops, lambdas or comprehensions; "
+        "prefer vectorized pandas operations such as groupby, agg, value_counts, describe and boolean masks; "
+        "pass aggregations by name (e.g. 'sum', 'mean') or as `np` functions; "
+        "do not modify `df`. Return only the expression, with no explanation.\n\n"
+        f"Question: {question}"
+    )
+
+
+def format_result(result, max_rows=50):
+    """Formats an analysis result as Markdown for the chat history."""
+    if isinstance(result, pd.Index):
+        result = result.to_series(index=range(len(result)))
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        text = result.to_string(max_rows=max_rows)
+        return f"```\n{text}\n```"
+    if isinstance(result, np.generic):
+        result = result.item()
+    return f"**{result}**"
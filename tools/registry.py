@@ -0,0 +1,72 @@
+import importlib
+from functools import lru_cache
+
+# Tools are listed by the module and function that render them, not by the function
+# itself, so the sidebar can be built without importing any tool. A tool's module
+# (and with it pandas, langchain, FAISS, ...) is imported the first time it is opened.
+TOOLS = {
+    "AI Assistant": {
+        "icon": "🧠",
+        "name": "AI Assistant",
+        "module": None,
+        "entry": None,
+        "description": "Chat with a professional AI assistant."
+    },
+    "Blog AI Assistant": {
+        "icon": "📝",
+        "name": "Blog AI Assistant",
+        "module": "tools.blog_assistant",
+        "entry": "blog_assistant_app",
+        "description": "Generate engaging blog posts with AI assistance."
+    },
+    "AI CSV Analyzer": {
+        "icon": "📊",
+        "name": "AI CSV Analyzer",
+        "module": "tools.data_analyzer",
+        "entry": "data_analyzer_app",
+        "description": "Upload and analyze your CSV data using AI."
+    },
+    "SQL Query Generator": {
+        "icon": "💻",
+        "name": "SQL Query Generator",
+        "module": "tools.sql_query_generator",
+        "entry": "sql_query_generator_app",
+        "description": "Generate SQL queries from natural language descriptions."
+    },
+    "Document Summarizer": {
+        "icon": "📄",
+        "name": "Document Summarizer",
+        "module": "tools.document_summarizer",
+        "entry": "document_summarizer_app",
+        "description": "Summarize PDF and Word documents instantly."
+    },
+    "Website Summarizer": {
+        "icon": "🌐",
+        "name": "Website Summarizer",
+        "module": "tools.website_summarizer",
+        "entry": "website_summarizer_app",
+        "description": "Summarize web pages by providing a URL."
+    },
+    "Code Explainer": {
+        "icon": "🔍",
+        "name": "Code Explainer",
+        "module": "tools.code_explainer",
+        "entry": "code_explainer_app",
+        "description": "Understand code with AI-powered step-by-step explanations."
+    }
+}
+
+
+@lru_cache(maxsize=None)
+def load_tool(name):
+    """
+    Imports a tool's module on first use and returns the function that renders it.
+
+    Args:
+        name (str): The tool's key in `TOOLS`.
+
+    Returns:
+        Callable[[], None]: The tool's Streamlit app function.
+    """
+    tool = TOOLS[name]
+    return getattr(importlib.import_module(tool["module"]), tool["entry"])
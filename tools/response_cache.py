@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from .settings import CACHE_DIR
+
+MEMORY_MAX_ENTRIES = int(os.getenv("LLM_TOOLS_RESPONSE_CACHE_MEMORY_ENTRIES", "512"))
+DISK_MAX_ENTRIES = int(os.getenv("LLM_TOOLS_RESPONSE_CACHE_DISK_ENTRIES", "20000"))
+
+# Seconds a response stays valid, per tool. Tools that are not listed are never cached.
+TOOL_TTLS = {
+    "sql_query_generator": 24 * 3600,
+    "code_explainer": 24 * 3600,
+    "website_summarizer": 3600,
+}
+
+# Responses sampled above this temperature are meant to vary, so they are not cached.
+MAX_CACHEABLE_TEMPERATURE = 0.5
+
+
+def normalize_prompt(prompt):
+    """
+    Normalizes line endings and trailing whitespace so that prompts differing only
+    in those hash alike. Indentation is kept because it is meaningful in code.
+    """
+    if not isinstance(prompt, str):
+        prompt = "\n".join(str(part) for part in prompt)
+    lines = prompt.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+def cache_key(prompt, model, generation_config=None, safety_settings=None):
+    """
+    Builds the cache key of a request from the model name, generation config,
+    safety settings and normalized prompt.
+    """
+    digest = hashlib.sha256()
+    for part in (
+        model,
+        json.dumps(generation_config, sort_keys=True, default=str),
+        json.dumps(safety_settings, sort_keys=True, default=str),
+        normalize_prompt(prompt),
+    ):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def ttl_for(tool, generation_config=None):
+    """
+    Returns how long a response of `tool` may be cached, or None when it must not be
+    cached (unknown tool, or a high sampling temperature).
+    """
+    ttl = TOOL_TTLS.get(tool)
+    if not ttl:
+        return None
+    temperature = (generation_config or {}).get("temperature")
+    if temperature is not None and temperature > MAX_CACHEABLE_TEMPERATURE:
+        return None
+    return ttl
+
+
+class ResponseCache:
+    """
+    Two-tier response cache: an in-memory LRU of `memory_max_entries` in front of a
+    SQLite table bounded to `disk_max_entries` rows. Entries expire after their TTL.
+    """
+
+    def __init__(self, path, memory_max_entries=MEMORY_MAX_ENTRIES, disk_max_entries=DISK_MAX_ENTRIES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.memory_max_entries = memory_max_entries
+        self.disk_max_entries = disk_max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    return entry[0]
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT response, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._remember(key, row[0], row[1])
+            return row[0]
+
+    def put(self, key, response, ttl):
+        now = time.time()
+        expires_at = now + ttl
+        with self._lock:
+            self._remember(key, response, expires_at)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, response, expires_at, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def _remember(self, key, response, expires_at):
+        self._memory[key] = (response, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        excess = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.disk_max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+
+
+@lru_cache(maxsize=None)
+def get_response_cache():
+    return ResponseCache(os.path.join(CACHE_DIR, "responses.sqlite3"))
@@ -0,0 +1,3 @@
+import os
+
+CACHE_DIR = os.getenv("LLM_TOOLS_CACHE_DIR", os.path.join(".cache", "llm_tools"))
@@ -1,24 +1,139 @@
+import asyncio
+import json
 import streamlit as st
-import google.generativeai as genai
-import os
+from . import llm_client
+from .streaming import MarkdownStream
+
+TOOL_NAME = "sql_query_generator"
+
+STRUCTURED_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": {
+        "type": "object",
+        "properties": {
+            "query": {"type": "string"},
+            "expected_output": {"type": "string"},
+            "explanation": {"type": "string"},
+        },
+        "required": ["query", "expected_output", "explanation"],
+    },
+}
+
+
+def build_sql_prompt(text_input, dialect, database_context):
+    return f"""
+                Generate a {dialect} SQL query based on the following description:
+                Description: ```{text_input}```
+                {'Database Context: ' + database_context if database_context else ''}
+                Provide only the SQL query as a raw string, without any additional explanations, markdown code block delimiters, or introductory/concluding remarks.
+                """
+
+
+def build_expected_output_prompt(sql_query):
+    return f"""
+                Given the following SQL Query:
+                ```sql
+                {sql_query}
+                ```
+                What would be a plausible sample tabular response?
+                Provide a concise sample tabular response formatted as a Markdown table, with no additional explanation or introductory text.
+                If the query is for DDL/DML (e.g., CREATE, INSERT, UPDATE, DELETE), state "No direct tabular output for this type of query."
+                """
+
+
+def build_explanation_prompt(sql_query):
+    return f"""
+                Explain the following SQL Query concisely and professionally:
+                ```sql
+                {sql_query}
+                ```
+                Focus on what the query does and its purpose.
+                """
+
+
+def build_structured_prompt(text_input, dialect, database_context):
+    return f"""
+                Generate a {dialect} SQL query based on the following description:
+                Description: ```{text_input}```
+                {'Database Context: ' + database_context if database_context else ''}
+                Respond with a JSON object with three fields:
+                - "query": only the SQL query as a raw string, without markdown code block delimiters.
+                - "expected_output": a concise, plausible sample tabular response formatted as a Markdown table, with no additional explanation. If the query is for DDL/DML (e.g., CREATE, INSERT, UPDATE, DELETE), state "No direct tabular output for this type of query."
+                - "explanation": a concise, professional explanation of what the query does and its purpose.
+                """
+
+
+def clean_sql(sql_query):
+    sql_query = sql_query.strip()
+    if sql_query.startswith("```sql"):
+        sql_query = sql_query[len("```sql"):].strip()
+    elif sql_query.startswith("```"):
+        sql_query = sql_query[len("```"):].strip()
+    if sql_query.endswith("```"):
+        sql_query = sql_query[:-len("```")].strip()
+    return sql_query
+
+
+async def _stream_section(name, prompt, on_chunk):
+    parts = []
+    async for chunk in llm_client.astream(prompt, tool=TOOL_NAME):
+        parts.append(chunk)
+        on_chunk(name, chunk)
+    return "".join(parts).strip()
+
+
+async def generate_sql_details(text_input, dialect, database_context, on_chunk=None):
+    """
+    Generates a SQL query, a sample of its output and an explanation.
+
+    The query is generated first; the expected-output and explanation requests depend
+    only on it, so they then run concurrently. `on_chunk(section, chunk)` is called
+    with each new chunk of "query", "output" or "explanation" as it streams in.
+
+    Returns:
+        tuple[str, str, str]: The SQL query, expected output and explanation.
+    """
+    on_chunk = on_chunk or (lambda section, chunk: None)
+
+    sql_query = clean_sql(await _stream_section(
+        "query", build_sql_prompt(text_input, dialect, database_context), on_chunk
+    ))
+
+    output, explanation = await asyncio.gather(
+        _stream_section("output", build_expected_output_prompt(sql_query), on_chunk),
+        _stream_section("explanation", build_explanation_prompt(sql_query), on_chunk),
+    )
+    return sql_query, output, explanation
+
+
+def generate_sql_details_structured(text_input, dialect, database_context):
+    """
+    Generates the query, expected output and explanation with a single JSON-mode request.
+
+    Returns:
+        tuple[str, str, str]: The SQL query, expected output and explanation.
+    """
+    response = llm_client.generate(
+        build_structured_prompt(text_input, dialect, database_context),
+        generation_config=STRUCTURED_GENERATION_CONFIG,
+        tool=TOOL_NAME,
+    )
+    details = json.loads(response)
+    return (
+        clean_sql(details.get("query", "")),
+        details.get("expected_output", "").strip(),
+        details.get("explanation", "").strip(),
+    )
+
 
 def sql_query_generator_app():
-    gemini_api_key = os.getenv("GEMINI_API_KEY")
-    if not gemini_api_key:
+    if llm_client.api_key_missing():
         st.error(
             "**ERROR:** Gemini API key not found for SQL Query Generator. "
             "Please set it as an environment variable named `GEMINI_API_KEY` "
             "(e.g., in Streamlit Cloud secrets, Heroku config vars, or your local shell)."
         )
         st.stop()
-    genai.configure(api_key=gemini_api_key)
-
-    try:
-        model = genai.GenerativeModel('gemini-2.0-flash')
-    except Exception as e:
-        st.error(f"Failed to initialize Gemini model for SQL Query Generator: {e}. Please check your API key and try again.")
-        st.stop()
-
 
     st.markdown(
         """
@@ -48,6 +163,12 @@ def sql_query_generator_app():
             key="sql_dialect_select"
         )
 
+        single_request = st.checkbox(
+            'Generate everything in a single request',
+            key="sql_single_request",
+            help="Returns the query, expected output and explanation from one structured request instead of streaming three.",
+        )
+
         submit = st.button('Generate SQL Query', type="primary")
 
     if submit:
@@ -55,72 +176,55 @@ def sql_query_generator_app():
             st.warning("Please enter a **query description** to generate the SQL query.")
             return
 
-        with st.spinner('Generating SQL Query...'):
-            try:
-                sql_template = f"""
-                Generate a {dialect} SQL query based on the following description:
-                Description: ```{text_input}```
-                {'Database Context: ' + database_context if database_context else ''}
-                Provide only the SQL query as a raw string, without any additional explanations, markdown code block delimiters, or introductory/concluding remarks.
-                """
-                sql_response = model.generate_content(sql_template)
-                sql_query = sql_response.text.strip()
-
-                if sql_query.startswith("```sql"):
-                    sql_query = sql_query[len("```sql"):].strip()
-                if sql_query.endswith("```"):
-                    sql_query = sql_query[:-len("```")].strip()
-                elif sql_query.startswith("```"):
-                    sql_query = sql_query[len("```"):].strip()
-                if sql_query.endswith("```"):
-                    sql_query = sql_query[:-len("```")].strip()
-
-                expected_output_prompt = f"""
-                Given the following SQL Query:
-                ```sql
-                {sql_query}
-                ```
-                What would be a plausible sample tabular response?
-                Provide a concise sample tabular response formatted as a Markdown table, with no additional explanation or introductory text.
-                If the query is for DDL/DML (e.g., CREATE, INSERT, UPDATE, DELETE), state "No direct tabular output for this type of query."
-                """
-                output_response = model.generate_content(expected_output_prompt)
-                output = output_response.text.strip()
-
-                explanation_prompt = f"""
-                Explain the following SQL Query concisely and professionally:
-                ```sql
-                {sql_query}
-                ```
-                Focus on what the query does and its purpose.
-                """
-                explanation_response = model.generate_content(explanation_prompt)
-                explanation = explanation_response.text.strip()
-
-                st.markdown("---")
-                with st.container(border=True):
-                    st.success('SQL Query Generated Successfully!')
-                    st.subheader('Generated SQL Query:')
-                    st.code(sql_query, language='sql')
-
-                    st.subheader('Expected Output:')
-                    st.markdown(output)
-
-                    st.subheader('Explanation:')
-                    st.markdown(explanation)
-
-                full_output_for_download = (
-                    f"### Generated SQL Query:\n```sql\n{sql_query}\n```\n\n"
-                    f"### Expected Output:\n{output}\n\n"
-                    f"### Explanation:\n{explanation}"
-                )
-                st.download_button(
-                    label="Download SQL Details",
-                    data=full_output_for_download,
-                    file_name="sql_query_details.md",
-                    mime="text/markdown",
-                    help="Download the generated SQL query, its expected output, and explanation in Markdown format."
-                )
-
-            except Exception as e:
-                st.error(f"An error occurred during SQL query generation: {e}. Please try again.")
+        st.markdown("---")
+        with st.container(border=True):
+            status_placeholder = st.empty()
+            st.subheader('Generated SQL Query:')
+            query_placeholder = st.empty()
+            st.subheader('Expected Output:')
+            output_placeholder = st.empty()
+            st.subheader('Explanation:')
+            explanation_placeholder = st.empty()
+
+        try:
+            if single_request:
+                with st.spinner('Generating SQL Query...'):
+                    sql_query, output, explanation = generate_sql_details_structured(
+                        text_input, dialect, database_context
+                    )
+                output_placeholder.markdown(output)
+                explanation_placeholder.markdown(explanation)
+            else:
+                streams = {
+                    "query": MarkdownStream(query_placeholder.container()),
+                    "output": MarkdownStream(output_placeholder.container()),
+                    "explanation": MarkdownStream(explanation_placeholder.container()),
+                }
+                # The raw query streams as a code block until it is cleaned up below.
+                streams["query"].write("```sql\n")
+                try:
+                    sql_query, output, explanation = asyncio.run(generate_sql_details(
+                        text_input, dialect, database_context,
+                        on_chunk=lambda section, chunk: streams[section].write(chunk),
+                    ))
+                finally:
+                    for stream in streams.values():
+                        stream.close()
+            query_placeholder.code(sql_query, language='sql')
+            status_placeholder.success('SQL Query Generated Successfully!')
+
+            full_output_for_download = (
+                f"### Generated SQL Query:\n```sql\n{sql_query}\n```\n\n"
+                f"### Expected Output:\n{output}\n\n"
+                f"### Explanation:\n{explanation}"
+            )
+            st.download_button(
+                label="Download SQL Details",
+                data=full_output_for_download,
+                file_name="sql_query_details.md",
+                mime="text/markdown",
+                help="Download the generated SQL query, its expected output, and explanation in Markdown format."
+            )
+
+        except Exception as e:
+            st.error(f"An error occurred during SQL query generation: {e}. Please try again.")
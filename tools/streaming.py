@@ -0,0 +1,154 @@
+import os
+import time
+from contextlib import nullcontext
+
+import streamlit as st
+
+# A streaming response is repainted at most once per interval, or sooner once this
+# much new text has arrived.
+REPAINT_INTERVAL = float(os.getenv("LLM_TOOLS_STREAM_REPAINT_MS", "100")) / 1000
+REPAINT_CHARS = int(os.getenv("LLM_TOOLS_STREAM_REPAINT_CHARS", "2048"))
+# Completed markdown blocks are frozen into their own element once this much text has
+# accumulated before the live tail, so repaints resend only the tail.
+FREEZE_MIN_CHARS = 1000
+CURSOR = "▌"
+
+_listeners = []
+
+
+def add_listener(listener):
+    """
+    Registers `listener(event)` to be called after every streamed response with a dict
+    of `chars`, `chunks`, `render_calls`, `frozen_blocks` and `elapsed` (seconds).
+    """
+    _listeners.append(listener)
+
+
+def _freeze_point(tail):
+    """
+    Returns the end of the last complete markdown block in `tail`: just after a blank
+    line that is not inside a code fence, or 0 if there is none. `tail` always starts
+    outside a fence because earlier text is frozen only at such points.
+    """
+    cut = tail.rfind("\n\n")
+    while cut > 0:
+        if tail.count("```", 0, cut) % 2 == 0:
+            return cut + 2
+        cut = tail.rfind("\n\n", 0, cut)
+    return 0
+
+
+class MarkdownStream:
+    """
+    Renders a streamed markdown response append-only.
+
+    Chunks are buffered in a list and joined only when painting. The live placeholder
+    is repainted at most once per `interval` seconds, or once `repaint_chars` new
+    characters have arrived; the first chunk is painted immediately. When the text
+    before the live tail contains completed markdown blocks worth at least
+    `freeze_chars`, they are painted one last time into the current element and a new
+    element is opened below for the tail, so later repaints only resend the tail and
+    long answers never re-render from the start.
+    """
+
+    def __init__(self, container=None, interval=REPAINT_INTERVAL, repaint_chars=REPAINT_CHARS,
+                 freeze_chars=FREEZE_MIN_CHARS, cursor=CURSOR):
+        self.container = container if container is not None else st.container()
+        self.interval = interval
+        self.repaint_chars = repaint_chars
+        self.freeze_chars = freeze_chars
+        self.cursor = cursor
+        self.render_calls = 0
+        self.frozen_blocks = 0
+        self._placeholder = self.container.empty()
+        self._frozen = []
+        self._tail = []
+        self._tail_chars = 0
+        self._pending_chars = 0
+        self._chunks = 0
+        self._last_paint = None
+        self._started = time.monotonic()
+
+    @property
+    def text(self):
+        return "".join(self._frozen) + self._tail_text()
+
+    def _tail_text(self):
+        if len(self._tail) > 1:
+            self._tail = ["".join(self._tail)]
+        return self._tail[0] if self._tail else ""
+
+    def _paint(self, text):
+        self._placeholder.markdown(text)
+        self.render_calls += 1
+
+    def write(self, chunk):
+        if not chunk:
+            return
+        self._tail.append(chunk)
+        self._tail_chars += len(chunk)
+        self._pending_chars += len(chunk)
+        self._chunks += 1
+        now = time.monotonic()
+        if (self._last_paint is not None and now - self._last_paint < self.interval
+                and self._pending_chars < self.repaint_chars):
+            return
+        self._last_paint = now
+        self._pending_chars = 0
+
+        tail = self._tail_text()
+        if self._tail_chars >= self.freeze_chars:
+            cut = _freeze_point(tail)
+            if cut >= self.freeze_chars:
+                self._paint(tail[:cut])
+                self._frozen.append(tail[:cut])
+                self.frozen_blocks += 1
+                self._placeholder = self.container.empty()
+                tail = tail[cut:]
+                self._tail = [tail]
+                self._tail_chars = len(tail)
+        self._paint(tail + self.cursor)
+
+    def close(self):
+        """Paints the tail without the cursor, reports the render statistics and returns the full text."""
+        self._paint(self._tail_text())
+        text = self.text
+        event = {
+            "chars": len(text),
+            "chunks": self._chunks,
+            "render_calls": self.render_calls,
+            "frozen_blocks": self.frozen_blocks,
+            "elapsed": time.monotonic() - self._started,
+        }
+        for listener in _listeners:
+            listener(event)
+        return text
+
+
+def stream_markdown(chunks, container=None, spinner_text=None, interval=REPAINT_INTERVAL):
+    """
+    Streams text chunks into the page as markdown with coalesced, append-only repaints.
+
+    Args:
+        chunks (Iterable[str] | Callable[[], Iterable[str]]): The response chunks, or a
+            function that starts the request and returns them, e.g.
+            `lambda: llm_client.generate(prompt, stream=True)`. A function is called under
+            the spinner, so the wait for the first token is covered too.
+        container (streamlit.delta_generator.DeltaGenerator, optional): Where to render;
+            a new `st.container()` by default.
+        spinner_text (str, optional): Spinner shown until the first chunk arrives.
+        interval (float): Minimum seconds between repaints.
+
+    Returns:
+        str: The full response text.
+    """
+    stream = MarkdownStream(container, interval=interval)
+    try:
+        with st.spinner(spinner_text) if spinner_text else nullcontext():
+            chunks = iter(chunks() if callable(chunks) else chunks)
+            stream.write(next(chunks, ""))
+        for chunk in chunks:
+            stream.write(chunk)
+    finally:
+        text = stream.close()
+    return text
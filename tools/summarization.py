@@ -0,0 +1,127 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from .tokens import count_tokens
+
+DEFAULT_FAN_OUT = 8
+DEFAULT_TOKEN_BUDGET = 8000
+DEFAULT_CONTEXT_TOKENS = 30000
+DEFAULT_MAX_CONCURRENCY = 4
+
+MAP_PROMPT = (
+    "The following is one section of a longer document. Summarize it in a few sentences, "
+    "keeping every important fact, figure, name and conclusion. Do not add an introduction.\n\n"
+    "{text}"
+)
+COMBINE_PROMPT = (
+    "The following are summaries of consecutive sections of a longer document. Merge them "
+    "into a single summary that keeps every important point, in document order. Do not add "
+    "an introduction.\n\n{text}"
+)
+FINAL_PROMPT = (
+    "The following are summaries of consecutive sections of a document. Using them, "
+    "{instruction}\n\n{text}"
+)
+DIRECT_PROMPT = "The following is the content of a document. {instruction}\n\n{text}"
+DEFAULT_INSTRUCTION = (
+    "summarize the entire content of the document concisely in 3-5 sentences, "
+    "capturing the main points and key takeaways."
+)
+
+SECTION_SEPARATOR = "\n\n---\n\n"
+
+
+def _budget_for_level(token_budget, level):
+    if isinstance(token_budget, int):
+        return token_budget
+    return token_budget[min(level, len(token_budget) - 1)]
+
+
+def group_texts(texts, fan_out, token_budget):
+    """
+    Packs consecutive texts into groups of at most `fan_out` items and `token_budget` tokens.
+
+    A text that is larger than the budget on its own still gets a group of its own.
+
+    Args:
+        texts (list[str]): The texts to group, in document order.
+        fan_out (int): Maximum number of texts per group.
+        token_budget (int): Maximum number of tokens per group.
+
+    Returns:
+        list[list[str]]: The groups, in document order.
+    """
+    groups = []
+    current, current_tokens = [], 0
+    for text in texts:
+        tokens = count_tokens(text)
+        if current and (len(current) >= fan_out or current_tokens + tokens > token_budget):
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+def map_reduce_summarize(
+    chunks,
+    generate,
+    instruction=DEFAULT_INSTRUCTION,
+    fan_out=DEFAULT_FAN_OUT,
+    token_budget=DEFAULT_TOKEN_BUDGET,
+    context_tokens=DEFAULT_CONTEXT_TOKENS,
+    max_concurrency=DEFAULT_MAX_CONCURRENCY,
+):
+    """
+    Summarizes a whole document with a hierarchical map-reduce over its chunks.
+
+    Chunks are packed into groups and each group is summarized concurrently, with at
+    most `max_concurrency` LLM calls in flight. The partial summaries are then merged
+    level by level in the same way until they fit into `context_tokens`, and a final
+    call applies `instruction` to them. A document that already fits is summarized
+    with that final call alone. The number of sequential LLM round trips grows
+    with the logarithm of the document length, and every chunk is read.
+
+    Args:
+        chunks (list[str]): The document's text chunks, in document order.
+        generate (Callable[[str], str]): Sends a prompt to the LLM and returns its text.
+        instruction (str): What the final summary should look like.
+        fan_out (int): Maximum number of chunks or summaries merged by one call.
+        token_budget (int | Sequence[int]): Maximum input tokens per call, either for
+            every level or per level (the last value applies to deeper levels).
+        context_tokens (int): Token size the final set of summaries must fit into.
+        max_concurrency (int): Maximum number of concurrent LLM calls.
+
+    Returns:
+        str: The final summary.
+    """
+    if not chunks:
+        return ""
+    fan_out = max(fan_out, 2)
+
+    def run_level(groups, template):
+        prompts = [template.format(text=SECTION_SEPARATOR.join(group)) for group in groups]
+        if len(prompts) == 1:
+            return [generate(prompts[0]).strip()]
+        # Worker threads keep the caller's context (e.g. its LLM scheduling priority).
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(prompts))) as pool:
+            return [summary.strip() for summary in pool.map(lambda prompt: context.copy().run(generate, prompt), prompts)]
+
+    level = 0
+    texts = list(chunks)
+    template = MAP_PROMPT
+    while sum(count_tokens(text) for text in texts) > context_tokens:
+        groups = group_texts(texts, fan_out, _budget_for_level(token_budget, level))
+        if level > 0 and len(groups) == len(texts):
+            # Summaries no longer shrink when merged; stop rather than loop forever.
+            break
+        texts = run_level(groups, template)
+        template = COMBINE_PROMPT
+        level += 1
+
+    final_template = FINAL_PROMPT if level else DIRECT_PROMPT
+    final_prompt = final_template.format(instruction=instruction, text=SECTION_SEPARATOR.join(texts))
+    return generate(final_prompt).strip()
@@ -0,0 +1,20 @@
+import re
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text):
+    """
+    Estimates the number of model tokens in `text` without calling the API.
+
+    Each punctuation mark counts as one token and each word as one token per
+    started group of four characters, which tracks SentencePiece-style tokenizers
+    closely enough for budgeting.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The estimated token count.
+    """
+    return sum((len(token) + 3) // 4 for token in _TOKEN_PATTERN.findall(text))
@@ -0,0 +1,53 @@
+import os
+
+import streamlit as st
+
+from .registry import TOOLS
+
+STYLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "style.css")
+NEW_CHAT_URL = "/"
+
+
+class UIAssets:
+    """
+    The static parts of every page, built once per process: the stylesheet, the
+    sidebar's tool options and their labels, and the "Start New Chat" link.
+    """
+
+    def __init__(self, style_html, tool_names, tool_labels, new_chat_html):
+        self.style_html = style_html
+        self.tool_names = tool_names
+        self.tool_labels = tool_labels
+        self.new_chat_html = new_chat_html
+
+    def tool_label(self, name):
+        return self.tool_labels[name]
+
+
+@st.cache_resource(show_spinner=False)
+def get_ui_assets(style_path=STYLE_PATH):
+    """
+    Reads the stylesheet and prepares the sidebar markup once per process; reruns
+    reuse the result instead of reopening files and reformatting HTML.
+    """
+    with open(style_path) as f:
+        style_html = f"<style>{f.read()}</style>"
+    new_chat_html = f"""
+        <a href="{NEW_CHAT_URL}" target="_blank" style="
+            display: inline-block;
+            background-color: #f39c12;
+            color: white;
+            font-weight: bold;
+            padding: 8px 16px;
+            border-radius: 6px;
+            text-decoration: none;
+            margin-top: 10px;">
+            Start New Chat
+        </a>
+    """
+    return UIAssets(
+        style_html=style_html,
+        tool_names=tuple(TOOLS),
+        tool_labels={name: f"{tool['icon']} {name}" for name, tool in TOOLS.items()},
+        new_chat_html=new_chat_html,
+    )
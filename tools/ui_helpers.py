@@ -1,7 +1,124 @@
+import re
+import uuid
+
 import streamlit as st
 
+from .history_store import get_history_store
+
+HISTORY_PAGE_SIZE = 20
+_SESSION_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
 def tool_header(title, description=None, icon="🔧"):
     st.title(f"{icon} {title}")
     if description:
         st.markdown(f"**{description}**")
     st.markdown("---")
+
+
+def session_id():
+    """
+    Returns the id under which this browser session's chat history is stored. It is
+    kept in the `session` query parameter, so reloading or bookmarking the page
+    resumes the same history and opening the app without it starts a new one.
+    """
+    if "session_id" not in st.session_state:
+        requested = st.query_params.get("session", "")
+        st.session_state.session_id = requested if _SESSION_ID_PATTERN.fullmatch(requested) else uuid.uuid4().hex
+    if st.query_params.get("session") != st.session_state.session_id:
+        st.query_params["session"] = st.session_state.session_id
+    return st.session_state.session_id
+
+
+def render_chat_history(tool, greeting=None, page_size=HISTORY_PAGE_SIZE):
+    """
+    Renders the latest `page_size` messages of a tool's stored chat, with a button that
+    loads older messages a page at a time. Only the shown page is read and rendered,
+    so a rerun costs the same however long the chat is.
+
+    Args:
+        tool (str): The tool whose history to show.
+        greeting (str, optional): Assistant message shown above the first stored message.
+        page_size (int): Messages per page.
+
+    Returns:
+        list[dict]: The rendered messages, oldest first.
+    """
+    limit_key = f"history_limit_{tool}"
+    limit = st.session_state.get(limit_key, page_size)
+    messages, has_older = get_history_store().page(session_id(), tool, limit)
+
+    if has_older:
+        if st.button("Load older messages", key=f"load_older_{tool}"):
+            st.session_state[limit_key] = limit + page_size
+            st.rerun()
+    elif greeting:
+        with st.chat_message("assistant"):
+            st.markdown(greeting)
+
+    for message in messages:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+    return messages
+
+
+def _milliseconds(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def render_metrics_panel(registry):
+    """
+    Renders the process's latency percentiles, token counts and cache hit rates from a
+    `metrics.MetricsRegistry`, with a download of the same figures in Prometheus format.
+    """
+    stages = registry.latency_summary("stage_seconds")
+    if stages:
+        st.caption("Stage latency (ms)")
+        st.dataframe(
+            [
+                {"tool": row["tool"], "stage": row["stage"], "count": row["count"],
+                 "p50": _milliseconds(row["p50"]), "p95": _milliseconds(row["p95"]), "p99": _milliseconds(row["p99"])}
+                for row in stages
+            ],
+            hide_index=True,
+        )
+    else:
+        st.caption("No requests yet.")
+
+    ttft = registry.latency_summary("llm_ttft_seconds")
+    if ttft:
+        st.caption("Time to first token (ms)")
+        st.dataframe(
+            [
+                {"tool": row["tool"], "count": row["count"], "p50": _milliseconds(row["p50"]),
+                 "p95": _milliseconds(row["p95"]), "p99": _milliseconds(row["p99"])}
+                for row in ttft
+            ],
+            hide_index=True,
+        )
+
+    tokens = {}
+    for labels, value in registry.counter_values("llm_tokens_total").items():
+        labels = dict(labels)
+        tokens.setdefault(labels["tool"], {"tool": labels["tool"], "prompt": 0, "completion": 0})[labels["kind"]] += value
+    if tokens:
+        st.caption("Tokens")
+        st.dataframe(list(tokens.values()), hide_index=True)
+
+    hit_rates = registry.cache_hit_rates()
+    if hit_rates:
+        st.caption("Cache hit rate")
+        st.dataframe(
+            [
+                {"cache": cache, "hits": hits, "lookups": lookups, "rate": f"{hits / lookups:.0%}"}
+                for cache, (hits, lookups) in sorted(hit_rates.items())
+            ],
+            hide_index=True,
+        )
+
+    st.download_button(
+        label="Download Metrics",
+        data=registry.render_prometheus,
+        file_name="metrics.txt",
+        mime="text/plain",
+    )
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
+REQUEST_TIMEOUT = 15
+MAX_CONNECTIONS = int(os.getenv("LLM_TOOLS_HTTP_MAX_CONNECTIONS", "32"))
+PER_HOST_CONNECTIONS = int(os.getenv("LLM_TOOLS_HTTP_PER_HOST", "4"))
+PARSE_WORKERS = int(os.getenv("LLM_TOOLS_PARSE_WORKERS", str(min(os.cpu_count() or 1, 4))))
+
+_session_local = threading.local()
+
+
+@lru_cache(maxsize=None)
+def _http_adapter():
+    """
+    The process-wide connection pool. urllib3's pools are thread-safe, so every thread
+    (and every Streamlit rerun, which runs on a new one) reuses the same keep-alive
+    connections, and at most `PER_HOST_CONNECTIONS` are open to any host at a time.
+    """
+    return HTTPAdapter(pool_connections=MAX_CONNECTIONS, pool_maxsize=PER_HOST_CONNECTIONS, pool_block=True)
+
+
+def get_http_session():
+    """
+    Returns this thread's `requests.Session`, which sends its requests through the
+    shared connection pool. Only the session object (headers, cookies) is per thread,
+    because `requests.Session` is not guaranteed to be thread-safe.
+    """
+    session = getattr(_session_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        session.mount("http://", _http_adapter())
+        session.mount("https://", _http_adapter())
+        _session_local.session = session
+    return session
+
+
+def fetch(url, timeout=REQUEST_TIMEOUT, headers=None):
+    """Fetches `url` through the pooled session and raises for HTTP error statuses."""
+    response = get_http_session().get(url, timeout=timeout, headers=headers)
+    response.raise_for_status()
+    return response
+
+
+@lru_cache(maxsize=None)
+def _fetch_executor():
+    return ThreadPoolExecutor(max_workers=MAX_CONNECTIONS, thread_name_prefix="web-fetch")
+
+
+@lru_cache(maxsize=None)
+def get_parse_pool():
+    """Process pool shared by every session for CPU-bound HTML parsing."""
+    return ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+
+
+async def fetch_all(urls, fetch_one=fetch, per_host=PER_HOST_CONNECTIONS, max_concurrency=MAX_CONNECTIONS):
+    """
+    Fetches many URLs concurrently with at most `per_host` requests in flight to any
+    single host and `max_concurrency` overall.
+
+    Args:
+        urls (Iterable[str]): The URLs to fetch.
+        fetch_one (Callable[[str], object]): Blocking fetch function, run in the shared
+            connection-pooled thread pool.
+        per_host (int): Concurrency limit per host.
+        max_concurrency (int): Overall concurrency limit.
+
+    Yields:
+        tuple[str, object, Exception | None]: The URL, its result (or None) and the error
+        (or None), in completion order.
+    """
+    loop = asyncio.get_running_loop()
+    overall = asyncio.Semaphore(max_concurrency)
+    host_limits = {}
+
+    async def run(url):
+        host = urlsplit(url).netloc.lower()
+        host_limit = host_limits.setdefault(host, asyncio.Semaphore(per_host))
+        async with overall, host_limit:
+            try:
+                return url, await loop.run_in_executor(_fetch_executor(), fetch_one, url), None
+            except Exception as e:
+                return url, None, e
+
+    for task in asyncio.as_completed([run(url) for url in urls]):
+        yield await task
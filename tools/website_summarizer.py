@@ -1,106 +1,288 @@
-import streamlit as st
+import asyncio
 import os
+import re
+
+import streamlit as st
 import requests
-from bs4 import BeautifulSoup
-import google.generativeai as genai
+from . import llm_client, metrics
+from .content_budget import plan_budget
+from .html_extract import default_engine, extract_html
+from .http_cache import CachedPage, get_http_cache, text_hash
+from .streaming import stream_markdown
+from .summarization import map_reduce_summarize
+from .web_fetch import REQUEST_TIMEOUT, fetch, fetch_all, get_parse_pool
 
-def website_summarizer_app():
-    gemini_api_key = os.getenv("GEMINI_API_KEY")
+TOOL_NAME = "website_summarizer"
+# Identifies `extract_content`; cached text from another extractor is re-extracted from the cached body.
+EXTRACTOR = f"readability-v2/{default_engine()}"
+MAX_BATCH_URLS = 500
+# Page tokens sent in one request, and the most a long page may use across its map-reduce requests.
+INPUT_TOKEN_BUDGET = int(os.getenv("LLM_TOOLS_WEBSITE_INPUT_TOKENS", "8000"))
+MAX_PAGE_TOKENS = int(os.getenv("LLM_TOOLS_WEBSITE_MAX_PAGE_TOKENS", str(INPUT_TOKEN_BUDGET * 8)))
+LLM_CONCURRENCY = int(os.getenv("LLM_TOOLS_WEBSITE_LLM_CONCURRENCY", "4"))
+URL_PATTERN = re.compile(r"https?://[^\s,;\"'<>]+")
 
-    if not gemini_api_key:
-        st.error(
-            "**ERROR:** Gemini API key not found for Website Summarizer. "
-            "Please set it as an environment variable named `GEMINI_API_KEY` "
-            "(e.g., in Streamlit Cloud secrets, Heroku config vars, or your local shell)."
-        )
+SYSTEM_PROMPT = "You are an assistant that summarizes website content, focusing on key information and ignoring navigation elements. Respond in markdown format. Provide a concise summary, ideally in 3-5 bullet points or a short paragraph."
+
+NO_CONTENT_MESSAGE = "Could not extract sufficient content from the provided URL, or an error occurred during scraping. Please try a different URL."
+
+
+def extract_content(html):
+    """
+    Extracts the title and main text from an HTML page. Pure and picklable, so batch
+    mode can run it in the shared parse process pool.
+
+    Args:
+        html (bytes): The page body.
+
+    Returns:
+        tuple[str | None, str]: The page title (None if missing) and its text, one
+        content block per line.
+    """
+    extraction = extract_html(html)
+    return extraction.title, extraction.text
+
+
+def describe_fetch_error(error):
+    """Returns the user-facing message for an exception raised while fetching or parsing a page."""
+    if isinstance(error, requests.exceptions.MissingSchema):
+        return "Invalid URL format. Please ensure it starts with 'http://' or 'https://'."
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return "Could not connect to the website. Please check the URL and your internet connection."
+    if isinstance(error, requests.exceptions.Timeout):
+        return f"The request to the website timed out after {REQUEST_TIMEOUT} seconds."
+    if isinstance(error, requests.exceptions.RequestException):
+        status_code = error.response.status_code if error.response is not None else 'N/A'
+        return f"Failed to retrieve the website content: {error}. Status code: {status_code}"
+    return f"An unexpected error occurred while parsing the website: {error}"
+
+
+def fetch_page(url):
+    """
+    Fetches a page through the HTTP cache. A fresh cached page is returned without a
+    request; a stale one is revalidated with a conditional GET and returned as-is on
+    304 Not Modified. Otherwise the new body is stored and returned for extraction.
+
+    Args:
+        url (str): The page URL.
+
+    Returns:
+        CachedPage: The page. Its `title` and `text` are usable only when its
+        `extractor` is `EXTRACTOR`; otherwise extract them from `body`.
+    """
+    cache = get_http_cache()
+    entry = cache.lookup(url)
+    if entry is not None and entry.fresh:
+        metrics.record_cache("http", hit=True)
+        return entry
+    with metrics.span("fetch", TOOL_NAME):
+        response = fetch(url, headers=entry.validators() if entry is not None else None)
+    if response.status_code == 304 and entry is not None:
+        metrics.record_cache("http", hit=True)
+        cache.refresh(url, response)
+        return entry
+    metrics.record_cache("http", hit=False)
+    cache.store(url, response)
+    return CachedPage(url, None, None, 0, response.content, None, None, None)
+
+
+def _store_extracted(page, title, text):
+    get_http_cache().store_text(page.url, EXTRACTOR, title, text)
+    return title, text
+
+
+class Website:
+    def __init__(self, url: str):
+        self.url = url
+        self.title = "No title found"
+        self.text = ""
+        self.error = None
+        self._scrape_website()
+
+    def _scrape_website(self):
+        try:
+            page = fetch_page(self.url)
+            if page.extractor == EXTRACTOR:
+                title, self.text = page.title, page.text
+            else:
+                with metrics.span("extract", TOOL_NAME):
+                    title, self.text = _store_extracted(page, *extract_content(page.body))
+            self.title = title or self.title
+        except Exception as e:
+            self.error = describe_fetch_error(e)
+            self.text = ""
+
+
+def generate_user_prompt(website_title, website_text):
+    user_prompt = f"Summarize the following website content professionally and concisely. "
+    user_prompt += f"The website is titled '{website_title}'.\n\n"
+    user_prompt += f"Content:\n\n{website_text}\n\n"
+    user_prompt += "Provide a summary in 3-5 bullet points or a short paragraph, focusing on the main message, key facts, and important announcements. Avoid introductory or concluding phrases like 'Here is a summary' or 'In conclusion'."
+    return user_prompt
+
+
+def generate_instruction(website_title):
+    return (
+        f"summarize the website titled '{website_title}' professionally and concisely in 3-5 bullet points or a short paragraph, "
+        "focusing on the main message, key facts, and important announcements. Avoid introductory or concluding phrases like 'Here is a summary' or 'In conclusion'."
+    )
+
+
+def _store_summary_when_done(chunks, key):
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    get_http_cache().put_summary(key, "".join(parts))
+
+
+def summarize_text(title, text, stream=False):
+    """
+    Summarizes extracted page text within the input token budget, reusing the stored
+    summary when the same text was summarized before by the same backend and model.
+
+    The most salient content blocks are packed into one request when they fit the
+    budget; longer pages are summarized with map-reduce over budget-sized chunks.
+    With `stream`, an iterator of text chunks is returned; map-reduce summaries and
+    stored summaries arrive as a single chunk.
+    """
+    key = f"{llm_client.get_backend().name}/{llm_client.DEFAULT_MODEL}/{INPUT_TOKEN_BUDGET}/{text_hash(title, text)}"
+    cache = get_http_cache()
+    summary = cache.get_summary(key)
+    metrics.record_cache("website_summary", hit=summary is not None)
+    if summary is None:
+        plan = plan_budget(text, INPUT_TOKEN_BUDGET, max_tokens=MAX_PAGE_TOKENS, title=title)
+        if plan.map_reduce:
+            summary = map_reduce_summarize(
+                plan.chunks,
+                lambda prompt: llm_client.generate(prompt, tool=TOOL_NAME),
+                instruction=generate_instruction(title),
+                token_budget=INPUT_TOKEN_BUDGET,
+                context_tokens=INPUT_TOKEN_BUDGET,
+            )
+        elif stream:
+            chunks = llm_client.generate(generate_user_prompt(title, plan.text), stream=True, tool=TOOL_NAME, cache=False)
+            return _store_summary_when_done(chunks, key)
+        else:
+            summary = llm_client.generate(generate_user_prompt(title, plan.text), tool=TOOL_NAME, cache=False)
+        cache.put_summary(key, summary)
+    return iter([summary]) if stream else summary
+
+
+def stream_website_summary(url):
+    """Fetches and summarizes a website, yielding the summary as it is generated."""
+    website = Website(url)
+    if website.error:
+        st.error(website.error)
+
+    if not website.text:
+        yield NO_CONTENT_MESSAGE
         return
 
-    genai.configure(api_key=gemini_api_key)
+    try:
+        yield from summarize_text(website.title, website.text, stream=True)
+    except Exception as e:
+        st.error(f"An error occurred while generating the summary: {e}. This might be due to content length or API issues. Please try again.")
+        yield "Failed to generate summary. Please try again or provide a different URL."
+
 
+def summarize_website_content(url):
+    return "".join(stream_website_summary(url))
+
+
+def summarize_url(url):
+    """
+    Fetches and summarizes one website without any UI, for headless callers.
+
+    Returns:
+        dict: A row like those of `summarize_urls`; "Status" is "OK" on success and
+        otherwise describes what went wrong.
+    """
+    website = Website(url)
+    row = {"URL": url, "Title": "", "Status": "", "Summary": ""}
+    if website.error:
+        row["Status"] = website.error
+        return row
+    row["Title"] = website.title
+    if not website.text:
+        row["Status"] = NO_CONTENT_MESSAGE
+        return row
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash')
+        row["Summary"] = summarize_text(website.title, website.text)
+        row["Status"] = "OK"
     except Exception as e:
-        st.error(f"Failed to initialize Gemini model for Website Summarizer: {e}. Please check your API key and try again.")
-        return
+        row["Status"] = f"An error occurred while generating the summary: {e}."
+    return row
 
-    class Website:
-        def __init__(self, url: str):
-            self.url = url
-            self.title = "No title found"
-            self.text = ""
-            self._scrape_website()
-
-        def _scrape_website(self):
-            try:
-                headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-                response = requests.get(self.url, headers=headers, timeout=15)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.content, "html.parser")
-                self.title = soup.title.string if soup.title and soup.title.string else self.title
-
-                for irrelevant in soup.find_all(["script", "style", "img", "input", "nav", "footer", "header", "aside", "form", "button", "link", "meta", "svg"]):
-                    irrelevant.decompose()
-
-                content_tags = ['main', 'article', 'div']
-                possible_content_divs = []
-                for tag in content_tags:
-                    possible_content_divs.extend(soup.find_all(tag, class_=['content', 'main-content', 'article-body', 'post-content', 'entry-content', 'body', 'text-body']))
-
-                extracted_text = ""
-                if possible_content_divs:
-                    for div in possible_content_divs:
-                        extracted_text += div.get_text(separator="\n", strip=True) + "\n"
-                elif soup.body:
-                    extracted_text = soup.body.get_text(separator="\n", strip=True)
-
-                self.text = "\n".join(filter(None, [line.strip() for line in extracted_text.splitlines()]))
-                self.text = ' '.join(self.text.split())
-                self.text = self.text[:15000]
-
-            except requests.exceptions.MissingSchema:
-                st.error(f"Invalid URL format. Please ensure it starts with 'http://' or 'https://'.")
-                self.text = ""
-            except requests.exceptions.ConnectionError:
-                st.error(f"Could not connect to the website. Please check the URL and your internet connection.")
-                self.text = ""
-            except requests.exceptions.Timeout:
-                st.error(f"The request to the website timed out after 15 seconds.")
-                self.text = ""
-            except requests.exceptions.RequestException as e:
-                st.error(f"Failed to retrieve the website content: {e}. Status code: {response.status_code if 'response' in locals() else 'N/A'}")
-                self.text = ""
-            except Exception as e:
-                st.error(f"An unexpected error occurred while parsing the website: {e}")
-                self.text = ""
-
-    SYSTEM_PROMPT = "You are an assistant that summarizes website content, focusing on key information and ignoring navigation elements. Respond in markdown format. Provide a concise summary, ideally in 3-5 bullet points or a short paragraph."
-
-    def generate_user_prompt(website_title, website_text):
-        user_prompt = f"Summarize the following website content professionally and concisely. "
-        user_prompt += f"The website is titled '{website_title}'.\n\n"
-        user_prompt += f"Content:\n\n{website_text}\n\n"
-        user_prompt += "Provide a summary in 3-5 bullet points or a short paragraph, focusing on the main message, key facts, and important announcements. Avoid introductory or concluding phrases like 'Here is a summary' or 'In conclusion'."
-        return user_prompt
-
-    def summarize_website_content(url, current_model):
-        if current_model is None:
-            return "Gemini API model is not configured. Cannot summarize."
-
-        website = Website(url)
-
-        if not website.text:
-            return "Could not extract sufficient content from the provided URL, or an error occurred during scraping. Please try a different URL."
-
-        user_prompt = generate_user_prompt(website.title, website.text)
 
+def parse_url_list(text):
+    """Returns the distinct http(s) URLs found in pasted text or an uploaded list, in order."""
+    urls = []
+    seen = set()
+    for match in URL_PATTERN.finditer(text):
+        url = match.group(0).rstrip(".)]")
+        if url not in seen:
+            seen.add(url)
+            urls.append(url)
+    return urls
+
+
+async def summarize_urls(urls, on_result, llm_concurrency=LLM_CONCURRENCY):
+    """
+    Summarizes many websites as one pipeline: pages are fetched concurrently through
+    the pooled HTTP client and the HTTP cache, parsed in the shared process pool as they arrive, and
+    summarized with at most `llm_concurrency` model calls in flight.
+
+    Args:
+        urls (list[str]): The URLs to summarize.
+        on_result (Callable[[dict], None]): Called on the event loop with each finished
+            row ({"URL", "Title", "Status", "Summary"}), in completion order.
+        llm_concurrency (int): Maximum concurrent summary requests.
+    """
+    loop = asyncio.get_running_loop()
+    llm_slots = asyncio.Semaphore(llm_concurrency)
+
+    async def summarize(url, page, error):
+        row = {"URL": url, "Title": "", "Status": "", "Summary": ""}
         try:
-            # Using the model passed from the main function
-            response = current_model.generate_content(user_prompt)
-            return response.text
+            if error is not None:
+                raise error
+            if page.extractor == EXTRACTOR:
+                title, text = page.title, page.text
+            else:
+                with metrics.span("extract", TOOL_NAME):
+                    title, text = _store_extracted(
+                        page, *await loop.run_in_executor(get_parse_pool(), extract_content, page.body)
+                    )
+            row["Title"] = title or "No title found"
+            if not text:
+                row["Status"] = NO_CONTENT_MESSAGE
+            else:
+                async with llm_slots:
+                    row["Summary"] = await asyncio.to_thread(summarize_text, row["Title"], text)
+                row["Status"] = "OK"
         except Exception as e:
-            st.error(f"An error occurred while generating the summary: {e}. This might be due to content length or API issues. Please try again.")
-            return "Failed to generate summary. Please try again or provide a different URL."
+            if row["Title"]:
+                row["Status"] = f"An error occurred while generating the summary: {e}."
+            else:
+                row["Status"] = describe_fetch_error(e)
+        on_result(row)
+
+    tasks = []
+    async for url, page, error in fetch_all(urls, fetch_one=fetch_page):
+        tasks.append(asyncio.create_task(summarize(url, page, error)))
+    await asyncio.gather(*tasks)
 
+
+def results_to_markdown(rows):
+    sections = []
+    for row in rows:
+        body = row["Summary"] if row["Status"] == "OK" else f"*{row['Status']}*"
+        sections.append(f"## [{row['Title'] or row['URL']}]({row['URL']})\n\n{body}\n")
+    return "\n".join(sections)
+
+
+def _single_url_app():
     st.subheader("Enter Website URL")
     url = st.text_input("URL:", placeholder="e.g., https://www.google.com/docs/gemini/summarization-example")
 
@@ -109,14 +291,12 @@ def website_summarizer_app():
 
     if st.button("Summarize Website", type="primary"):
         if url:
-            with st.spinner("Fetching and summarizing website content... This may take a moment."):
-                summary = summarize_website_content(url, model)
-                if summary and not summary.startswith("Gemini API model is not configured"):
-                    st.session_state.website_summary_output = summary
-                    st.markdown("### Summary")
-                    st.markdown(summary)
-                else:
-                    st.session_state.website_summary_output = ""
+            st.markdown("### Summary")
+            summary = stream_markdown(
+                stream_website_summary(url),
+                spinner_text="Fetching and summarizing website content... This may take a moment.",
+            )
+            st.session_state.website_summary_output = summary
         else:
             st.warning("Please enter a URL to summarize.")
 
@@ -128,3 +308,85 @@ def website_summarizer_app():
             mime="text/markdown",
             help="Click to download the generated summary as a Markdown file."
         )
+
+
+def _batch_app():
+    # Only the batch mode needs pandas; importing it here keeps the tool quick to open.
+    import pandas as pd
+
+    st.subheader("Enter Website URLs")
+    url_text = st.text_area("URLs (one per line):", height=150, key="website_batch_urls")
+    url_file = st.file_uploader("...or upload a list of URLs", type=["txt", "csv"], key="website_batch_file")
+
+    if 'website_batch_results' not in st.session_state:
+        st.session_state.website_batch_results = []
+
+    if st.button("Summarize Websites", type="primary"):
+        text = url_text or ""
+        if url_file is not None:
+            text += "\n" + url_file.getvalue().decode("utf-8", errors="replace")
+        urls = parse_url_list(text)
+
+        if not urls:
+            st.warning("Please enter at least one URL starting with 'http://' or 'https://'.")
+        else:
+            if len(urls) > MAX_BATCH_URLS:
+                st.warning(f"Only the first {MAX_BATCH_URLS} of {len(urls)} URLs will be summarized.")
+                urls = urls[:MAX_BATCH_URLS]
+
+            rows = []
+            progress_bar = st.progress(0.0, text=f"Summarizing 0 of {len(urls)} websites...")
+            table = st.empty()
+
+            def add_row(row):
+                rows.append(row)
+                progress_bar.progress(len(rows) / len(urls), text=f"Summarizing {len(rows)} of {len(urls)} websites...")
+                table.dataframe(pd.DataFrame(rows))
+
+            asyncio.run(summarize_urls(urls, add_row))
+            progress_bar.empty()
+            table.empty()
+            # Completion order is arbitrary; keep the exported results in input order.
+            order = {url: i for i, url in enumerate(urls)}
+            rows.sort(key=lambda row: order[row["URL"]])
+            st.session_state.website_batch_results = rows
+            failed = sum(row["Status"] != "OK" for row in rows)
+            if failed:
+                st.warning(f"{failed} of {len(rows)} websites could not be summarized.")
+            else:
+                st.success(f"Summarized {len(rows)} websites.")
+
+    rows = st.session_state.website_batch_results
+    if rows:
+        st.dataframe(pd.DataFrame(rows))
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                label="Download as CSV",
+                data=pd.DataFrame(rows).to_csv(index=False),
+                file_name="website_summaries.csv",
+                mime="text/csv",
+            )
+        with col2:
+            st.download_button(
+                label="Download as Markdown",
+                data=results_to_markdown(rows),
+                file_name="website_summaries.md",
+                mime="text/markdown",
+            )
+
+
+def website_summarizer_app():
+    if llm_client.api_key_missing():
+        st.error(
+            "**ERROR:** Gemini API key not found for Website Summarizer. "
+            "Please set it as an environment variable named `GEMINI_API_KEY` "
+            "(e.g., in Streamlit Cloud secrets, Heroku config vars, or your local shell)."
+        )
+        return
+
+    mode = st.radio("Mode", ["Single URL", "Batch"], horizontal=True, key="website_mode")
+    if mode == "Single URL":
+        _single_url_app()
+    else:
+        _batch_app()